@@ -0,0 +1,157 @@
+"""
+Бенчмарк задержки запросов при разных режимах логирования.
+
+Выполняет GET /urls/<id> через тестовый клиент Flask с репозиториями
+в памяти (без базы данных и без кэша ответов, чтобы каждый запрос
+отрисовывал страницу и писал в лог) в трех режимах:
+
+    off   - логирование отключено (logging.disable);
+    sync  - обработчики пишут в консоль и файл в потоке запроса;
+    queue - потоки запросов только ставят записи в очередь
+            ('QueueHandler' / 'QueueListener').
+
+Для каждого режима выводит число запросов в секунду, p50/p99 задержки
+и число отброшенных выборкой и переполнением очереди записей. Каждый
+режим измеряется в отдельном процессе, вывод консольного обработчика
+направляется в /dev/null, файл лога - во временный каталог.
+
+Запуск:
+    poetry run python benchmarks/logging_benchmark.py --requests 2000
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+
+MODES = ('off', 'sync', 'queue')
+
+
+class MemoryUrlRepository:
+    """Репозиторий URL в памяти с данными одного URL и его проверками."""
+
+    def __init__(self, checks_count: int):
+        now = datetime.now()
+        self.url = {'id': 1, 'name': 'https://example.com', 'created_at': now}
+        self.checks = [
+            {
+                'id': check_id,
+                'url_id': 1,
+                'status_code': 200,
+                'h1': 'Заголовок страницы ' * 3,
+                'title': 'Title of the page ' * 5,
+                'description': 'Описание страницы для поисковых систем ' * 5,
+                'conditional_hit': check_id % 3 == 0,
+                'created_at': now,
+            }
+            for check_id in range(checks_count, 0, -1)
+        ]
+
+    def find_url(self, id: int):
+        return dict(self.url)
+
+    def find_checks_urll(self, url_id: int, limit: int, **kwargs):
+        from page_analyzer.repositories.pagination import Page
+
+        return Page([dict(check) for check in self.checks[:limit]])
+
+
+class MemoryCheckJobRepository:
+    def find_jobs_url(self, url_id: int, limit: int = 5):
+        return []
+
+
+class MemoryVersionRepository:
+    def get_versions(self, names):
+        return dict.fromkeys(names, 0)
+
+
+def run_mode(mode: str, requests: int, threads: int) -> Dict[str, Any]:
+    """
+    Выполняет 'requests' запросов в 'threads' потоках в режиме 'mode'.
+    Выполняется в отдельном процессе.
+    """
+
+    os.chdir(tempfile.mkdtemp(prefix='logging_benchmark_'))
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 2)
+
+    os.environ['LOG_QUEUE_ENABLED'] = 'true' if mode == 'queue' else 'false'
+    os.environ['URL_CACHE_BACKEND'] = 'none'
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    from page_analyzer import app
+    from page_analyzer import log_setup
+    from page_analyzer.services.bulk_check import percentile
+
+    if mode == 'off':
+        logging.disable(logging.CRITICAL)
+
+    app.url_repo = MemoryUrlRepository(app.config['CHECKS_PAGE_SIZE'])
+    app.check_job_repo = MemoryCheckJobRepository()
+    app.cache_version_repo = MemoryVersionRepository()
+
+    def request(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.get('/urls/1')
+        assert response.status_code == 200, response.status_code
+
+        return time.perf_counter() - started
+
+    for _ in range(50):  # Прогрев: загрузка шаблонов, первые соединения
+        request(None)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(request, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    log_setup.stop_logging()  # Дописываем очередь до выхода из процесса
+
+    return {
+        'rps': requests / elapsed,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'dropped': sum(
+            handler.dropped for handler in log_setup._queue_handlers
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument(
+        '--modes', nargs='+', choices=MODES, default=list(MODES)
+    )
+    args = parser.parse_args()
+
+    print(
+        f'{"режим":8} {"запр./с":>9} {"p50, мс":>9} {"p99, мс":>9} '
+        f'{"отброшено":>10}'
+    )
+
+    context = multiprocessing.get_context('spawn')
+
+    for mode in args.modes:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            stats = executor.submit(
+                run_mode, mode, args.requests, args.threads
+            ).result()
+
+        print(
+            f'{mode:8} {stats["rps"]:9.1f} {stats["p50"] * 1000:9.3f} '
+            f'{stats["p99"] * 1000:9.3f} {stats["dropped"]:10}'
+        )
+
+
+if __name__ == '__main__':
+    main()
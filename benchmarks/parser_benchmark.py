@@ -0,0 +1,157 @@
+"""
+Бенчмарк способов разбора HTML ('page_analyzer.services.parser_backends').
+
+Прогоняет каждый доступный способ разбора по страницам из каталога
+'corpus' (страницы разного размера, в том числе с некорректной
+разметкой), проверяет, что все способы извлекают те же h1, title и
+description, что и 'html.parser' (расхождения выводятся, а с флагом
+'--strict' приводят к ненулевому коду завершения), и для каждого
+способа выводит число страниц в секунду, p50/p99 времени разбора
+страницы и пиковый RSS. Каждый способ измеряется в отдельном
+процессе, чтобы память, занятая одним способом, не влияла на замеры
+другого.
+
+Запуск:
+    poetry run python benchmarks/parser_benchmark.py --repeat 20
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+from pathlib import Path
+import resource
+import sys
+import time
+from typing import Any, Dict
+
+from page_analyzer.services.bulk_check import percentile
+from page_analyzer.services.parser_backends import (
+    BACKENDS,
+    SoupBackend,
+    available_backends
+)
+
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+
+REFERENCE_BACKEND = SoupBackend.name
+
+
+def load_corpus() -> Dict[str, str]:
+    """Загружает страницы корпуса: имя файла -> текст страницы."""
+
+    return {
+        path.name: path.read_text(encoding='utf-8')
+        for path in sorted(CORPUS_DIR.glob('*.html'))
+    }
+
+
+def check_agreement(corpus: Dict[str, str]) -> bool:
+    """
+    Сравнивает результаты всех способов разбора с 'html.parser'.
+    Выводит расхождения и возвращает True, если их нет.
+    """
+
+    backends = available_backends()
+    reference = backends[REFERENCE_BACKEND]
+    agreed = True
+
+    for name, page in corpus.items():
+        expected = reference.extract(page)
+
+        for backend in backends.values():
+            result = backend.extract(page)
+
+            if result != expected:
+                agreed = False
+                print(
+                    f'РАСХОЖДЕНИЕ {name}, {backend.name}:\n'
+                    f'    {REFERENCE_BACKEND:12} {expected!r}\n'
+                    f'    {backend.name:12} {result!r}'
+                )
+
+    return agreed
+
+
+def run_backend(backend_name: str, repeat: int) -> Dict[str, Any]:
+    """
+    Разбирает корпус 'repeat' раз способом 'backend_name'.
+    Выполняется в отдельном процессе.
+    """
+
+    logging.getLogger('page_analyzer').setLevel(logging.WARNING)
+
+    backend = BACKENDS[backend_name]
+    corpus = list(load_corpus().values())
+    latencies = []
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for page in corpus:
+            page_started = time.perf_counter()
+            backend.extract(page)
+            latencies.append(time.perf_counter() - page_started)
+
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        'pages_per_sec': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'peak_rss_kb': rss_after,
+        'rss_growth_kb': rss_after - rss_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument(
+        '--strict', action='store_true',
+        help='Завершиться с ошибкой, если способы разбора расходятся.'
+    )
+    args = parser.parse_args()
+
+    # Отладочные логи парсера искажают замеры
+    logging.getLogger('page_analyzer').setLevel(logging.WARNING)
+
+    corpus = load_corpus()
+    sizes = ', '.join(
+        f'{name} ({len(page.encode()) / 1024:.1f} КБ)'
+        for name, page in corpus.items()
+    )
+    print(f'Корпус: {sizes}\n')
+
+    skipped = ', '.join(sorted(set(BACKENDS) - set(available_backends())))
+    if skipped:
+        print(f'Пропущены (не установлены): {skipped}\n')
+
+    if check_agreement(corpus):
+        print(f'Все способы разбора совпадают на {len(corpus)} страницах.\n')
+    elif args.strict:
+        sys.exit(1)
+
+    print(
+        f'{"способ":12} {"стр./с":>9} {"p50, мс":>9} {"p99, мс":>9} '
+        f'{"пик RSS, МБ":>12} {"прирост RSS, МБ":>16}'
+    )
+
+    context = multiprocessing.get_context('spawn')
+
+    for name in available_backends():
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            stats = executor.submit(run_backend, name, args.repeat).result()
+
+        print(
+            f'{name:12} {stats["pages_per_sec"]:9.1f} '
+            f'{stats["p50"] * 1000:9.3f} {stats["p99"] * 1000:9.3f} '
+            f'{stats["peak_rss_kb"] / 1024:12.1f} '
+            f'{stats["rss_growth_kb"] / 1024:16.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
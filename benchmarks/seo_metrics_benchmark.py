@@ -0,0 +1,171 @@
+"""
+Бенчмарк метрик SEO ('page_analyzer.services.seo_metrics').
+
+Для N = 0..--max-metrics метрик (встроенные метрики по кругу) разбирает
+страницы каталога 'corpus' двумя способами:
+
+    один проход - все N метрик получают события одного прохода
+        'PageExtractor' (так метрики вычисляются в 'PageAnalyzer');
+    N проходов - каждая метрика вычисляется отдельным проходом
+        по документу (как если бы каждая метрика искала свои теги
+        в странице сама).
+
+Выводит время разбора страницы в обоих случаях и прирост времени
+одного прохода на каждую метрику относительно прохода без метрик.
+При одном проходе время растет на небольшую долю прохода на
+метрику, при N проходах - на целый проход на метрику.
+
+Затем для нескольких наборов метрик показывает, какую долю страницы
+разбирает потоковая загрузка (страница передается частями по
+--chunk символов до 'PageExtractor.complete'): метрики HEAD
+(canonical, robots) не мешают остановке после h1, title и
+description, а links, images и headings требуют всей страницы.
+
+Запуск:
+    poetry run python benchmarks/seo_metrics_benchmark.py --repeat 10
+"""
+import argparse
+from itertools import cycle, islice
+import logging
+from pathlib import Path
+import time
+from typing import Dict, List, Type
+
+from page_analyzer.services.extractor import PageExtractor
+from page_analyzer.services.seo_metrics import (
+    METRICS,
+    MetricSet,
+    SeoMetric,
+    create_metric_set
+)
+
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+
+PAGE_URL = 'https://example.com/'
+
+# Наборы метрик для замера потоковой остановки
+STREAM_METRIC_SETS = ('', 'canonical,robots', ','.join(METRICS))
+
+
+def load_corpus() -> Dict[str, str]:
+    """Загружает страницы корпуса: имя файла -> текст страницы."""
+
+    return {
+        path.name: path.read_text(encoding='utf-8')
+        for path in sorted(CORPUS_DIR.glob('*.html'))
+    }
+
+
+def walk(page: str, metrics: List[Type[SeoMetric]]) -> None:
+    """Один проход 'PageExtractor' по странице с набором метрик."""
+
+    extractor = PageExtractor(
+        MetricSet([metric(PAGE_URL) for metric in metrics])
+    )
+    extractor.feed(page)
+    extractor.close()
+    extractor.metrics.results()
+
+
+def stream_walk(page: str, names: str, chunk: int) -> int:
+    """
+    Передает страницу 'PageExtractor' частями до 'complete' (как
+    потоковая загрузка). Возвращает число разобранных символов.
+    """
+
+    extractor = PageExtractor(create_metric_set(names.split(','), PAGE_URL))
+    parsed = 0
+
+    while parsed < len(page) and not extractor.complete:
+        extractor.feed(page[parsed:parsed + chunk])
+        parsed += chunk
+
+    extractor.close()
+
+    return min(parsed, len(page))
+
+
+def print_stream_stop(corpus: List[str], repeat: int, chunk: int) -> None:
+    """Доля разобранной страницы и время разбора для наборов метрик."""
+
+    print(
+        f'\nПотоковый разбор частями по {chunk} символов:\n'
+        f'{"метрики":40} {"разобрано":>10} {"мс/стр.":>9}'
+    )
+
+    total = sum(len(page) for page in corpus)
+
+    for names in STREAM_METRIC_SETS:
+        parsed = sum(stream_walk(page, names, chunk) for page in corpus)
+        elapsed = measure(
+            corpus, repeat, lambda page: stream_walk(page, names, chunk)
+        )
+
+        print(
+            f'{names or "-":40} {parsed / total:10.1%} '
+            f'{elapsed * 1000:9.3f}'
+        )
+
+
+def measure(corpus: List[str], repeat: int, run) -> float:
+    """Среднее время разбора одной страницы функцией 'run', секунды."""
+
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for page in corpus:
+            run(page)
+
+    return (time.perf_counter() - started) / (repeat * len(corpus))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--max-metrics', type=int, default=2 * len(METRICS),
+        help='Наибольшее число метрик (встроенные метрики по кругу).'
+    )
+    parser.add_argument(
+        '--chunk', type=int, default=1024,
+        help='Размер части страницы при потоковом разборе (символов).'
+    )
+    args = parser.parse_args()
+
+    # Отладочные логи парсера искажают замеры
+    logging.getLogger('page_analyzer').setLevel(logging.WARNING)
+
+    corpus = list(load_corpus().values())
+    print(
+        f'Корпус: {len(corpus)} страниц, метрики: {", ".join(METRICS)}\n'
+    )
+    print(
+        f'{"N":>3} {"один проход, мс":>16} {"N проходов, мс":>15} '
+        f'{"прирост на метрику":>19}'
+    )
+
+    base = measure(corpus, args.repeat, lambda page: walk(page, []))
+
+    for count in range(args.max_metrics + 1):
+        metrics = list(islice(cycle(METRICS.values()), count))
+
+        single = measure(
+            corpus, args.repeat, lambda page: walk(page, metrics)
+        )
+        separate = measure(
+            corpus, args.repeat,
+            lambda page: [walk(page, [metric]) for metric in metrics]
+        ) if metrics else base
+        per_metric = (single - base) / base / count if count else 0.0
+
+        print(
+            f'{count:3} {single * 1000:16.3f} {separate * 1000:15.3f} '
+            f'{per_metric:18.1%}'
+        )
+
+    print_stream_stop(corpus, args.repeat, args.chunk)
+
+
+if __name__ == '__main__':
+    main()
@@ -37,3 +37,482 @@ CREATE TABLE IF NOT EXISTS url_checks (
     description VARCHAR(255),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
+
+
+-- Таблица check_jobs - очередь фоновых проверок URL.
+-- Поля:
+-- id - уникальный идентификатор задания (SERIAL PRIMARY KEY).
+-- url_id - идентификатор проверяемого URL (BIGINT, внешний ключ).
+-- status - состояние задания: 'pending' (в очереди), 'running' (выполняется),
+-- 'done' (завершено), 'failed' (завершено с ошибкой).
+-- message - сообщение о результате проверки (VARCHAR(255)).
+-- created_at - дата и время постановки задания в очередь.
+-- started_at - дата и время начала выполнения задания воркером.
+-- finished_at - дата и время завершения задания.
+
+CREATE TABLE IF NOT EXISTS check_jobs (
+    id SERIAL PRIMARY KEY,
+    url_id BIGINT NOT NULL REFERENCES urls (id),
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    message VARCHAR(255),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Воркеры выбирают задания в порядке постановки в очередь.
+CREATE INDEX IF NOT EXISTS check_jobs_pending_idx
+    ON check_jobs (created_at, id) WHERE status = 'pending';
+
+-- Для одного URL в очереди может быть только одно активное задание.
+CREATE UNIQUE INDEX IF NOT EXISTS check_jobs_active_url_idx
+    ON check_jobs (url_id) WHERE status IN ('pending', 'running');
+
+CREATE INDEX IF NOT EXISTS check_jobs_url_id_idx
+    ON check_jobs (url_id, created_at DESC);
+
+
+-- bytes_read - сколько байт тела страницы было прочитано при проверке
+-- (при потоковой загрузке чтение прекращается, как только найдены
+-- h1, title и description, или по достижении лимита байт).
+ALTER TABLE url_checks ADD COLUMN IF NOT EXISTS bytes_read INT;
+
+
+-- Валидаторы ответа для условных повторных проверок:
+-- etag - заголовок ETag ответа (VARCHAR(255)).
+-- last_modified - заголовок Last-Modified ответа (VARCHAR(255)).
+-- conditional_hit - сервер ответил 304 Not Modified, и h1, title и
+-- description взяты из предыдущей проверки без загрузки страницы.
+ALTER TABLE url_checks ADD COLUMN IF NOT EXISTS etag VARCHAR(255);
+ALTER TABLE url_checks ADD COLUMN IF NOT EXISTS last_modified VARCHAR(255);
+ALTER TABLE url_checks
+    ADD COLUMN IF NOT EXISTS conditional_hit BOOLEAN NOT NULL DEFAULT FALSE;
+
+
+-- Сводка о последней проверке URL хранится в таблице urls, чтобы
+-- список сайтов строился простым чтением urls без подзапроса к
+-- url_checks для каждой строки. Поля обновляются в той же транзакции,
+-- что и вставка проверки.
+-- last_check_at - дата и время последней проверки (TIMESTAMP).
+-- last_status_code - HTTP статус код последней проверки (INT).
+ALTER TABLE urls ADD COLUMN IF NOT EXISTS last_check_at TIMESTAMP;
+ALTER TABLE urls ADD COLUMN IF NOT EXISTS last_status_code INT;
+
+CREATE INDEX IF NOT EXISTS urls_created_at_idx ON urls (created_at DESC);
+
+CREATE INDEX IF NOT EXISTS url_checks_url_id_created_at_idx
+    ON url_checks (url_id, created_at DESC);
+
+-- Заполнение сводки для URL, проверенных до появления этих полей.
+-- Повторный запуск затрагивает только URL без сводки.
+UPDATE urls
+SET last_check_at = latest.created_at,
+    last_status_code = latest.status_code
+FROM (
+    SELECT DISTINCT ON (url_id) url_id, status_code, created_at
+    FROM url_checks
+    WHERE url_id IN (SELECT id FROM urls WHERE last_check_at IS NULL)
+    ORDER BY url_id, created_at DESC, id DESC
+) AS latest
+WHERE urls.id = latest.url_id;
+
+-- Keyset-пагинация списка сайтов и истории проверок по паре
+-- (created_at, id): составные индексы позволяют выбрать страницу
+-- условием на позицию строки без OFFSET и без сортировки.
+-- Они заменяют индексы только по created_at.
+CREATE INDEX IF NOT EXISTS urls_created_at_id_idx
+    ON urls (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS url_checks_url_id_created_at_id_idx
+    ON url_checks (url_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS urls_created_at_idx;
+DROP INDEX IF EXISTS url_checks_url_id_created_at_idx;
+
+-- Уникальность URL без учета регистра: индекс по lower(name)
+-- используется в INSERT ... ON CONFLICT при добавлении URL (один
+-- запрос вместо SELECT + INSERT, без гонки при одновременном
+-- добавлении). Перед созданием индекса дубликаты, накопившиеся до
+-- его появления, объединяются в строку с наименьшим id: проверки и
+-- завершенные задания переносятся на нее, активные задания дубликатов
+-- удаляются, а сводка о последней проверке пересчитывается.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_indexes WHERE indexname = 'urls_name_lower_key'
+    ) THEN
+        CREATE TEMP TABLE url_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY lower(name)) AS keep_id
+            FROM urls
+        ) AS grouped
+        WHERE id <> keep_id;
+
+        UPDATE url_checks
+        SET url_id = duplicates.keep_id
+        FROM url_duplicates AS duplicates
+        WHERE url_checks.url_id = duplicates.id;
+
+        DELETE FROM check_jobs
+        USING url_duplicates AS duplicates
+        WHERE check_jobs.url_id = duplicates.id
+            AND check_jobs.status IN ('pending', 'running');
+
+        UPDATE check_jobs
+        SET url_id = duplicates.keep_id
+        FROM url_duplicates AS duplicates
+        WHERE check_jobs.url_id = duplicates.id;
+
+        DELETE FROM urls
+        USING url_duplicates AS duplicates
+        WHERE urls.id = duplicates.id;
+
+        UPDATE urls
+        SET last_check_at = latest.created_at,
+            last_status_code = latest.status_code
+        FROM (
+            SELECT DISTINCT ON (url_id) url_id, status_code, created_at
+            FROM url_checks
+            WHERE url_id IN (SELECT keep_id FROM url_duplicates)
+            ORDER BY url_id, created_at DESC, id DESC
+        ) AS latest
+        WHERE urls.id = latest.url_id;
+
+        CREATE UNIQUE INDEX urls_name_lower_key ON urls (lower(name));
+    END IF;
+END $$;
+
+-- Таблица cache_versions - версии страниц для кэша ответов и ETag.
+-- Версия страницы сайта увеличивается тем же запросом, что изменяет ее
+-- данные, а общая версия списка сайтов ('urls') - отдельной короткой
+-- транзакцией после коммита, чтобы записи не ждали друг друга на ее строке.
+-- Поля:
+-- name - имя версии: 'urls' (список сайтов) или 'url:<id>' (страница
+-- сайта) (VARCHAR(64), первичный ключ).
+-- version - номер версии (BIGINT).
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+-- Расписание повторных проверок (процесс 'page_analyzer scheduler'):
+-- check_interval - интервал повторной проверки URL (INTERVAL); NULL -
+-- интервал по умолчанию (SCHEDULER_DEFAULT_INTERVAL).
+-- next_check_at - когда URL нужно проверить в следующий раз (TIMESTAMP).
+-- При добавлении столбца время первой проверки существующих URL
+-- распределяется случайно в пределах суток после последней проверки,
+-- чтобы они не стали "просроченными" одновременно.
+ALTER TABLE urls ADD COLUMN IF NOT EXISTS check_interval INTERVAL;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'urls' AND column_name = 'next_check_at'
+    ) THEN
+        ALTER TABLE urls
+            ADD COLUMN next_check_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+        UPDATE urls
+        SET next_check_at = GREATEST(
+            COALESCE(last_check_at, created_at) + INTERVAL '1 day',
+            NOW()
+        ) + random() * INTERVAL '1 day';
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS urls_next_check_at_idx
+    ON urls (next_check_at, id);
+
+-- Повторяющиеся результаты проверок хранятся одной строкой:
+-- content_hash - MD5 полей status_code, h1, title и description,
+-- разделенных символом chr(31) (BYTEA, 16 байт; вычисляется
+-- приложением тем же способом, см. 'content_hash' в repositories/url.py).
+-- last_seen_at - когда результат был получен последний раз (TIMESTAMP).
+-- seen_count - сколько проверок подряд дали этот результат (INT).
+-- conditional_hits - сколько из них получили ответ 304 Not Modified
+-- (INT; результаты такой проверки взяты из предыдущей, поэтому она
+-- всегда совпадает с последней проверкой).
+-- Если проверка совпадает с последней проверкой URL, новая строка не
+-- вставляется, а у последней увеличивается seen_count. При добавлении
+-- столбцов накопленная история сжимается: каждая серия подряд идущих
+-- одинаковых проверок URL заменяется ее первой строкой со временем и
+-- валидаторами ответа последней и числом прочитанных байт последней
+-- проверки без ответа 304.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'url_checks' AND column_name = 'content_hash'
+    ) THEN
+        ALTER TABLE url_checks
+            ADD COLUMN content_hash BYTEA,
+            ADD COLUMN last_seen_at TIMESTAMP,
+            ADD COLUMN seen_count INT NOT NULL DEFAULT 1,
+            ADD COLUMN conditional_hits INT NOT NULL DEFAULT 0;
+
+        UPDATE url_checks
+        SET content_hash = decode(md5(concat(
+                status_code, chr(31), h1, chr(31), title, chr(31), description
+            )), 'hex'),
+            last_seen_at = created_at,
+            conditional_hits = conditional_hit::int;
+
+        CREATE TEMP TABLE check_runs ON COMMIT DROP AS
+        WITH marked AS (
+            SELECT id, url_id, created_at, bytes_read, etag, last_modified,
+                conditional_hit,
+                (content_hash IS DISTINCT FROM lag(content_hash) OVER (
+                    PARTITION BY url_id ORDER BY created_at, id
+                ))::int AS run_start
+            FROM url_checks
+        ),
+        numbered AS (
+            SELECT *, sum(run_start) OVER (
+                PARTITION BY url_id ORDER BY created_at, id
+            ) AS run
+            FROM marked
+        )
+        SELECT id, keep_id, seen_count, conditional_hits, last_seen_at,
+            COALESCE(
+                fetched_bytes[array_length(fetched_bytes, 1)], bytes_read
+            ) AS bytes_read,
+            etag, last_modified
+        FROM (
+            SELECT id,
+                first_value(id) OVER run AS keep_id,
+                count(*) OVER run AS seen_count,
+                count(*) FILTER (WHERE conditional_hit) OVER run
+                    AS conditional_hits,
+                last_value(created_at) OVER run AS last_seen_at,
+                last_value(bytes_read) OVER run AS bytes_read,
+                array_agg(bytes_read) FILTER (WHERE NOT conditional_hit)
+                    OVER run AS fetched_bytes,
+                last_value(etag) OVER run AS etag,
+                last_value(last_modified) OVER run AS last_modified
+            FROM numbered
+            WINDOW run AS (
+                PARTITION BY url_id, run ORDER BY created_at, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+            )
+        ) AS runs;
+
+        DELETE FROM url_checks
+        USING check_runs AS runs
+        WHERE url_checks.id = runs.id AND runs.id <> runs.keep_id;
+
+        UPDATE url_checks
+        SET seen_count = runs.seen_count,
+            conditional_hits = runs.conditional_hits,
+            last_seen_at = runs.last_seen_at,
+            bytes_read = runs.bytes_read,
+            etag = runs.etag,
+            last_modified = runs.last_modified
+        FROM check_runs AS runs
+        WHERE url_checks.id = runs.id AND runs.seen_count > 1;
+    END IF;
+END $$;
+
+-- Счетчик ответов 304 для базы, история которой уже сжата без него
+-- (повторы с ответом 304 до его добавления не восстанавливаются).
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'url_checks'
+            AND column_name = 'conditional_hits'
+    ) THEN
+        ALTER TABLE url_checks
+            ADD COLUMN conditional_hits INT NOT NULL DEFAULT 0;
+
+        UPDATE url_checks SET conditional_hits = 1 WHERE conditional_hit;
+    END IF;
+END $$;
+
+-- Таблица url_check_daily - дневная сводка проверок URL. Обновляется
+-- тем же запросом, что сохраняет проверки, и остается после удаления
+-- старых секций url_checks, поэтому длинная история сайта выводится
+-- из сводки, а не из строк проверок.
+-- Поля:
+-- url_id - идентификатор URL (BIGINT, внешний ключ).
+-- day - день проверок (DATE).
+-- checks_count - число проверок за день (INT).
+-- status_codes - число проверок по кодам ответа, например
+-- {"200": 5, "503": 1} (JSONB).
+-- first_title, last_title - title первой и последней проверки дня.
+-- first_check_at, last_check_at - время первой и последней проверки дня.
+-- При создании таблицы сводка заполняется по накопленной истории;
+-- повторы сжатых ранее проверок (seen_count) относятся ко дню первой
+-- проверки серии.
+DO $$
+BEGIN
+    IF to_regclass('url_check_daily') IS NULL THEN
+        CREATE TABLE url_check_daily (
+            url_id BIGINT NOT NULL REFERENCES urls (id),
+            day DATE NOT NULL,
+            checks_count INT NOT NULL,
+            status_codes JSONB NOT NULL,
+            first_title VARCHAR(255),
+            last_title VARCHAR(255),
+            first_check_at TIMESTAMP NOT NULL,
+            last_check_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (url_id, day)
+        );
+
+        INSERT INTO url_check_daily (
+            url_id, day, checks_count, status_codes,
+            first_title, last_title, first_check_at, last_check_at
+        )
+        SELECT checks.url_id, checks.day, checks.checks_count,
+            statuses.codes, checks.first_title, checks.last_title,
+            checks.first_check_at, checks.last_check_at
+        FROM (
+            SELECT url_id, created_at::date AS day,
+                sum(seen_count) AS checks_count,
+                (array_agg(title ORDER BY created_at, id))[1] AS first_title,
+                (array_agg(title ORDER BY created_at DESC, id DESC))[1]
+                    AS last_title,
+                min(created_at) AS first_check_at,
+                max(COALESCE(last_seen_at, created_at)) AS last_check_at
+            FROM url_checks
+            WHERE url_id IS NOT NULL
+            GROUP BY 1, 2
+        ) AS checks
+        JOIN (
+            SELECT url_id, day, jsonb_object_agg(status, checks) AS codes
+            FROM (
+                SELECT url_id, created_at::date AS day,
+                    COALESCE(status_code::text, 'none') AS status,
+                    sum(seen_count) AS checks
+                FROM url_checks
+                WHERE url_id IS NOT NULL
+                GROUP BY 1, 2, 3
+            ) AS counts
+            GROUP BY url_id, day
+        ) AS statuses USING (url_id, day);
+    END IF;
+END $$;
+
+-- Секционирование url_checks по месяцам (created_at). Секция месяца
+-- называется url_checks_YYYY_MM; строки месяцев без своей секции
+-- попадают в url_checks_default. Секции на следующие месяцы создает
+-- и старые удаляет команда 'page_analyzer prune-checks' (ее нужно
+-- запускать по расписанию, например раз в сутки).
+-- url_checks_create_partition создает секцию месяца, если ее нет,
+-- и переносит в нее строки этого месяца из секции по умолчанию.
+CREATE OR REPLACE FUNCTION url_checks_create_partition(for_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', for_month)::date;
+    end_at DATE := (start_at + INTERVAL '1 month')::date;
+    partition_name TEXT := 'url_checks_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE url_checks INCLUDING DEFAULTS)',
+        partition_name
+    );
+
+    IF to_regclass('url_checks_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM url_checks_default'
+            '    WHERE created_at >= %L AND created_at < %L'
+            '    RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            start_at, end_at, partition_name
+        );
+    END IF;
+
+    EXECUTE format(
+        'ALTER TABLE url_checks ATTACH PARTITION %I '
+        'FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, end_at
+    );
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Перевод существующей таблицы: строки копируются в секционированную
+-- таблицу с секциями от месяца первой проверки до двух месяцев вперед.
+-- Первичный ключ секционированной таблицы включает created_at.
+DO $$
+DECLARE
+    partition_month DATE;
+BEGIN
+    IF (
+        SELECT relkind FROM pg_class WHERE oid = 'url_checks'::regclass
+    ) = 'r' THEN
+        ALTER TABLE url_checks RENAME TO url_checks_unpartitioned;
+        ALTER SEQUENCE url_checks_id_seq OWNED BY NONE;
+
+        CREATE TABLE url_checks (
+            LIKE url_checks_unpartitioned INCLUDING DEFAULTS
+        ) PARTITION BY RANGE (created_at);
+
+        CREATE TABLE url_checks_default PARTITION OF url_checks DEFAULT;
+
+        FOR partition_month IN
+            SELECT generate_series(
+                date_trunc('month', COALESCE(
+                    (SELECT min(created_at) FROM url_checks_unpartitioned),
+                    NOW()
+                )),
+                date_trunc('month', NOW()) + INTERVAL '2 months',
+                INTERVAL '1 month'
+            )::date
+        LOOP
+            PERFORM url_checks_create_partition(partition_month);
+        END LOOP;
+
+        INSERT INTO url_checks SELECT * FROM url_checks_unpartitioned;
+        DROP TABLE url_checks_unpartitioned;
+
+        ALTER SEQUENCE url_checks_id_seq OWNED BY url_checks.id;
+        ALTER TABLE url_checks ADD PRIMARY KEY (id, created_at);
+        ALTER TABLE url_checks
+            ADD FOREIGN KEY (url_id) REFERENCES urls (id);
+        CREATE INDEX url_checks_url_id_created_at_id_idx
+            ON url_checks (url_id, created_at DESC, id DESC);
+    END IF;
+END $$;
+
+-- Таблица page_snapshots - сжатые снимки загруженных страниц
+-- (SNAPSHOT_BACKEND=database).
+-- Поля:
+-- hash - SHA-256 исходного тела страницы (VARCHAR(64), первичный ключ):
+-- одинаковые страницы хранятся один раз.
+-- codec - способ сжатия: 'zstd' или 'gzip' (VARCHAR(16)).
+-- size - размер исходного тела страницы в байтах (INT).
+-- stored_size - размер сжатого снимка в байтах (INT).
+-- data - сжатое тело страницы (BYTEA).
+-- created_at - дата и время сохранения снимка.
+-- last_used_at - дата и время последнего сохранения или чтения снимка:
+-- при превышении SNAPSHOT_MAX_BYTES удаляются снимки с самым ранним
+-- last_used_at.
+CREATE TABLE IF NOT EXISTS page_snapshots (
+    hash VARCHAR(64) PRIMARY KEY,
+    codec VARCHAR(16) NOT NULL,
+    size INT NOT NULL,
+    stored_size INT NOT NULL,
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS page_snapshots_last_used_at_idx
+    ON page_snapshots (last_used_at);
+
+-- snapshot_hash - хеш снимка страницы, загруженной при проверке
+-- (VARCHAR(64)). Снимок хранится в page_snapshots или в каталоге
+-- SNAPSHOT_DIR и может быть уже удален при ограничении размера.
+ALTER TABLE url_checks ADD COLUMN IF NOT EXISTS snapshot_hash VARCHAR(64);
+
+-- seo_metrics - метрики SEO страницы (JSONB): имя метрики -> значение
+-- (canonical, robots, links, images, headings; см. SEO_METRICS).
+ALTER TABLE url_checks ADD COLUMN IF NOT EXISTS seo_metrics JSONB;
@@ -5,11 +5,18 @@ from dotenv import load_dotenv
 
 from page_analyzer.config import Config
 from page_analyzer.db_connections.connection_manager import (
-    ConnectionPool, create_signal_handler
+    ConnectionPool, create_signal_handler, setup_unit_of_work
 )
 from page_analyzer.error_handlers import handle_error
 from page_analyzer.log_setup import setup_logging
+from page_analyzer.metrics import setup_metrics
+from page_analyzer.repositories.cache_version import CacheVersionRepository
+from page_analyzer.repositories.cached_url import CachedUrlRepository
+from page_analyzer.repositories.check_history import CheckHistoryRepository
+from page_analyzer.repositories.check_job import CheckJobRepository
+from page_analyzer.repositories.schedule import ScheduleRepository
 from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.services.cache import create_cache
 from page_analyzer.views.url_views import url_blueprint
 
 
@@ -34,12 +41,34 @@ def create_app() -> Flask:
     app.config.from_object(Config)  # Загружает конфигурацию из класса Config
 
     database_url = app.config.get("DATABASE_URL")
-    app.connection_pool = ConnectionPool(database_url)  # noqa Инициализация пула соединений
+    # noqa Инициализация пула соединений (соединения открываются лениво, в каждом процессе)
+    app.connection_pool = ConnectionPool(database_url)
 
     app.url_repo = UrlRepository(app.connection_pool)  # noqa Инициализация UrlsRepository
 
+    # noqa Кэш чтений URL (URL_CACHE_BACKEND), инвалидируется при записи URL и проверок
+    url_cache = create_cache(app.config['URL_CACHE_BACKEND'])
+    if url_cache is not None:
+        app.url_repo = CachedUrlRepository(app.url_repo, url_cache)
+    app.check_job_repo = CheckJobRepository(app.connection_pool)  # noqa Инициализация очереди проверок
+    app.schedule_repo = ScheduleRepository(app.connection_pool)  # noqa Расписание повторных проверок
+    app.check_history_repo = CheckHistoryRepository(app.connection_pool)  # noqa Секции истории проверок
+
+    # noqa Версии страниц и кэш отрисованных страниц (ETag / 304 для /urls и /urls/<id>)
+    app.cache_version_repo = CacheVersionRepository(app.connection_pool)
+    app.response_cache = create_cache(
+        app.config['RESPONSE_CACHE_BACKEND'],
+        maxsize=app.config['RESPONSE_CACHE_MAXSIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL'],
+        prefix='page_analyzer:response:'
+    )
+
     app.register_blueprint(url_blueprint)  # Регистрирует blueprint
 
+    setup_unit_of_work(app)  # noqa Одно соединение и одна транзакция на HTTP-запрос
+
+    setup_metrics(app)  # noqa Метрики запросов, запросов к БД и пулов, маршрут /metrics
+
     handle_error(app)  # Устанавливает обработчики ошибок для приложения
 
     # Установка обработчиков сигналов
@@ -0,0 +1,220 @@
+"""
+Автоматический выключатель (circuit breaker).
+
+Пока зависимость (база данных, проверяемый сайт) отвечает, вызовы
+проходят (состояние 'closed'). После 'failure_threshold' ошибок подряд
+выключатель размыкается ('open'): вызовы сразу завершаются ошибкой
+'CircuitOpenError', не дожидаясь таймаутов. Через 'reset_timeout'
+секунд (со случайной добавкой, чтобы процессы не проверяли зависимость
+одновременно) выключатель пропускает не более 'half_open_probes'
+пробных вызовов ('half_open'): успешный вызов замыкает его, ошибка
+снова размыкает.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+from page_analyzer.metrics import (
+    CIRCUIT_BREAKER_REJECTED,
+    CIRCUIT_BREAKER_STATE
+)
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Значения состояний для метрики 'page_analyzer_circuit_breaker_state'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Добавка к 'reset_timeout' (доля), случайная для каждого размыкания
+RESET_JITTER = 0.2
+
+# Выключатели процесса: после fork их блокировки создаются заново
+_breakers = weakref.WeakSet()
+
+
+class CircuitOpenError(Exception):
+    """Выключатель разомкнут: вызов не выполнялся."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Выключатель '{name}' разомкнут, повтор через "
+            f"{retry_after:.1f} с."
+        )
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Автоматический выключатель, общий для потоков процесса."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 5.0,
+        half_open_probes: int = 1,
+        metrics: bool = True
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        # noqa Метрики с меткой 'name' (для выключателей хостов отключаются: хостов много)
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_until = 0.0
+        self._probes = 0
+
+        _breakers.add(self)
+        self._observe_state()
+
+    @property
+    def state(self) -> str:
+
+        with self._lock:
+            return self._current_state()
+
+    def retry_after(self) -> float:
+        """Через сколько секунд выключатель пропустит пробный вызов."""
+
+        with self._lock:
+            return max(self._opened_until - time.monotonic(), 0.0)
+
+    def before_call(self) -> None:
+        """
+        Разрешает вызов или сразу завершает его ошибкой.
+
+        После разрешенного вызова нужно вызвать 'record_success',
+        'record_failure' или 'release_probe', иначе место пробного
+        вызова не освободится.
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут или все пробные
+                вызовы уже выполняются.
+        """
+
+        with self._lock:
+            state = self._current_state()
+
+            if state == CLOSED:
+                return
+
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return
+
+            retry_after = max(self._opened_until - time.monotonic(), 0.0)
+
+        if self.metrics:
+            CIRCUIT_BREAKER_REJECTED.inc(name=self.name)
+
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        """Вызов зависимости завершился успешно."""
+
+        with self._lock:
+            self._failures = 0
+            self._release_probe()
+
+            if self._state == CLOSED:
+                return
+
+            self._state = CLOSED
+
+        logger.warning(
+            "Класс: 'CircuitBreaker', метод: 'record_success'. "
+            "Выключатель '%s' замкнут: зависимость снова доступна.",
+            self.name
+        )
+        self._observe_state()
+
+    def record_failure(self) -> None:
+        """Вызов завершился отказом зависимости."""
+
+        with self._lock:
+            self._failures += 1
+            was_probe = self._release_probe()
+
+            if self._state == OPEN and not was_probe:
+                return
+
+            if self._state == CLOSED \
+                    and self._failures < self.failure_threshold:
+                return
+
+            self._state = OPEN
+            reset_timeout = self.reset_timeout * (
+                1 + random.uniform(0, RESET_JITTER)
+            )
+            self._opened_until = time.monotonic() + reset_timeout
+
+        logger.warning(
+            "Класс: 'CircuitBreaker', метод: 'record_failure'. "
+            "Выключатель '%s' разомкнут после %d ошибок подряд, "
+            "пробный вызов через %.1f с.",
+            self.name, self._failures, reset_timeout
+        )
+        self._observe_state()
+
+    def release_probe(self) -> None:
+        """
+        Вызов завершился, не подтвердив ни доступность, ни отказ
+        зависимости (например, не получил соединение из пула или
+        прерван): освобождает место пробного вызова, не меняя состояние
+        выключателя и счетчик ошибок.
+        """
+
+        with self._lock:
+            self._release_probe()
+
+    def _current_state(self) -> str:
+        """
+        Переводит разомкнутый выключатель в 'half_open' по истечении
+        времени размыкания. Вызывается под блокировкой.
+        """
+
+        if self._state == OPEN and time.monotonic() >= self._opened_until:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+        return self._state
+
+    def _release_probe(self) -> bool:
+        """Освобождает место пробного вызова. Вызывается под блокировкой."""
+
+        if self._state == HALF_OPEN and self._probes:
+            self._probes -= 1
+            return True
+
+        return False
+
+    def _observe_state(self) -> None:
+
+        if self.metrics:
+            CIRCUIT_BREAKER_STATE.set(
+                STATE_VALUES[self._state], name=self.name
+            )
+
+    def _reset_lock(self) -> None:
+        self._lock = threading.Lock()
+
+
+def _reset_locks_after_fork() -> None:
+    # noqa Блокировка могла быть захвачена другим потоком родителя в момент fork
+    for breaker in list(_breakers):
+        breaker._reset_lock()
+
+
+os.register_at_fork(after_in_child=_reset_locks_after_fork)
@@ -0,0 +1,167 @@
+import argparse
+import logging
+from typing import List, Optional
+
+from page_analyzer.config import Config
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+def check_all(args: argparse.Namespace) -> None:
+    """Команда 'check-all': конкурентная проверка всех сохраненных URL."""
+
+    from page_analyzer import app
+    from page_analyzer.services.bulk_check import BulkChecker
+
+    checker = BulkChecker(
+        app.url_repo,
+        concurrency=args.concurrency,
+        per_host=args.per_host
+    )
+    report = checker.run()
+
+    print(report.summary())
+
+
+def worker(args: argparse.Namespace) -> None:
+    """Команда 'worker': запуск воркера очереди проверок."""
+
+    from page_analyzer.worker import main as run_worker
+
+    run_worker()
+
+
+def scheduler(args: argparse.Namespace) -> None:
+    """Команда 'scheduler': запуск планировщика повторных проверок."""
+
+    from page_analyzer.scheduler import main as run_scheduler
+
+    run_scheduler()
+
+
+def prune_checks(args: argparse.Namespace) -> None:
+    """
+    Команда 'prune-checks': создание секций истории проверок на
+    следующие месяцы и удаление (с архивированием) старых секций.
+    """
+
+    from page_analyzer import app
+    from page_analyzer.services.retention import CheckRetention
+
+    retention = CheckRetention(
+        app.check_history_repo,
+        retention_months=args.retention_months,
+        archive_dir=args.archive_dir
+    )
+    report = retention.run(dry_run=args.dry_run)
+
+    print(report.summary())
+
+
+def reanalyze(args: argparse.Namespace) -> None:
+    """
+    Команда 'reanalyze': повторный анализ сохраненных снимков страниц
+    и обновление h1, title и description проверок.
+    """
+
+    from page_analyzer import app
+    from page_analyzer.services.reanalysis import Reanalyzer
+
+    reanalyzer = Reanalyzer(
+        app.check_history_repo,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint
+    )
+    report = reanalyzer.run(restart=args.restart)
+
+    print(report.summary())
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+
+    parser = argparse.ArgumentParser(
+        prog='page_analyzer',
+        description='Служебные команды анализатора страниц.'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    check_all_parser = commands.add_parser(
+        'check-all', help='Проверить все сохраненные URL.'
+    )
+    check_all_parser.add_argument(
+        '--concurrency', type=int, default=Config.BULK_CHECK_CONCURRENCY,
+        help='Максимальное число одновременных запросов.'
+    )
+    check_all_parser.add_argument(
+        '--per-host', type=int, default=Config.BULK_CHECK_PER_HOST,
+        help='Максимальное число одновременных запросов к одному хосту.'
+    )
+    check_all_parser.set_defaults(handler=check_all)
+
+    worker_parser = commands.add_parser(
+        'worker', help='Запустить воркер очереди проверок.'
+    )
+    worker_parser.set_defaults(handler=worker)
+
+    scheduler_parser = commands.add_parser(
+        'scheduler', help='Запустить планировщик повторных проверок.'
+    )
+    scheduler_parser.set_defaults(handler=scheduler)
+
+    prune_checks_parser = commands.add_parser(
+        'prune-checks',
+        help='Создать секции истории проверок и удалить устаревшие.'
+    )
+    prune_checks_parser.add_argument(
+        '--retention-months', type=int,
+        default=Config.CHECKS_RETENTION_MONTHS,
+        help='Срок хранения проверок в месяцах (0 - не удалять).'
+    )
+    prune_checks_parser.add_argument(
+        '--archive-dir', default=Config.CHECKS_ARCHIVE_DIR,
+        help='Каталог для выгрузки удаляемых секций (CSV, gzip).'
+    )
+    prune_checks_parser.add_argument(
+        '--dry-run', action='store_true',
+        help='Только показать секции, которые будут удалены.'
+    )
+    prune_checks_parser.set_defaults(handler=prune_checks)
+
+    reanalyze_parser = commands.add_parser(
+        'reanalyze',
+        help='Повторно разобрать сохраненные снимки страниц.'
+    )
+    reanalyze_parser.add_argument(
+        '--workers', type=int, default=Config.REANALYZE_WORKERS,
+        help='Число процессов разбора (0 - по числу ядер).'
+    )
+    reanalyze_parser.add_argument(
+        '--batch-size', type=int, default=Config.REANALYZE_BATCH_SIZE,
+        help='Число проверок в пачке (одна запись в базу на пачку).'
+    )
+    reanalyze_parser.add_argument(
+        '--checkpoint', default=Config.REANALYZE_CHECKPOINT,
+        help='Файл контрольной точки для продолжения прохода.'
+    )
+    reanalyze_parser.add_argument(
+        '--restart', action='store_true',
+        help='Начать проход с начала, не учитывая контрольную точку.'
+    )
+    reanalyze_parser.set_defaults(handler=reanalyze)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Точка входа командной строки 'page_analyzer'."""
+
+    args = create_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -15,3 +16,259 @@ class Config:
 
     SECRET_KEY: str = os.getenv('SECRET_KEY')
     DATABASE_URL: str = os.getenv('DATABASE_URL')
+
+    # Очередь фоновых проверок: если включена, POST /urls/<id>/checks
+    # только ставит задание в очередь, а проверку выполняет воркер
+    # (make worker). По умолчанию выключена: 'make start' и build.sh
+    # воркер не запускают, и задания остались бы невыполненными.
+    CHECK_QUEUE_ENABLED: bool = (
+        os.getenv('CHECK_QUEUE_ENABLED', 'false').lower() == 'true'
+    )
+    # Пауза воркера (в секундах), если очередь пуста.
+    CHECK_WORKER_POLL_INTERVAL: float = float(
+        os.getenv('CHECK_WORKER_POLL_INTERVAL', 1)
+    )
+    # Через сколько секунд выполняющееся задание считается зависшим.
+    CHECK_JOB_TIMEOUT: int = int(os.getenv('CHECK_JOB_TIMEOUT', 300))
+
+    # Массовая проверка: общее число одновременных запросов
+    # и ограничение одновременных запросов к одному хосту.
+    BULK_CHECK_CONCURRENCY: int = int(
+        os.getenv('BULK_CHECK_CONCURRENCY', 20)
+    )
+    BULK_CHECK_PER_HOST: int = int(os.getenv('BULK_CHECK_PER_HOST', 2))
+
+    # Потоковая загрузка страниц: тело читается частями и разбирается
+    # на лету, чтение прекращается, как только найдены h1, title и
+    # description, или после FETCH_BYTE_BUDGET байт.
+    FETCH_STREAMING: bool = (
+        os.getenv('FETCH_STREAMING', 'true').lower() == 'true'
+    )
+    FETCH_BYTE_BUDGET: int = int(os.getenv('FETCH_BYTE_BUDGET', 1048576))
+    FETCH_CHUNK_SIZE: int = int(os.getenv('FETCH_CHUNK_SIZE', 16384))
+
+    # Способ разбора HTML в 'PageAnalyzer':
+    # 'stream' - однопроходный извлекатель без построения дерева,
+    # 'html.parser' - дерево BeautifulSoup,
+    # 'lxml' - дерево lxml (требует установленного пакета lxml).
+    PARSER_BACKEND: str = os.getenv('PARSER_BACKEND', 'stream')
+
+    # Пул HTTP-сессий для загрузки страниц: число хостов с открытыми
+    # сессиями, число keep-alive соединений на хост, время простоя
+    # (в секундах), после которого сессия закрывается, и таймауты.
+    HTTP_POOL_MAX_HOSTS: int = int(os.getenv('HTTP_POOL_MAX_HOSTS', 256))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+    HTTP_POOL_IDLE_TIMEOUT: float = float(
+        os.getenv('HTTP_POOL_IDLE_TIMEOUT', 60)
+    )
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+    HTTP_READ_TIMEOUT: float = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+
+    # Keyset-пагинация: число строк на странице списка сайтов и истории
+    # проверок по умолчанию и верхняя граница параметра 'per_page'.
+    URLS_PAGE_SIZE: int = int(os.getenv('URLS_PAGE_SIZE', 50))
+    CHECKS_PAGE_SIZE: int = int(os.getenv('CHECKS_PAGE_SIZE', 20))
+    MAX_PAGE_SIZE: int = int(os.getenv('MAX_PAGE_SIZE', 200))
+
+    # Пул соединений с базой данных: максимальное число соединений
+    # в процессе, время ожидания свободного соединения (в секундах),
+    # возраст (в секундах), после которого соединение пересоздается,
+    # и время простоя, после которого соединение перед выдачей
+    # проверяется запросом 'SELECT 1'.
+    DB_POOL_MAXCONN: int = int(os.getenv('DB_POOL_MAXCONN', 50))
+    DB_POOL_ACQUIRE_TIMEOUT: float = float(
+        os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 5)
+    )
+    DB_POOL_MAX_AGE: float = float(os.getenv('DB_POOL_MAX_AGE', 1800))
+    DB_POOL_HEALTH_CHECK_AFTER: float = float(
+        os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30)
+    )
+
+    # Кэш чтений 'UrlRepository': 'memory' - LRU в памяти процесса,
+    # 'redis' - общий для всех процессов кэш (требует пакета redis
+    # и URL_CACHE_REDIS_URL), 'none' - без кэша. Размер LRU (число
+    # значений) и время жизни значений (в секундах). В кэше 'memory'
+    # инвалидация видна только процессу, который записал данные,
+    # остальные процессы увидят изменения не позже чем через TTL.
+    URL_CACHE_BACKEND: str = os.getenv('URL_CACHE_BACKEND', 'memory')
+    URL_CACHE_MAXSIZE: int = int(os.getenv('URL_CACHE_MAXSIZE', 1024))
+    URL_CACHE_TTL: float = float(os.getenv('URL_CACHE_TTL', 10))
+    URL_CACHE_REDIS_URL: str = os.getenv(
+        'URL_CACHE_REDIS_URL', 'redis://localhost:6379/0'
+    )
+
+    # Кэш отрисованных страниц /urls и /urls/<id> с ETag и ответом 304.
+    # Ключ кэша и ETag строятся из версии страницы (таблица
+    # cache_versions), поэтому устаревшие значения не выдаются, а
+    # RESPONSE_CACHE_TTL (в секундах) только ограничивает время
+    # хранения. Значения кэша: 'memory', 'redis' или 'none'.
+    RESPONSE_CACHE_BACKEND: str = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_MAXSIZE: int = int(
+        os.getenv('RESPONSE_CACHE_MAXSIZE', 256)
+    )
+    RESPONSE_CACHE_TTL: float = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+    # Логирование: записи выводятся отдельным потоком через очередь
+    # (LOG_QUEUE_SIZE записей; при переполнении записи отбрасываются),
+    # аргументы и текст сообщения сокращаются до LOG_PAYLOAD_MAX_LENGTH
+    # символов, а для логгеров из LOG_SAMPLING ('логгер=доля,...')
+    # записывается только указанная доля сообщений уровня DEBUG.
+    LOG_QUEUE_ENABLED: bool = (
+        os.getenv('LOG_QUEUE_ENABLED', 'true').lower() == 'true'
+    )
+    LOG_QUEUE_SIZE: int = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_PAYLOAD_MAX_LENGTH: int = int(
+        os.getenv('LOG_PAYLOAD_MAX_LENGTH', 2000)
+    )
+    LOG_SAMPLING: str = os.getenv(
+        'LOG_SAMPLING',
+        'page_analyzer.db_connections=0.01,page_analyzer.repositories=0.1'
+    )
+
+    # Метрики (/metrics): каталог, в который каждый процесс записывает
+    # снимок своих метрик (общий для всех воркеров gunicorn), и период
+    # записи снимка (в секундах).
+    METRICS_ENABLED: bool = (
+        os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    )
+    METRICS_DIR: str = os.getenv(
+        'METRICS_DIR',
+        os.path.join(tempfile.gettempdir(), 'page_analyzer_metrics')
+    )
+    METRICS_FLUSH_INTERVAL: float = float(
+        os.getenv('METRICS_FLUSH_INTERVAL', 5)
+    )
+
+    # Журнал медленных запросов (logs/slow_queries.log): вызовы методов
+    # репозиториев дольше порога (в миллисекундах) записываются с текстом
+    # SQL, параметрами (строки заменяются длиной) и длительностью. Для доли
+    # вызовов SLOW_QUERY_EXPLAIN_SAMPLE добавляется план самого долгого
+    # запроса: EXPLAIN (ANALYZE, BUFFERS) для запросов чтения, EXPLAIN без
+    # выполнения для остальных (на отдельном соединении, с откатом).
+    SLOW_QUERY_LOG_ENABLED: bool = (
+        os.getenv('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    )
+    SLOW_QUERY_THRESHOLD_MS: int = int(
+        os.getenv('SLOW_QUERY_THRESHOLD_MS', 200)
+    )
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = float(
+        os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE', 0.1)
+    )
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(
+        os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 5000)
+    )
+    SLOW_QUERY_LOG_MAX_LENGTH: int = int(
+        os.getenv('SLOW_QUERY_LOG_MAX_LENGTH', 20000)
+    )
+
+    # Повтор вызовов репозиториев при временных ошибках базы данных
+    # (отказ соединения, конфликт транзакций): не больше DB_RETRY_ATTEMPTS
+    # попыток и DB_RETRY_DEADLINE секунд в сумме, пауза растет
+    # экспоненциально от DB_RETRY_BASE_DELAY до DB_RETRY_MAX_DELAY (секунды)
+    # и выбирается случайно в этих пределах.
+    DB_RETRY_ATTEMPTS: int = int(os.getenv('DB_RETRY_ATTEMPTS', 3))
+    DB_RETRY_BASE_DELAY: float = float(os.getenv('DB_RETRY_BASE_DELAY', 0.1))
+    DB_RETRY_MAX_DELAY: float = float(os.getenv('DB_RETRY_MAX_DELAY', 1))
+    DB_RETRY_DEADLINE: float = float(os.getenv('DB_RETRY_DEADLINE', 2))
+
+    # Выключатель базы данных: после DB_BREAKER_FAILURE_THRESHOLD отказов
+    # соединения подряд вызовы сразу завершаются ошибкой (ответ 503), через
+    # DB_BREAKER_RESET_TIMEOUT секунд пропускается
+    # DB_BREAKER_HALF_OPEN_PROBES пробных вызовов.
+    DB_BREAKER_FAILURE_THRESHOLD: int = int(
+        os.getenv('DB_BREAKER_FAILURE_THRESHOLD', 5)
+    )
+    DB_BREAKER_RESET_TIMEOUT: float = float(
+        os.getenv('DB_BREAKER_RESET_TIMEOUT', 5)
+    )
+    DB_BREAKER_HALF_OPEN_PROBES: int = int(
+        os.getenv('DB_BREAKER_HALF_OPEN_PROBES', 1)
+    )
+
+    # Отказы проверяемых хостов: после HOST_BREAKER_FAILURE_THRESHOLD ошибок
+    # соединения или таймаутов подряд проверки хоста HOST_BREAKER_RESET_TIMEOUT
+    # секунд сразу завершаются ошибкой (затем выполняется пробный запрос).
+    # Имена, не найденные в DNS, запоминаются на DNS_NEGATIVE_TTL секунд.
+    HOST_BREAKER_FAILURE_THRESHOLD: int = int(
+        os.getenv('HOST_BREAKER_FAILURE_THRESHOLD', 3)
+    )
+    HOST_BREAKER_RESET_TIMEOUT: float = float(
+        os.getenv('HOST_BREAKER_RESET_TIMEOUT', 60)
+    )
+    HOST_BREAKER_MAX_HOSTS: int = int(
+        os.getenv('HOST_BREAKER_MAX_HOSTS', 10000)
+    )
+    DNS_NEGATIVE_TTL: float = float(os.getenv('DNS_NEGATIVE_TTL', 30))
+
+    # Планировщик повторных проверок (page_analyzer scheduler): каждые
+    # SCHEDULER_TICK секунд выбирает до SCHEDULER_BATCH_SIZE URL, время
+    # проверки которых наступило, и ставит их в очередь проверок. Интервал
+    # проверки URL задается столбцом urls.check_interval, по умолчанию -
+    # SCHEDULER_DEFAULT_INTERVAL секунд, и случайно меняется на долю до
+    # SCHEDULER_JITTER. К одному хосту ставится не больше
+    # SCHEDULER_HOST_RATE проверок в минуту, а пока в очереди больше
+    # SCHEDULER_MAX_PENDING ожидающих заданий, новые не добавляются.
+    SCHEDULER_TICK: float = float(os.getenv('SCHEDULER_TICK', 5))
+    SCHEDULER_BATCH_SIZE: int = int(os.getenv('SCHEDULER_BATCH_SIZE', 500))
+    SCHEDULER_DEFAULT_INTERVAL: int = int(
+        os.getenv('SCHEDULER_DEFAULT_INTERVAL', 86400)
+    )
+    SCHEDULER_JITTER: float = float(os.getenv('SCHEDULER_JITTER', 0.1))
+    SCHEDULER_HOST_RATE: float = float(os.getenv('SCHEDULER_HOST_RATE', 6))
+    SCHEDULER_MAX_PENDING: int = int(
+        os.getenv('SCHEDULER_MAX_PENDING', 1000)
+    )
+
+    # История проверок: таблица url_checks разделена на месячные секции.
+    # Команда 'page_analyzer prune-checks' создает секции на
+    # CHECKS_PARTITIONS_AHEAD месяцев вперед и удаляет секции старше
+    # CHECKS_RETENTION_MONTHS месяцев (0 - не удалять), предварительно
+    # выгружая их в каталог CHECKS_ARCHIVE_DIR (пустое значение - без
+    # архива). На странице сайта выводится дневная сводка проверок
+    # за последние DAILY_CHECKS_DAYS дней с проверками.
+    CHECKS_PARTITIONS_AHEAD: int = int(
+        os.getenv('CHECKS_PARTITIONS_AHEAD', 2)
+    )
+    CHECKS_RETENTION_MONTHS: int = int(
+        os.getenv('CHECKS_RETENTION_MONTHS', 12)
+    )
+    CHECKS_ARCHIVE_DIR: str = os.getenv('CHECKS_ARCHIVE_DIR', '')
+    DAILY_CHECKS_DAYS: int = int(os.getenv('DAILY_CHECKS_DAYS', 30))
+
+    # Сохранение загруженных страниц (снимков) для повторного анализа без
+    # загрузки: 'filesystem' - файлы в каталоге SNAPSHOT_DIR, 'database' -
+    # таблица page_snapshots, 'none' - не сохранять. Снимки сжимаются
+    # (SNAPSHOT_COMPRESSION: 'zstd' - требует пакета zstandard, 'gzip',
+    # 'auto' - zstd, если пакет установлен) и хранятся по хешу содержимого,
+    # поэтому одинаковые страницы хранятся один раз. Общий размер сжатых
+    # снимков ограничен SNAPSHOT_MAX_BYTES: при превышении удаляются
+    # снимки, которые дольше всех не сохранялись и не читались.
+    SNAPSHOT_BACKEND: str = os.getenv('SNAPSHOT_BACKEND', 'none')
+    SNAPSHOT_DIR: str = os.getenv(
+        'SNAPSHOT_DIR',
+        os.path.join(tempfile.gettempdir(), 'page_analyzer_snapshots')
+    )
+    SNAPSHOT_COMPRESSION: str = os.getenv('SNAPSHOT_COMPRESSION', 'auto')
+    SNAPSHOT_MAX_BYTES: int = int(
+        os.getenv('SNAPSHOT_MAX_BYTES', 1073741824)
+    )
+
+    # Повторный анализ сохраненных снимков (page_analyzer reanalyze):
+    # проверки выбираются пачками по REANALYZE_BATCH_SIZE, разбираются
+    # в REANALYZE_WORKERS процессах (0 - по числу ядер), а номер последней
+    # обновленной проверки записывается в файл REANALYZE_CHECKPOINT, чтобы
+    # прерванный проход продолжался с того же места.
+    REANALYZE_BATCH_SIZE: int = int(os.getenv('REANALYZE_BATCH_SIZE', 200))
+    REANALYZE_WORKERS: int = int(os.getenv('REANALYZE_WORKERS', 0))
+    REANALYZE_CHECKPOINT: str = os.getenv(
+        'REANALYZE_CHECKPOINT',
+        os.path.join(tempfile.gettempdir(), 'page_analyzer_reanalyze.json')
+    )
+
+    # Метрики SEO, вычисляемые при разборе страницы за один проход
+    # и сохраняемые в 'url_checks.seo_metrics' (имена через запятую:
+    # canonical, robots, links, images, headings или 'модуль:Класс').
+    # По умолчанию метрики отключены. canonical и robots готовы после
+    # HEAD, а links, images и headings нужна вся страница: с ними
+    # потоковая загрузка читает страницу до FETCH_BYTE_BUDGET байт.
+    SEO_METRICS: str = os.getenv('SEO_METRICS', '')
@@ -1,115 +1,428 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
 import logging
+import os
+import random
 import sys
+import threading
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from flask import Flask
+from flask import Flask, g
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INERROR,
+    TRANSACTION_STATUS_UNKNOWN
+)
+from psycopg2.pool import PoolError
+
+from page_analyzer.circuit_breaker import CircuitBreaker, CircuitOpenError
+from page_analyzer.config import Config
+from page_analyzer.db_connections.slow_query import (
+    TracingCursor,
+    report_slow_call
+)
+from page_analyzer.metrics import (
+    DB_POOL_LAST_WAIT,
+    DB_POOL_WAIT,
+    DB_QUERY_DURATION,
+    DB_QUERY_ERRORS,
+    DB_RETRIES
+)
 
 
 # Получение логгера с именем текущего модуля для записи логов
 logger = logging.getLogger(__name__)
 
 
+class PoolTimeoutError(PoolError):
+    """Свободное соединение не появилось за время ожидания."""
+
+
+class _PooledConnection:
+    """Соединение пула, время его открытия и последнего возврата в пул."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
 class ConnectionPool:
     """
     Реализация пула соединений с базой данных.
 
     Этот класс обеспечивает единичный экземпляр пула соединений, который
     управляет созданием и выдачей соединений к базе данных, используя
-    минимальное и максимальное количество соединений.
+    максимальное количество соединений.
+
+    Пул потокобезопасен: выдача и возврат соединений выполняются под
+    одной блокировкой, а если все соединения заняты, поток ждет
+    освобождения соединения не дольше 'acquire_timeout' секунд.
+
+    Соединения открываются лениво, при первом обращении, отдельно в
+    каждом процессе: после fork (например, в воркерах gunicorn) дочерний
+    процесс не использует соединения родителя и открывает свои.
+
+    Перед выдачей соединение, простаивавшее дольше 'health_check_after'
+    секунд, проверяется запросом 'SELECT 1', а соединения старше
+    'max_age' секунд закрываются и заменяются новыми.
     """
 
     _instance: Optional['ConnectionPool'] = None
 
     def __new__(
-        cls, db_url: str, minconn: int = 1, maxconn: int = 50
+        cls,
+        db_url: str,
+        maxconn: int = Config.DB_POOL_MAXCONN,
+        acquire_timeout: float = Config.DB_POOL_ACQUIRE_TIMEOUT,
+        max_age: float = Config.DB_POOL_MAX_AGE,
+        health_check_after: float = Config.DB_POOL_HEALTH_CHECK_AFTER
     ) -> 'ConnectionPool':
 
         if cls._instance is None:
             # Создаем новый экземпляр, если он еще не создан
-            cls._instance = super(ConnectionPool, cls).__new__(cls)
-            cls._instance.connection_pool = SimpleConnectionPool(
-                minconn, maxconn, db_url)
+            instance = super(ConnectionPool, cls).__new__(cls)
+            instance.db_url = db_url
+            instance.maxconn = maxconn
+            instance.acquire_timeout = acquire_timeout
+            instance.max_age = max_age
+            instance.health_check_after = health_check_after
+            instance._reset_state()
+
+            # noqa Дочерний процесс начинает с пустым пулом и новой блокировкой
+            os.register_at_fork(after_in_child=instance._reset_state)
+
+            cls._instance = instance
 
             logger.info(
                 "Класс 'ConnectionPool', метод '__new__' ."
                 "Инициализация пула соединений с db_url: %s, "
-                "minconn: %d, maxconn: %d connection_pool: %s",
-                db_url, minconn, maxconn, cls._instance.connection_pool
+                "maxconn: %d, acquire_timeout: %s, max_age: %s",
+                db_url, maxconn, acquire_timeout, max_age
             )
 
         return cls._instance  # Возвращаем единственный экземпляр
 
-    def get_connection(self):
-        if self.connection_pool:
-            try:
-                connection = self.connection_pool.getconn()
+    def _reset_state(self) -> None:
+        """
+        Сбрасывает состояние пула для текущего процесса.
 
-                logger.info(
-                    "Класс 'ConnectionPool', метод 'get_connection'. "
-                    "Получено новое соединение из пула: %s",
-                    connection
-                )
+        Соединения, унаследованные от родительского процесса, не
+        закрываются (закрытие отправило бы серверу завершение сеанса
+        через общий с родителем сокет), а только перестают выдаваться.
+        Ссылки на них сохраняются, чтобы сборщик мусора их не закрыл.
+        """
 
-                return connection
-            except psycopg2.Error as error:
-                logger.error(
-                    "Класс 'ConnectionPool', метод 'get_connection'. "
-                    "Ошибка получения соединения: '%s'",
-                    error, exc_info=True
-                )
+        inherited = getattr(self, '_inherited', [])
+        inherited.extend(getattr(self, '_idle', []))
+        inherited.extend(getattr(self, '_in_use', {}).values())
 
-                return None
+        self._inherited = inherited
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0  # Открытые соединения: свободные и выданные
+        self._waiting = 0
+        self._closed = False
+
+    def get_connection(self, timeout: Optional[float] = None):
+        """
+        Выдает соединение из пула.
+
+        Возвращает None, если соединение не удалось открыть или
+        свободное соединение не появилось за 'timeout' секунд
+        (по умолчанию 'acquire_timeout').
+        """
+
+        try:
+            return self.acquire(timeout)
+        except psycopg2.Error:
+            return None
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Выдает соединение из пула, как 'get_connection', но при ошибке
+        выбрасывает исключение, по которому 'retry_connection' решает,
+        повторять ли вызов.
+
+        Raises:
+            PoolTimeoutError: Если соединение не освободилось
+                за 'timeout' секунд.
+            psycopg2.Error: Если не удалось открыть соединение.
+        """
+
+        started = time.perf_counter()
+
+        try:
+            connection = self._acquire(
+                self.acquire_timeout if timeout is None else timeout
+            )
+
+            logger.debug(
+                "Класс 'ConnectionPool', метод 'acquire'. "
+                "Получено соединение из пула: %s",
+                connection
+            )
+
+            return connection
+        except psycopg2.Error as error:
+            logger.error(
+                "Класс 'ConnectionPool', метод 'acquire'. "
+                "Ошибка получения соединения: '%s'",
+                error
+            )
+
+            raise
+        finally:
+            # noqa Время получения: ожидание свободного соединения, проверка или открытие нового
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT.observe(waited)
+            DB_POOL_LAST_WAIT.set(waited)
 
     def release_connection(self, connection):
+        """
+        Возвращает соединение в пул. Незакрытая транзакция откатывается
+        до блокировки пула: потоки, ожидающие соединение в
+        'get_connection', не ждут этого обращения к серверу.
+        """
 
-        if self.connection_pool and connection:
+        if not connection:
+            return
 
-            try:
+        # noqa Выданное соединение возвращает только поток, который его получил,
+        # noqa поэтому его запись в '_in_use' не меняется до возврата
+        entry = self._in_use.get(id(connection))
 
-                self.connection_pool.putconn(connection)
+        if entry is None:
+            # Соединение выдано не этим процессом (или уже возвращено)
+            logger.warning(
+                "Класс 'ConnectionPool', метод 'release_connection'. "
+                "Соединение не принадлежит пулу: %s",
+                connection
+            )
+            return
 
-                logger.info(
-                    "Класс 'ConnectionPool', метод 'release_connection'. "
-                    "Соединение возвращено в пул: %s",
-                    connection
-                )
+        reusable = self._reset_connection(entry)
 
-            except psycopg2.Error as error:
-                logger.error(
-                    "Класс 'ConnectionPool', метод 'release_connection'. "
-                    "Ошибка возврата соединения в пул: '%s'",
-                    error, exc_info=True
-                )
+        with self._condition:
+            self._in_use.pop(id(connection), None)
+            entry.last_used = time.monotonic()
 
-                raise psycopg2.Error(
-                    "Не удалось вернуть соединение в пул.") from error
+            if self._closed or not reusable:
+                self._discard(entry)
+            else:
+                self._idle.append(entry)
+
+            self._condition.notify()
+
+        logger.debug(
+            "Класс 'ConnectionPool', метод 'release_connection'. "
+            "Соединение возвращено в пул: %s",
+            connection
+        )
 
     def close_connection_pool(self):
 
-        if self.connection_pool:
-            try:
-                self.connection_pool.closeall()
+        with self._condition:
+            self._closed = True
 
-                logger.info(
-                    "Класс 'ConnectionPool', метод 'close_connection_pool'. "
-                    "Пул соединений закрыт. connection_pool: %s",
-                    self.connection_pool
-                )
+            while self._idle:
+                self._discard(self._idle.pop())
 
-            except Exception as error:
-                logger.error(
-                    "Класс 'ConnectionPool', метод 'close_connection_pool'. "
-                    "Ошибка закрытия пула соединений: '%s', ошибка: '%s'",
-                    self.connection_pool, error, exc_info=True
-                )
+            # noqa Выданные соединения будут закрыты при возврате в пул
+            self._condition.notify_all()
+
+        logger.info(
+            "Класс 'ConnectionPool', метод 'close_connection_pool'. "
+            "Пул соединений закрыт, выдано соединений: %d",
+            len(self._in_use)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает состояние пула: число открытых, свободных и выданных
+        соединений и число потоков, ожидающих соединение.
+        """
+
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'maxconn': self.maxconn,
+            }
+
+    def _acquire(self, timeout: float):
+        """
+        Выдает проверенное свободное соединение или открывает новое,
+        если пул не заполнен; иначе ждет возврата соединения в пул.
+
+        Raises:
+            PoolTimeoutError: Если соединение не освободилось
+                за 'timeout' секунд.
+            psycopg2.Error: Если не удалось открыть соединение.
+        """
+
+        if self._pid != os.getpid():
+            self._reset_state()  # noqa На случай fork без os.register_at_fork
 
-                raise psycopg2.Error(
-                    "Не удалось закрыть пул соединений."
-                ) from error
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise PoolError("Пул соединений закрыт.")
+
+                entry = self._take_idle()
+
+                if entry is None and self._size >= self.maxconn:
+                    self._wait(deadline)
+                    continue
+
+                if entry is None:
+                    self._size += 1  # noqa Резервируем место, соединение откроем без блокировки
+
+            if entry is None:
+                return self._open()
+
+            # Проверка соединения выполняется без блокировки пула
+            if self._is_healthy(entry):
+                with self._condition:
+                    self._in_use[id(entry.connection)] = entry
+
+                return entry.connection
+
+            with self._condition:
+                self._discard(entry)
+                self._condition.notify()
+
+    def _take_idle(self) -> Optional[_PooledConnection]:
+        """
+        Берет последнее возвращенное свободное соединение, закрывая
+        по пути соединения старше 'max_age'. Вызывается под блокировкой.
+        """
+
+        now = time.monotonic()
+
+        while self._idle:
+            entry = self._idle.pop()
+
+            if entry.connection.closed or now - entry.created_at > self.max_age:
+                self._discard(entry)
+                continue
+
+            return entry
+
+        return None
+
+    def _wait(self, deadline: float) -> None:
+        """Ждет возврата соединения в пул. Вызывается под блокировкой."""
+
+        remaining = deadline - time.monotonic()
+
+        if remaining <= 0:
+            raise PoolTimeoutError(
+                "Нет свободных соединений в пуле "
+                f"(maxconn: {self.maxconn})."
+            )
+
+        self._waiting += 1
+        try:
+            self._condition.wait(remaining)
+        finally:
+            self._waiting -= 1
+
+    def _open(self):
+        """Открывает новое соединение под зарезервированное место в пуле."""
+
+        try:
+            connection = psycopg2.connect(self.db_url)
+        except psycopg2.Error:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._in_use[id(connection)] = _PooledConnection(connection)
+
+        logger.info(
+            "Класс 'ConnectionPool', метод '_open'. "
+            "Открыто новое соединение: %s, всего соединений: %d",
+            connection, self._size
+        )
+
+        return connection
+
+    def _is_healthy(self, entry: _PooledConnection) -> bool:
+        """
+        Проверяет запросом 'SELECT 1' соединение, которое простаивало
+        дольше 'health_check_after' секунд.
+        """
+
+        if time.monotonic() - entry.last_used < self.health_check_after:
+            return True
+
+        try:
+            with entry.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            entry.connection.rollback()
+
+            return True
+        except psycopg2.Error as error:
+            logger.warning(
+                "Класс 'ConnectionPool', метод '_is_healthy'. "
+                "Соединение не прошло проверку и будет закрыто: '%s'",
+                error
+            )
+
+            return False
+
+    @staticmethod
+    def _reset_connection(entry: _PooledConnection) -> bool:
+        """
+        Завершает незакрытую транзакцию соединения перед возвратом в пул.
+        Возвращает False, если соединение больше нельзя использовать.
+        """
+
+        connection = entry.connection
+
+        if connection.closed:
+            return False
+
+        status = connection.info.transaction_status
+
+        if status == TRANSACTION_STATUS_IDLE:
+            return True
+
+        if status == TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        try:
+            connection.rollback()
+
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, entry: _PooledConnection) -> None:
+        """Закрывает соединение и освобождает его место в пуле."""
+
+        self._size -= 1
+
+        try:
+            entry.connection.close()
+        except psycopg2.Error as error:
+            logger.warning(
+                "Класс 'ConnectionPool', метод '_discard'. "
+                "Ошибка закрытия соединения: '%s'",
+                error
+            )
 
 
 class DatabaseConnection:
@@ -120,16 +433,9 @@ class DatabaseConnection:
         self.connection = None
 
     def __enter__(self):
-        self.connection = self.connection_pool.get_connection()
+        self.connection = self.connection_pool.acquire()
 
-        if self.connection is None:
-            logger.error(
-                "Класс 'DatabaseConnection',  метод '__enter__'. "
-                "Не удалось получить соединение из пула."
-            )
-            raise psycopg2.Error("Не удалось получить соединение из пула.")
-
-        logger.info(
+        logger.debug(
             "Класс 'DatabaseConnection',  метод '__enter__'. "
             "Вход в контекстный менеджер, получено соединение: %s",
             self.connection
@@ -145,7 +451,7 @@ class DatabaseConnection:
                     # Если нет исключений, коммитим изменения
                     self.connection.commit()
 
-                    logger.info(
+                    logger.debug(
                         "Класс 'DatabaseConnection',  метод '__exit__'. "
                         "Коммит изменений, соединение: %s",
                         self.connection
@@ -169,7 +475,7 @@ class DatabaseConnection:
                 # noqa Освобождаем соединение независимо от того, произошла ошибка или нет
                 self.connection_pool.release_connection(self.connection)
 
-                logger.info(
+                logger.debug(
                     "Класс 'DatabaseConnection',  метод '__exit__'. "
                     "Выход из контекстного менеджера, "
                     "соединение освобождено: %s",
@@ -177,102 +483,506 @@ class DatabaseConnection:
                 )
 
 
-def db_connection(cursor_factory: Optional[Callable] = None):
+# Единица работы текущего запроса (или явного блока 'unit_of_work')
+_current_unit_of_work: ContextVar[Optional['UnitOfWork']] = ContextVar(
+    'unit_of_work', default=None
+)
+
+
+class UnitOfWork:
+    """
+    Единица работы: одно соединение и одна транзакция на все вызовы
+    репозиториев внутри HTTP-запроса или блока 'unit_of_work'.
+
+    Соединение берется из пула лениво, при первом обращении к базе
+    данных, и возвращается в пул вызовом 'release' (с коммитом или
+    откатом транзакции).
+    """
+
+    def __init__(self, connection_pool: ConnectionPool):
+        self.connection_pool = connection_pool
+        self.connection = None
+        self.after_commit: List[Callable[[], None]] = []
+        self.calls = 0  # Успешные вызовы репозиториев в текущей транзакции
+        # noqa Можно ли повторить последний неудачный вызов: транзакция до него была пустой
+        self.retryable = True
+
+    def get_connection(self):
+        """Возвращает соединение, получая его из пула при первом вызове."""
+
+        if self.connection is None:
+            self.connection = self.connection_pool.acquire()
+
+            logger.debug(
+                "Класс 'UnitOfWork', метод 'get_connection'. "
+                "Получено соединение: %s",
+                self.connection
+            )
+
+        return self.connection
+
+    def release(self, commit: bool = True) -> None:
+        """
+        Завершает транзакцию и возвращает соединение в пул.
+
+        Коммит выполняется, только если 'commit' истинен и транзакция
+        не прервана ошибкой; иначе изменения откатываются.
+        """
+
+        connection, self.connection = self.connection, None
+        callbacks, self.after_commit = self.after_commit, []
+        self.calls = 0
+
+        if connection is None:
+            return
+
+        try:
+            failed = (
+                connection.info.transaction_status == TRANSACTION_STATUS_INERROR
+            )
+
+            if commit and not failed:
+                connection.commit()
+
+                logger.debug(
+                    "Класс 'UnitOfWork', метод 'release'. "
+                    "Коммит изменений, соединение: %s",
+                    connection
+                )
+
+                for callback in callbacks:
+                    callback()
+            else:
+                connection.rollback()
+
+                logger.debug(
+                    "Класс 'UnitOfWork', метод 'release'. "
+                    "Откат изменений, соединение: %s",
+                    connection
+                )
+        except psycopg2.Error as error:
+            logger.error(
+                "Класс 'UnitOfWork', метод 'release'. "
+                "Ошибка завершения транзакции: '%s'",
+                error, exc_info=True
+            )
+
+            if commit:
+                raise  # noqa Ошибка коммита означает, что изменения не сохранены
+        finally:
+            self.connection_pool.release_connection(connection)
+
+
+@contextmanager
+def unit_of_work(connection_pool: ConnectionPool):
+    """
+    Выполняет вызовы репозиториев внутри блока в одной транзакции
+    на одном соединении. При исключении изменения откатываются.
+    """
+
+    work = UnitOfWork(connection_pool)
+    token = _current_unit_of_work.set(work)
+
+    try:
+        yield work
+    except BaseException:
+        work.release(commit=False)
+        raise
+    else:
+        work.release()
+    finally:
+        _current_unit_of_work.reset(token)
+
+
+def release_unit_of_work() -> None:
+    """
+    Фиксирует транзакцию текущей единицы работы и возвращает ее
+    соединение в пул.
+
+    Вызывается перед долгими операциями без обращения к базе данных
+    (загрузкой страниц), чтобы не держать соединение с открытой
+    транзакцией. Следующий вызов репозитория возьмет соединение заново.
+    """
+
+    work = _current_unit_of_work.get()
+
+    if work is not None:
+        work.release()
+
+
+def run_after_commit(callback: Callable[[], None]) -> None:
+    """
+    Выполняет 'callback' после коммита текущей единицы работы
+    (при откате не выполняет). Вне единицы работы, или если она еще
+    не обращалась к базе данных, 'callback' выполняется сразу:
+    'db_connection' фиксирует каждый вызов отдельно.
+    """
+
+    work = _current_unit_of_work.get()
+
+    if work is not None and work.connection is not None:
+        work.after_commit.append(callback)
+    else:
+        callback()
+
+
+def setup_unit_of_work(app: Flask) -> None:
+    """
+    Связывает единицу работы с каждым HTTP-запросом приложения.
+
+    Транзакция фиксируется до отправки ответа, если ответ успешный
+    (код меньше 400), и откатывается в остальных случаях.
+    """
+
+    @app.before_request
+    def begin_unit_of_work():
+        g.unit_of_work_token = _current_unit_of_work.set(
+            UnitOfWork(app.connection_pool)
+        )
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        work = _current_unit_of_work.get()
+
+        if work is not None:
+            work.release(commit=response.status_code < 400)
+
+        return response
+
+    @app.teardown_request
+    def end_unit_of_work(error):
+        work = _current_unit_of_work.get()
+        token = g.pop('unit_of_work_token', None)
+
+        try:
+            if work is not None:
+                # noqa Соединение остается только при необработанном исключении
+                work.release(commit=False)
+        finally:
+            if token is not None:
+                _current_unit_of_work.reset(token)
+
+
+@contextmanager
+def _query_timer(method: str, connection_pool, traced: List[TracingCursor]):
+    """
+    Учитывает длительность и ошибки вызова метода репозитория и
+    записывает медленный вызов в журнал медленных запросов.
+    """
+
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_QUERY_ERRORS.inc(method=method)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(duration, method=method)
+
+        if traced:
+            try:
+                report_slow_call(
+                    method, duration, traced[0].statements, connection_pool
+                )
+            except Exception as error:
+                logger.warning(
+                    "Функция '_query_timer'. Ошибка записи медленного "
+                    "вызова '%s': '%s'",
+                    method, error
+                )
+
+
+def _trace(cursor, traced: List[TracingCursor]):
+    """
+    Оборачивает курсор в 'TracingCursor', если журнал медленных
+    запросов включен.
+    """
+
+    if not Config.SLOW_QUERY_LOG_ENABLED:
+        return cursor
+
+    traced.append(TracingCursor(cursor))
+
+    return traced[-1]
+
+
+def db_connection(
+    cursor_factory: Optional[Callable] = None,
+    own_transaction: bool = False
+):
     """ Декоратор для управления соединениями с базой данных.
 
+    Если вызов выполняется внутри единицы работы ('UnitOfWork') с тем же
+    пулом, используется ее соединение и транзакция, а коммит выполняется
+    при завершении единицы работы. Иначе соединение берется из пула
+    на время вызова.
+
     :param
         cursor_factory: Необязательный аргумент для создания курсора
         специфического типа.
+        own_transaction: Всегда выполнять вызов на отдельном соединении
+        и фиксировать сразу, даже внутри единицы работы (короткие
+        запросы, блокировки которых не должны ждать ее коммита).
 
     """
 
     def inner(func: Callable) -> Callable:
 
+        def call(self, conn, *args, **kwargs) -> Any:
+
+            traced = []  # noqa Курсор вызова, запоминающий запросы (если журнал включен)
+
+            with _query_timer(
+                f'{type(self).__name__}.{func.__name__}',
+                self.connection_pool, traced
+            ):
+                return run(self, conn, traced, *args, **kwargs)
+
+        def run(self, conn, traced, *args, **kwargs) -> Any:
+
+            if cursor_factory is None:
+                with conn.cursor() as cursor:  # Стандартный курсор
+
+                    logger.debug(
+                        "Декоратор 'db_connection'. Функция '%s'. "
+                        "Создан стандартный курсор.",
+                        func.__name__
+                    )
+
+                    return func(self, _trace(cursor, traced), *args, **kwargs)
+            else:
+                with conn.cursor(cursor_factory=cursor_factory) as cursor:
+
+                    logger.debug(
+                        "Декоратор 'db_connection'. Функция '%s'. "
+                        "Создан курсор с заданным factory: '%s'",
+                        func.__name__, cursor_factory
+                    )
+
+                    return func(self, _trace(cursor, traced), *args, **kwargs)
+
         @wraps(func)
         def wrapper(self, *args, **kwargs) -> Any:
             connection_pool = self.connection_pool  # Получаем пул соединений
+            work = _current_unit_of_work.get()
+
+            if not own_transaction and work is not None \
+                    and work.connection_pool is connection_pool:
+                try:
+                    result = call(
+                        self, work.get_connection(), *args, **kwargs
+                    )
+                except psycopg2.Error:
+                    # noqa Прерванная транзакция непригодна: откатываем ее. Повтор вызова
+                    # noqa ('retry_connection') на новой транзакции возможен, только если
+                    # noqa откат не отменил результаты предыдущих вызовов
+                    work.retryable = work.calls == 0
+                    work.release(commit=False)
+                    raise
+
+                work.calls += 1
+
+                return result
 
             with DatabaseConnection(connection_pool) as conn:
+                return call(self, conn, *args, **kwargs)
 
-                if cursor_factory is None:
-                    with conn.cursor() as cursor:  # Стандартный курсор
+        return wrapper
 
-                        logger.debug(
-                            "Декоратор 'db_connection'. Функция '%s'. "
-                            "Создан стандартный курсор.",
-                            func.__name__
-                        )
+    return inner
 
-                        return func(self, cursor, *args, **kwargs)
-                else:
-                    with conn.cursor(cursor_factory=cursor_factory) as cursor:
 
-                        logger.debug(
-                            "Декоратор 'db_connection'. Функция '%s'. "
-                            "Создан курсор с заданным factory: '%s'",
-                            func.__name__, cursor_factory
-                        )
+class DatabaseUnavailableError(psycopg2.OperationalError):
+    """
+    База данных недоступна: выключатель 'DB_BREAKER' разомкнут,
+    вызов не выполнялся. Обработчик ошибок отвечает кодом 503.
+    """
 
-                        return func(self, cursor, *args, **kwargs)
+    code = 503
 
-        return wrapper
 
-    return inner
+# noqa Коды SQLSTATE отказа сервера: завершение работы, запуск, нет свободных соединений
+CONNECTION_ERROR_CODES = frozenset({'57P01', '57P02', '57P03', '53300'})
+# noqa Конфликты транзакций: повтор возможен, но база данных доступна
+CONFLICT_ERROR_CODES = frozenset({'40001', '40P01'})
+
+# noqa Общий для всех репозиториев процесса выключатель: пока база данных недоступна,
+# noqa вызовы завершаются сразу, а не ждут таймаутов соединения в каждом запросе
+DB_BREAKER = CircuitBreaker(
+    'database',
+    failure_threshold=Config.DB_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=Config.DB_BREAKER_RESET_TIMEOUT,
+    half_open_probes=Config.DB_BREAKER_HALF_OPEN_PROBES
+)
+
+
+def is_connection_error(error: psycopg2.Error) -> bool:
+    """
+    Проверяет, что ошибка означает отказ базы данных (нет соединения,
+    соединение разорвано, сервер перезапускается), а не ошибку запроса.
+    Такие ошибки учитываются выключателем 'DB_BREAKER'.
+    """
+
+    if isinstance(error, (PoolError, DatabaseUnavailableError)):
+        return False  # noqa Пул исчерпан или выключатель разомкнут: сервер не опрашивался
+
+    if error.pgcode:
+        return error.pgcode.startswith('08') \
+            or error.pgcode in CONNECTION_ERROR_CODES
 
+    # noqa Ошибки без кода SQLSTATE: соединение не открылось или было разорвано
+    return isinstance(
+        error, (psycopg2.OperationalError, psycopg2.InterfaceError)
+    )
 
-def retry_connection(limit: int = 5, interval: int = 2):
+
+def is_transient(error: psycopg2.Error) -> bool:
+    """
+    Проверяет, что вызов с такой ошибкой имеет смысл повторить:
+    отказ соединения или конфликт транзакций. Ошибки запроса
+    (нарушение ограничений, синтаксис) не повторяются.
     """
-    Декоратор для повторных попыток подключения к базе данных.
+
+    return is_connection_error(error) \
+        or error.pgcode in CONFLICT_ERROR_CODES
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Пауза перед повтором номер 'attempt' (с 1): экспоненциальная,
+    со случайной величиной от 0 до границы ("full jitter"), чтобы
+    процессы не повторяли вызовы одновременно.
+    """
+
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_connection(
+    attempts: int = Config.DB_RETRY_ATTEMPTS,
+    base_delay: float = Config.DB_RETRY_BASE_DELAY,
+    max_delay: float = Config.DB_RETRY_MAX_DELAY,
+    deadline: float = Config.DB_RETRY_DEADLINE,
+    breaker: CircuitBreaker = DB_BREAKER
+):
+    """
+    Декоратор повторных попыток вызова репозитория.
+
+    Повторяются только временные ошибки ('is_transient'), не более
+    'attempts' попыток и не дольше 'deadline' секунд в сумме, с паузой
+    'backoff_delay'. Вызов внутри единицы работы, у которой до ошибки
+    уже были успешные вызовы, не повторяется: откат транзакции отменил
+    их результаты.
+
+    Отказы соединения учитываются выключателем 'breaker'; пока он
+    разомкнут, вызов сразу завершается ошибкой 'DatabaseUnavailableError'.
+    Замыкает выключатель только успешный вызов: остальные ошибки (нет
+    свободного соединения в пуле, ошибка запроса, исключение вне базы
+    данных) лишь освобождают место пробного вызова.
 
     param:
-        limit: Максимальное количество попыток подключения.
-        interval: Интервал между попытками в секундах.
+        attempts: Максимальное количество попыток.
+        base_delay: Пауза перед первым повтором (верхняя граница), с.
+        max_delay: Максимальная пауза между попытками, с.
+        deadline: Общее время на все попытки, с.
+        breaker: Автоматический выключатель базы данных.
     """
     def decorator(func):
 
         @wraps(func)
         def wrapper(*args, **kwargs):
 
-            attempts = 0
+            give_up_at = time.monotonic() + deadline
+            attempt = 0
 
-            while attempts < limit:
+            while True:
+                attempt += 1
 
                 try:
-                    logger.info(
+                    breaker.before_call()
+                except CircuitOpenError as error:
+                    raise DatabaseUnavailableError(str(error)) from error
+
+                try:
+                    logger.debug(
                         "Декоратор 'retry_connection'. Функция '%s'. "
-                        "Попытка подключения... попытка: %d",
-                        func.__name__, attempts + 1
+                        "Попытка: %d",
+                        func.__name__, attempt
                     )
 
-                    return func(*args, **kwargs)
-
+                    result = func(*args, **kwargs)
                 except psycopg2.Error as error:
-
-                    attempts += 1
-
-                    logger.error(
-                        "Декоратор 'retry_connection'. Функция '%s'. "
-                        "Ошибка при попытке подключения: '%s'. "
-                        "Попытка %d из %d.",
-                        func.__name__, error, attempts, limit, exc_info=True
+                    delay = _retry_delay(
+                        func, error, attempt, breaker,
+                        backoff_delay(attempt, base_delay, max_delay),
+                        attempts, give_up_at
                     )
 
-                    if attempts < limit:
-                        time.sleep(interval)
+                    if delay is None:
+                        raise
 
-            logger.critical(
-                "Декоратор 'retry_connection'. Функция '%s'. "
-                "Все попытки подключения исчерпаны.",
-                func.__name__, exc_info=True
-            )
+                    time.sleep(delay)
+                except BaseException:
+                    breaker.release_probe()  # noqa Ошибка не связана с базой данных: освобождаем пробный вызов
+                    raise
+                else:
+                    breaker.record_success()
 
-            raise psycopg2.Error("Все попытки подключения исчерпаны.")
+                    return result
 
         return wrapper
 
     return decorator
 
 
+def _retry_delay(
+    func: Callable,
+    error: psycopg2.Error,
+    attempt: int,
+    breaker: CircuitBreaker,
+    delay: float,
+    attempts: int,
+    give_up_at: float
+) -> Optional[float]:
+    """
+    Учитывает ошибку выключателем и решает, повторять ли вызов.
+    Возвращает паузу перед повтором или None, если повтора не будет.
+    """
+
+    if is_connection_error(error):
+        breaker.record_failure()
+    else:
+        # noqa Пул исчерпан, выключатель разомкнут или ошибка запроса: доступность
+        # noqa базы данных не подтверждена, состояние выключателя не меняется
+        breaker.release_probe()
+
+    work = _current_unit_of_work.get()
+    retry = (
+        is_transient(error)
+        and attempt < attempts
+        # Повтор должен уложиться в общее время на попытки
+        and time.monotonic() + delay <= give_up_at
+        and (work is None or work.retryable)
+    )
+
+    if not retry:
+        logger.error(
+            "Декоратор 'retry_connection'. Функция '%s'. "
+            "Ошибка: '%s'. Попытка %d, повтора не будет.",
+            func.__name__, error, attempt
+        )
+        return None
+
+    logger.warning(
+        "Декоратор 'retry_connection'. Функция '%s'. "
+        "Временная ошибка: '%s'. Попытка %d из %d, повтор через %.3f с.",
+        func.__name__, error, attempt, attempts, delay
+    )
+    DB_RETRIES.inc(method=func.__qualname__)
+
+    return delay
+
+
 def create_signal_handler(app: Flask) -> callable:
     """
     Создает обработчик сигналов для корректного завершения работы приложения.
@@ -0,0 +1,277 @@
+"""
+Журнал медленных запросов.
+
+Декоратор 'db_connection' передает методу репозитория курсор
+'TracingCursor', который запоминает выполненные запросы и их
+длительность. Если вызов метода длился дольше порога
+'SLOW_QUERY_THRESHOLD_MS', запросы вызова записываются в отдельный
+журнал ('logs/slow_queries.log'): текст SQL, параметры (строки
+заменяются их длиной), длительность и, для доли вызовов
+('SLOW_QUERY_EXPLAIN_SAMPLE'), план самого долгого запроса.
+"""
+import logging
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+import psycopg2
+
+from page_analyzer.config import Config
+
+
+# noqa Отдельный логгер: его записи выводятся только в журнал медленных запросов
+SLOW_QUERY_LOGGER = 'page_analyzer.slow_queries'
+
+logger = logging.getLogger(SLOW_QUERY_LOGGER)
+
+# noqa Запросы, которые EXPLAIN ANALYZE выполнил бы с изменением данных или блокировками строк
+MODIFYING_STATEMENT = re.compile(
+    r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|FOR\s+SHARE|FOR\s+KEY\s+SHARE)\b',
+    re.IGNORECASE
+)
+# Строковые литералы в тексте плана (значения условий фильтрации)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+# Сколько элементов списка параметров выводится в журнал
+MAX_LOGGED_ITEMS = 10
+
+
+class TracedStatement:
+    """Выполненный запрос: текст, параметры и длительность."""
+
+    def __init__(self, query, params, logged_query, logged_params):
+        # Запрос в том виде, в котором он выполнялся (для EXPLAIN)
+        self.query = query
+        self.params = params
+        # noqa Запрос для журнала: при 'execute_values' значения заменены шаблоном строки
+        self.logged_query = logged_query
+        self.logged_params = logged_params
+        self.duration = 0.0
+        self.rowcount = -1
+
+
+class TracingCursor:
+    """
+    Обертка над курсором psycopg2, запоминающая выполненные запросы.
+
+    Остальные атрибуты и методы (fetchone, fetchall, rowcount и т.д.)
+    берутся у исходного курсора.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._mogrified = []
+        self.statements: List[TracedStatement] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def mogrify(self, query, vars=None):
+        """
+        Подставляет параметры в запрос. Используется 'execute_values':
+        результат запоминается, чтобы вывести в журнал шаблон строки
+        и параметры вместо подставленных значений.
+        """
+
+        result = self._cursor.mogrify(query, vars)
+        self._mogrified.append((query, vars, result))
+
+        return result
+
+    def execute(self, query, vars=None):
+        statement = self._trace(query, vars)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, vars)
+        finally:
+            statement.duration = time.perf_counter() - started
+            statement.rowcount = self._cursor.rowcount
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        statement = self._trace(query, vars_list)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, vars_list)
+        finally:
+            statement.duration = time.perf_counter() - started
+            statement.rowcount = self._cursor.rowcount
+
+    def _trace(self, query, vars) -> TracedStatement:
+        logged_query, logged_params = query, vars
+
+        if self._mogrified and vars is None and isinstance(query, bytes):
+            logged_query, logged_params = self._unmogrify(query)
+
+        self._mogrified = []
+        statement = TracedStatement(query, vars, logged_query, logged_params)
+        self.statements.append(statement)
+
+        return statement
+
+    def _unmogrify(self, query: bytes):
+        """
+        Заменяет в запросе подставленные значения их шаблонами
+        и возвращает запрос и список параметров.
+        """
+
+        params = []
+        position = 0
+
+        for template, vars, result in self._mogrified:
+            index = query.find(result, position)
+            if index < 0:
+                continue
+
+            if isinstance(template, str):
+                template = template.encode()
+
+            query = query[:index] + template + query[index + len(result):]
+            position = index + len(template)
+            params.append(vars)
+
+        return query, params
+
+
+def redact(value: Any) -> Any:
+    """
+    Заменяет строки и байты их длиной, сохраняя числа, даты и
+    структуру списков и словарей. Длинные списки сокращаются.
+    """
+
+    if isinstance(value, str):
+        return f'<str:{len(value)}>'
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<bytes:{len(value)}>'
+
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value[:MAX_LOGGED_ITEMS]]
+
+        if len(value) > MAX_LOGGED_ITEMS:
+            items.append(f'... (+{len(value) - MAX_LOGGED_ITEMS})')
+
+        return items if isinstance(value, list) else tuple(items)
+
+    return value
+
+
+def sql_text(query) -> str:
+    """Текст запроса в одну строку."""
+
+    if isinstance(query, (bytes, bytearray)):
+        query = query.decode('utf-8', errors='replace')
+    elif not isinstance(query, str):
+        query = str(query)  # psycopg2.sql.Composable
+
+    return ' '.join(query.split())
+
+
+def is_read_only(query) -> bool:
+    """
+    Проверяет, что запрос только читает данные, то есть его можно
+    выполнить под EXPLAIN ANALYZE.
+    """
+
+    text = sql_text(query).lstrip('(').upper()
+
+    return text.startswith(('SELECT', 'WITH')) \
+        and not MODIFYING_STATEMENT.search(text)
+
+
+def explain(connection_pool, statement: TracedStatement) -> Optional[str]:
+    """
+    Получает план запроса на отдельном соединении пула.
+
+    Запросы, которые только читают данные, выполняются под
+    EXPLAIN (ANALYZE, BUFFERS); остальные - под EXPLAIN без
+    выполнения. Транзакция всегда откатывается, время выполнения
+    ограничено 'SLOW_QUERY_EXPLAIN_TIMEOUT_MS'.
+    """
+
+    if is_read_only(statement.query):
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+    else:
+        prefix = 'EXPLAIN '
+
+    query = statement.query
+    if isinstance(query, (bytes, bytearray)):
+        query = query.decode('utf-8')
+    elif not isinstance(query, str):
+        return None  # noqa psycopg2.sql.Composable: текст зависит от соединения
+
+    # noqa Не ждем соединение долго: план не должен задерживать запрос пользователя
+    connection = connection_pool.get_connection(timeout=1)
+    if connection is None:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET LOCAL statement_timeout = %s',
+                (Config.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,)
+            )
+            cursor.execute(prefix + query, statement.params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        return STRING_LITERAL.sub("'...'", plan)
+    except psycopg2.Error as error:
+        return f'План не получен: {error}'
+    finally:
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            pass
+        connection_pool.release_connection(connection)
+
+
+def report_slow_call(
+    method: str,
+    duration: float,
+    statements: List[TracedStatement],
+    connection_pool
+) -> None:
+    """
+    Записывает вызов метода репозитория в журнал медленных запросов,
+    если он длился дольше порога.
+    """
+
+    threshold = Config.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    if duration < threshold or not statements:
+        return
+
+    lines = [
+        f"Медленный вызов '{method}': {duration * 1000:.1f} мс "
+        f"(порог {Config.SLOW_QUERY_THRESHOLD_MS} мс), "
+        f"запросов: {len(statements)}"
+    ]
+
+    for number, statement in enumerate(statements, start=1):
+        lines.append(
+            f'[{number}] {statement.duration * 1000:.1f} мс, '
+            f'строк: {statement.rowcount}'
+        )
+        lines.append(f'SQL: {sql_text(statement.logged_query)}')
+        lines.append(f'Параметры: {redact(statement.logged_params)!r}')
+
+    if random.random() < Config.SLOW_QUERY_EXPLAIN_SAMPLE:
+        slowest = max(statements, key=lambda item: item.duration)
+        plan = explain(connection_pool, slowest)
+
+        if plan:
+            lines.append(
+                f'План запроса [{statements.index(slowest) + 1}]:\n{plan}'
+            )
+
+    logger.warning(
+        '\n'.join(lines),
+        extra={'payload_limit': Config.SLOW_QUERY_LOG_MAX_LENGTH}
+    )
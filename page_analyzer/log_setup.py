@@ -1,17 +1,305 @@
+import atexit
+import itertools
 import logging
-import os
 import logging.config
+import logging.handlers
+import os
+import queue
+import reprlib
+from typing import Dict, List, Optional
+
+from page_analyzer.config import Config
+
+
+# Логгеры, для которых настраиваются обработчики (и их маршруты в очереди)
+CONFIGURED_LOGGERS = (
+    'page_analyzer',
+    'page_analyzer.slow_queries',
+    'werkzeug',
+    'dotenv',
+    'charset_normalizer',
+    'urllib3',
+    'requests',
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handlers: List['RoutingQueueHandler'] = []
+_hooks_registered = False
+
+# Форматирование трассировок исключений при постановке записи в очередь
+_exception_formatter = logging.Formatter()
+
+
+class PayloadLimitFilter(logging.Filter):
+    """
+    Ограничивает размер аргументов и итогового текста сообщения лога.
+
+    Списки, словари и строки в аргументах сокращаются через 'reprlib'
+    (стоимость не зависит от размера данных), а итоговое сообщение
+    обрезается до 'max_length' символов (или до 'payload_limit',
+    переданного в 'extra' записи).
+    """
+
+    def __init__(self, max_length: int = Config.LOG_PAYLOAD_MAX_LENGTH):
+        super().__init__()
+        self.max_length = max_length
+
+        self._repr = reprlib.Repr()
+        self._repr.maxlist = self._repr.maxtuple = self._repr.maxset = 10
+        self._repr.maxdict = 20
+        self._repr.maxstring = self._repr.maxother = max_length
+        self._repr.maxlevel = 3
 
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Сокращает аргументы и текст записи на месте."""
 
-def setup_logging() -> None:
+        if isinstance(record.args, tuple):
+            record.args = tuple(self._shorten(arg) for arg in record.args)
+
+        message = record.getMessage()
+        max_length = getattr(record, 'payload_limit', self.max_length)
+
+        if len(message) > max_length:
+            message = (
+                f'{message[:max_length]}... '
+                f'[обрезано, всего {len(message)} симв.]'
+            )
+
+        record.msg, record.args = message, None
+
+        return True
+
+    def _shorten(self, value):
+        if isinstance(value, (list, tuple, dict, set, frozenset)):
+            return _Shortened(self._repr.repr(value))
+
+        if isinstance(value, str) and len(value) > self.max_length:
+            return f'{value[:self.max_length]}...'
+
+        return value
+
+
+class _Shortened(str):
+    """Сокращенное представление значения, подставляемое вместо него."""
+
+    __repr__ = str.__str__
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборочная запись отладочных сообщений.
+
+    Для логгеров из 'rates' (и их потомков) пропускается только каждое
+    N-е сообщение уровня DEBUG с одним и тем же шаблоном, где
+    N = 1 / доля. Сообщения уровня INFO и выше не отбрасываются.
+    Фильтр выполняется до постановки записи в очередь.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {
+            name: max(round(1 / rate), 1)
+            for name, rate in rates.items() if rate > 0
+        }
+        self.dropped = {name for name, rate in rates.items() if rate <= 0}
+        self._counters: Dict[tuple, itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+
+        if record.levelno > logging.DEBUG:
+            return True
+
+        # noqa Решение сохраняется в записи: фильтр может стоять на нескольких обработчиках
+        sampled = getattr(record, 'sampled', None)
+
+        if sampled is None:
+            sampled = record.sampled = self._sample(record)
+
+        return sampled
+
+    def _sample(self, record: logging.LogRecord) -> bool:
+        name = self._configured_name(record.name)
+
+        if name is None:
+            return True
+
+        if name in self.dropped:
+            return False
+
+        counter = self._counters.get((record.name, record.msg))
+        if counter is None:
+            counter = self._counters.setdefault(
+                (record.name, record.msg), itertools.count()
+            )
+
+        return next(counter) % self.every[name] == 0
+
+    def _configured_name(self, name: str) -> Optional[str]:
+        """Возвращает ближайший настроенный логгер-предок (или сам логгер)."""
+
+        while name:
+            if name in self.every or name in self.dropped:
+                return name
+            name = name.rpartition('.')[0]
+
+        return None
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """
+    Разбирает настройку выборки вида 'логгер=доля,логгер=доля'.
+    Например: 'page_analyzer.db_connections=0.01'.
+    """
+
+    rates = {}
+
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+
+    return rates
+
+
+class RoutingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Ставит записи лога в общую очередь, не выполняя ввод-вывод в
+    вызывающем потоке.
+
+    Сообщение не форматируется при постановке в очередь: аргументы
+    передаются как есть и подставляются потоком 'QueueListener'
+    (поэтому изменять объекты после записи их в лог нельзя). Запись
+    помечается маршрутом - именем логгера, чьи обработчики ее выведут.
+    Если очередь заполнена, запись отбрасывается и учитывается
+    в 'dropped', поток не ждет.
+    """
+
+    def __init__(self, log_queue: queue.Queue, route: str):
+        super().__init__(log_queue)
+        self.route = route
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+
+        if record.exc_info:
+            # noqa Трассировка ссылается на кадры стека, поэтому форматируется сразу
+            record.exc_text = _exception_formatter.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+
+        record.log_route = self.route
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RouteHandler(logging.Handler):
+    """
+    Обработчик потока 'QueueListener': сокращает запись и передает ее
+    исходным обработчикам логгера, указанного в маршруте записи.
+    """
+
+    def __init__(
+        self, routes: Dict[str, List[logging.Handler]],
+        limiter: PayloadLimitFilter
+    ):
+        super().__init__()
+        self.routes = routes
+        self.limiter = limiter
+
+    def handle(self, record: logging.LogRecord) -> bool:
+
+        self.limiter.filter(record)
+
+        for handler in self.routes.get(record.log_route, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+        return True
+
+
+def _install_queue(
+    routes: Dict[str, List[logging.Handler]], sampling: SamplingFilter
+) -> None:
+    """
+    Заменяет обработчики настроенных логгеров обработчиками очереди
+    и запускает поток, выводящий записи исходными обработчиками.
+    """
+
+    global _hooks_registered
+
+    for name, handlers in routes.items():
+        logger = logging.getLogger(name or None)
+        queue_handler = RoutingQueueHandler(queue.Queue(), name)
+        queue_handler.addFilter(sampling)
+        # noqa В очередь попадают только записи, которые выведет хотя бы один обработчик
+        queue_handler.setLevel(
+            min((handler.level for handler in handlers), default=0)
+        )
+
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+        _queue_handlers.append(queue_handler)
+
+    _start_listener(RouteHandler(routes, PayloadLimitFilter()))
+
+    if not _hooks_registered:
+        # noqa После fork поток слушателя не существует: запускаем новый с новой очередью
+        os.register_at_fork(after_in_child=_restart_listener)
+        atexit.register(stop_logging)
+        _hooks_registered = True
+
+
+def _start_listener(route_handler: RouteHandler) -> None:
+    global _listener
+
+    log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+
+    for queue_handler in _queue_handlers:
+        queue_handler.queue = log_queue
+
+    _listener = logging.handlers.QueueListener(log_queue, route_handler)
+    _listener.start()
+
+
+def _restart_listener() -> None:
+    if _listener is not None:
+        _start_listener(_listener.handlers[0])
+
+
+def stop_logging() -> None:
+    """Останавливает поток записи логов, дописав записи из очереди."""
+
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(use_queue: bool = Config.LOG_QUEUE_ENABLED) -> None:
 
     """
     Настройка логгера для записи в файл и в консоль.
 
     Функция проверяет наличие директории для логов,
     создает её при отсутствии, настраивает систему логирования.
+
+    Если 'use_queue' истинен, записи выводятся в файл и в консоль
+    отдельным потоком ('QueueListener'), а потоки запросов только
+    ставят их в очередь.
     """
 
+    stop_logging()
+    _queue_handlers.clear()
+
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
@@ -40,6 +328,15 @@ def setup_logging() -> None:
                 'backupCount': 10,
                 'encoding': 'utf-8'
             },
+            'slow_queries': {
+                'class': 'logging.handlers.RotatingFileHandler',
+                'level': 'WARNING',
+                'formatter': 'default',
+                'filename': 'logs/slow_queries.log',
+                'maxBytes': 10485760,  # 10 MB
+                'backupCount': 5,
+                'encoding': 'utf-8'
+            },
             'console': {
                 'class': 'logging.StreamHandler',
                 'level': 'INFO',
@@ -56,6 +353,12 @@ def setup_logging() -> None:
                 'handlers': ['console', 'file'],
                 'propagate': False
             },
+            # noqa Журнал медленных запросов (page_analyzer.db_connections.slow_query)
+            'page_analyzer.slow_queries': {
+                'level': 'WARNING',
+                'handlers': ['slow_queries'],
+                'propagate': False
+            },
             'werkzeug': {
                 'level': 'ERROR',
                 'handlers': ['console'],
@@ -86,3 +389,18 @@ def setup_logging() -> None:
 
     # Применяем конфигурацию логирования
     logging.config.dictConfig(logging_config)
+
+    routes = {
+        name: list(logging.getLogger(name or None).handlers)
+        for name in ('',) + CONFIGURED_LOGGERS
+    }
+    sampling = SamplingFilter(parse_sampling(Config.LOG_SAMPLING))
+
+    if use_queue:
+        _install_queue(routes, sampling)
+    else:
+        limiter = PayloadLimitFilter()
+
+        for handler in {h for handlers in routes.values() for h in handlers}:
+            handler.addFilter(sampling)
+            handler.addFilter(limiter)
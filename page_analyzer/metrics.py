@@ -0,0 +1,641 @@
+"""
+Метрики приложения в текстовом формате Prometheus.
+
+Каждый процесс (воркер gunicorn, воркер очереди) накапливает метрики
+в памяти и периодически записывает их снимок в файл
+'METRICS_DIR/metrics-<pid>.json'. Обработчик /metrics объединяет снимки
+всех процессов: счетчики и гистограммы суммируются, датчики (gauge)
+суммируются или берется максимум, причем датчики завершившихся
+процессов не учитываются. Снимок завершившегося процесса при
+объединении переносится в общий снимок 'dead-metrics.json' и удаляется.
+"""
+from contextlib import contextmanager
+from functools import partial
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+from page_analyzer.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: снимки объединяются без блокировки
+    fcntl = None
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Границы интервалов гистограмм по умолчанию (в секундах)
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelValues = Tuple[str, ...]
+
+# noqa Общий снимок счетчиков и гистограмм завершившихся процессов и файл блокировки
+DEAD_SNAPSHOT = 'dead-metrics.json'
+LOCK_NAME = 'metrics.lock'
+
+
+class Metric:
+    """Метрика с именем, описанием и именами меток."""
+
+    type: str = ''
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает описание метрики и ее значения для записи в файл."""
+
+        with self._lock:
+            samples = [
+                [list(key), value] for key, value in self._values.items()
+            ]
+
+        return {
+            'type': self.type,
+            'help': self.help,
+            'labelnames': list(self.labelnames),
+            'samples': samples,
+        }
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels) -> None:
+        """Устанавливает значение счетчика, который ведется в другом месте."""
+
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    """
+    Текущее значение. 'aggregate' задает объединение значений
+    процессов: 'sum' или 'max'.
+    """
+
+    type = 'gauge'
+
+    def __init__(
+        self, name: str, help: str, labelnames: Tuple[str, ...],
+        aggregate: str = 'sum'
+    ):
+        super().__init__(name, help, labelnames)
+        self.aggregate = aggregate
+
+    def set(self, value: float, **labels) -> None:
+
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(super().snapshot(), aggregate=self.aggregate)
+
+
+class Histogram(Metric):
+    """Распределение значений по интервалам (обычно длительностей)."""
+
+    type = 'histogram'
+
+    def __init__(
+        self, name: str, help: str, labelnames: Tuple[str, ...],
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets)
+        )
+
+        with self._lock:
+            entry = self._values.get(key)
+
+            if entry is None:
+                # noqa Число попаданий в каждый интервал (последний - +Inf), сумма, количество
+                entry = self._values[key] = {
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+
+            entry['buckets'][index] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Измеряет длительность блока и добавляет ее в гистограмму."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+
+class Registry:
+    """
+    Метрики процесса и функции, обновляющие датчики перед снимком
+    (например, состоянием пула соединений).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Обновляет датчики и возвращает снимок всех метрик."""
+
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as error:
+                logger.warning(
+                    "Класс: 'Registry', метод: 'snapshot'. "
+                    "Ошибка сборщика метрик %s: '%s'",
+                    collector, error
+                )
+
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = Registry()
+
+
+def counter(
+    name: str, help: str, labelnames: Tuple[str, ...] = ()
+) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(
+    name: str, help: str, labelnames: Tuple[str, ...] = (),
+    aggregate: str = 'sum'
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames, aggregate))
+
+
+def histogram(
+    name: str, help: str, labelnames: Tuple[str, ...] = (),
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+# Метрики, общие для нескольких модулей
+HTTP_REQUEST_DURATION = histogram(
+    'page_analyzer_http_request_duration_seconds',
+    'Длительность обработки HTTP-запроса.',
+    ('endpoint', 'method', 'status')
+)
+DB_QUERY_DURATION = histogram(
+    'page_analyzer_db_query_duration_seconds',
+    'Длительность вызова метода репозитория (без ожидания соединения).',
+    ('method',)
+)
+DB_QUERY_ERRORS = counter(
+    'page_analyzer_db_query_errors_total',
+    'Число вызовов метода репозитория, завершившихся ошибкой.',
+    ('method',)
+)
+DB_POOL_WAIT = histogram(
+    'page_analyzer_db_pool_wait_seconds',
+    'Время получения соединения из пула.'
+)
+DB_POOL_CONNECTIONS = gauge(
+    'page_analyzer_db_pool_connections',
+    'Соединения пула по состояниям (open, idle, in_use) и ожидающие '
+    'соединения потоки (waiting).',
+    ('state',)
+)
+DB_POOL_LAST_WAIT = gauge(
+    'page_analyzer_db_pool_last_wait_seconds',
+    'Время последнего получения соединения из пула (максимум по процессам).',
+    aggregate='max'
+)
+FETCH_DURATION = histogram(
+    'page_analyzer_fetch_duration_seconds',
+    'Длительность загрузки проверяемой страницы без времени разбора.',
+    ('outcome',)
+)
+PARSE_DURATION = histogram(
+    'page_analyzer_parse_duration_seconds',
+    'Длительность разбора HTML проверяемой страницы.',
+    ('backend',)
+)
+HTTP_POOL = gauge(
+    'page_analyzer_http_pool',
+    'Состояние пула HTTP-сессий: хосты, закрытые сессии, запросы, '
+    'открытые и повторно использованные соединения.',
+    ('stat',)
+)
+HOST_FAST_FAILURES = counter(
+    'page_analyzer_host_fast_failures_total',
+    'Проверки, сразу завершенные ошибкой без запроса к хосту: '
+    'выключатель хоста разомкнут (circuit_open) или имя хоста '
+    'в негативном кэше DNS (dns).',
+    ('reason',)
+)
+CACHE_EVENTS = counter(
+    'page_analyzer_cache_events_total',
+    'События кэшей (попадания, промахи, вытеснения, инвалидации).',
+    ('cache', 'event')
+)
+CIRCUIT_BREAKER_STATE = gauge(
+    'page_analyzer_circuit_breaker_state',
+    'Состояние автоматического выключателя: 0 - замкнут, 1 - пробные '
+    'вызовы, 2 - разомкнут (максимум по процессам).',
+    ('name',), aggregate='max'
+)
+CIRCUIT_BREAKER_REJECTED = counter(
+    'page_analyzer_circuit_breaker_rejected_total',
+    'Вызовы, сразу отклоненные разомкнутым выключателем.',
+    ('name',)
+)
+DB_RETRIES = counter(
+    'page_analyzer_db_retries_total',
+    'Повторы вызовов репозиториев после временных ошибок базы данных.',
+    ('method',)
+)
+
+# ----- Снимки процессов -----
+
+_flusher_pid: Optional[int] = None
+_flusher_lock = threading.Lock()
+
+
+def snapshot_path(directory: str, pid: int) -> Path:
+    return Path(directory) / f'metrics-{pid}.json'
+
+
+def write_snapshot(directory: str = Config.METRICS_DIR) -> None:
+    """Записывает снимок метрик текущего процесса (атомарно)."""
+
+    os.makedirs(directory, exist_ok=True)
+
+    path = snapshot_path(directory, os.getpid())
+    temporary = path.with_suffix('.tmp')
+    temporary.write_text(
+        json.dumps({'pid': os.getpid(), 'metrics': REGISTRY.snapshot()}),
+        encoding='utf-8'
+    )
+    os.replace(temporary, path)
+
+
+def start_flusher(
+    directory: str = Config.METRICS_DIR,
+    interval: float = Config.METRICS_FLUSH_INTERVAL
+) -> None:
+    """
+    Запускает в текущем процессе поток, записывающий снимок метрик
+    каждые 'interval' секунд. После fork поток запускается заново
+    при следующем вызове.
+    """
+
+    global _flusher_pid
+
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+
+        _flusher_pid = os.getpid()
+
+    def flush_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError as error:
+                logger.warning(
+                    "Функция 'start_flusher'. Ошибка записи метрик: '%s'",
+                    error
+                )
+
+    threading.Thread(
+        target=flush_forever, name='metrics-flusher', daemon=True
+    ).start()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+@contextmanager
+def _directory_lock(directory: str) -> Iterator[None]:
+    """
+    Блокирует каталог снимков между процессами на время объединения,
+    чтобы снимок завершившегося процесса переносился в общий снимок
+    ровно один раз.
+    """
+
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+
+    with open(Path(directory) / LOCK_NAME, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None  # Файл удален или записывается другим процессом
+
+
+def _merge_metrics(
+    merged: Dict[str, Any], metrics: Dict[str, Any], gauges: bool = True
+) -> None:
+    """Добавляет метрики снимка к объединенным метрикам 'merged'."""
+
+    for name, metric in metrics.items():
+        if metric['type'] == 'gauge' and not gauges:
+            continue
+
+        target = merged.setdefault(name, dict(metric, samples={}))
+        samples = target['samples']
+
+        for labels, value in metric['samples']:
+            key = tuple(labels)
+            samples[key] = _merge(metric, samples.get(key), value)
+
+
+def _compact_dead(directory: str, path: Path, snapshot: Dict[str, Any]) -> None:
+    """
+    Переносит счетчики и гистограммы завершившегося процесса в общий
+    снимок DEAD_SNAPSHOT и удаляет файл процесса (как
+    'mark_process_dead' в prometheus_client). Датчики процесса
+    отбрасываются.
+    """
+
+    dead_path = Path(directory) / DEAD_SNAPSHOT
+    merged: Dict[str, Any] = {}
+    dead = _read_snapshot(dead_path)
+
+    if dead is not None:
+        _merge_metrics(merged, dead['metrics'])
+
+    _merge_metrics(merged, snapshot['metrics'], gauges=False)
+
+    temporary = dead_path.with_suffix('.tmp')
+    temporary.write_text(
+        json.dumps({'pid': None, 'metrics': {
+            name: dict(metric, samples=[
+                [list(key), value] for key, value in metric['samples'].items()
+            ])
+            for name, metric in merged.items()
+        }}),
+        encoding='utf-8'
+    )
+    os.replace(temporary, dead_path)
+    path.unlink()
+
+    logger.info(
+        "Функция '_compact_dead'. Метрики завершившегося процесса %s "
+        "перенесены в '%s'.",
+        snapshot['pid'], DEAD_SNAPSHOT
+    )
+
+
+def aggregate(directory: str = Config.METRICS_DIR) -> Dict[str, Any]:
+    """
+    Объединяет снимки метрик всех процессов из каталога. Снимки
+    завершившихся процессов при этом переносятся в DEAD_SNAPSHOT,
+    поэтому число файлов не растет с каждым перезапуском воркера.
+    """
+
+    merged: Dict[str, Any] = {}
+
+    with _directory_lock(directory):
+        for path in sorted(Path(directory).glob('metrics-*.json')):
+            snapshot = _read_snapshot(path)
+
+            if snapshot is None:
+                continue
+
+            if _process_alive(snapshot['pid']):
+                _merge_metrics(merged, snapshot['metrics'])
+                continue
+
+            try:
+                _compact_dead(directory, path, snapshot)
+            except OSError as error:
+                logger.warning(
+                    "Функция 'aggregate'. Ошибка переноса метрик "
+                    "процесса %s: '%s'",
+                    snapshot['pid'], error
+                )
+                _merge_metrics(merged, snapshot['metrics'], gauges=False)
+
+        dead = _read_snapshot(Path(directory) / DEAD_SNAPSHOT)
+
+        if dead is not None:
+            _merge_metrics(merged, dead['metrics'])
+
+    return merged
+
+
+def _merge(metric: Dict[str, Any], current: Any, value: Any) -> Any:
+    if current is None:
+        return value
+
+    if metric['type'] == 'histogram':
+        return {
+            'buckets': [a + b for a, b in zip(current['buckets'],
+                                              value['buckets'])],
+            'sum': current['sum'] + value['sum'],
+            'count': current['count'] + value['count'],
+        }
+
+    if metric['type'] == 'gauge' and metric.get('aggregate') == 'max':
+        return max(current, value)
+
+    return current + value
+
+
+def _labels(names: List[str], values, extra: str = '') -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def render(metrics: Dict[str, Any]) -> str:
+    """Форматирует метрики в текстовый формат Prometheus."""
+
+    lines = []
+
+    for name in sorted(metrics):
+        metric = metrics[name]
+        names = metric['labelnames']
+
+        lines.append(f'# HELP {name} {metric["help"]}')
+        lines.append(f'# TYPE {name} {metric["type"]}')
+
+        for key, value in sorted(metric['samples'].items()):
+            if metric['type'] != 'histogram':
+                lines.append(f'{name}{_labels(names, key)} {value}')
+                continue
+
+            cumulative = 0
+            bounds = [str(bound) for bound in metric['buckets']] + ['+Inf']
+
+            for bound, count in zip(bounds, value['buckets']):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f'{name}_bucket{_labels(names, key, le)} {cumulative}'
+                )
+
+            lines.append(f'{name}_sum{_labels(names, key)} {value["sum"]}')
+            lines.append(
+                f'{name}_count{_labels(names, key)} {value["count"]}'
+            )
+
+    return '\n'.join(lines) + '\n'
+
+
+def collect_pools(app: Flask) -> None:
+    """Обновляет датчики пула соединений и пула HTTP-сессий."""
+
+    from page_analyzer.services.http_client import get_session_pool
+
+    pool_stats = app.connection_pool.stats()
+
+    for state, stat in (('open', 'size'), ('idle', 'idle'),
+                        ('in_use', 'in_use'), ('waiting', 'waiting')):
+        DB_POOL_CONNECTIONS.set(pool_stats[stat], state=state)
+
+    for stat, value in get_session_pool().stats().items():
+        HTTP_POOL.set(value, stat=stat)
+
+
+def collect_caches(app: Flask) -> None:
+    """Переносит счетчики кэша URL и кэша ответов в метрики."""
+
+    caches = {
+        'url': getattr(app.url_repo, 'cache', None),
+        'response': app.response_cache,
+    }
+
+    for cache_name, cache in caches.items():
+        if cache is None:
+            continue
+
+        stats = cache.stats()
+
+        for event in ('hits', 'misses', 'evictions', 'expirations',
+                      'invalidations'):
+            if event in stats:
+                CACHE_EVENTS.set_total(
+                    stats[event], cache=cache_name, event=event
+                )
+
+
+def setup_metrics(app: Flask) -> None:
+    """
+    Подключает метрики к приложению: гистограмму длительности
+    запросов по маршрутам, датчики пула соединений, пула HTTP-сессий
+    и кэшей, а также обработчик /metrics.
+    """
+
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    REGISTRY.add_collector(partial(collect_pools, app))
+    REGISTRY.add_collector(partial(collect_caches, app))
+
+    @app.before_request
+    def start_request_timer():
+        start_flusher()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('request_started', None)
+
+        if started is not None:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'unknown',
+                method=request.method,
+                status=response.status_code
+            )
+
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Метрики всех процессов в текстовом формате Prometheus."""
+
+        write_snapshot()
+
+        return Response(
+            render(aggregate()),
+            mimetype='text/plain; version=0.0.4; charset=utf-8'
+        )
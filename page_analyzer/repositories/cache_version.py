@@ -0,0 +1,149 @@
+import logging
+from typing import Dict, Iterable
+
+from flask import g, has_app_context
+import psycopg2
+
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    db_connection,
+    retry_connection,
+    run_after_commit
+)
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Версия списка URL (страница /urls)
+URLS_VERSION = 'urls'
+
+
+def url_version(url_id: int) -> str:
+    """Имя версии страницы одного URL (/urls/<id>)."""
+
+    return f'url:{url_id}'
+
+
+def bump_versions_cte(names_query: str) -> str:
+    """
+    Возвращает CTE 'versions', увеличивающее версии с именами из
+    подзапроса 'names_query' (один столбец с именами версий).
+
+    CTE добавляется в запрос, изменяющий данные, чтобы версии менялись
+    в той же транзакции и тем же запросом, что и сами данные. Имена
+    обрабатываются по порядку, поэтому одновременные запросы блокируют
+    строки версий в одинаковом порядке и не взаимоблокируются.
+
+    Строка версии заблокирована до коммита транзакции, поэтому CTE
+    подходит только для версий страниц одного URL. Версию, общую для
+    всех записей (URLS_VERSION), увеличивает отдельная короткая
+    транзакция после коммита ('CacheVersionRepository.bump_after_commit').
+    """
+
+    return f"""
+        versions AS (
+            INSERT INTO cache_versions (name, version)
+            SELECT DISTINCT name, 1 FROM ({names_query}) AS names (name)
+            ORDER BY name
+            ON CONFLICT (name) DO UPDATE
+            SET version = cache_versions.version + 1
+        )"""
+
+
+def current_versions() -> Dict[str, int]:
+    """
+    Возвращает версии, прочитанные в текущем запросе ('get_versions').
+
+    Кэш данных ('CachedUrlRepository') добавляет их в свои ключи: после
+    увеличения версии другим процессом страница будет отрисована из
+    новых данных, а не из значений, закэшированных до изменения.
+    """
+
+    if not has_app_context():
+        return {}
+
+    return g.get('cache_versions', {})
+
+
+class CacheVersionRepository:
+    """
+    Репозиторий версий страниц (таблица 'cache_versions').
+
+    Версия увеличивается при каждом изменении данных страницы, а ETag и
+    ключ кэша ответа строятся из версии, поэтому неизменившуюся страницу
+    не нужно ни отрисовывать заново, ни передавать клиенту.
+    """
+
+    def __init__(self, connection_pool: 'ConnectionPool'):
+        """
+        Инициализирует CacheVersionRepository с пулом соединений.
+
+        :param
+            connection_pool: Объект ConnectionPool,
+            который управляет соединениями с базой данных.
+        """
+        self.connection_pool = connection_pool
+
+    @retry_connection()
+    @db_connection()
+    def get_versions(self, cursor, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Возвращает версии с указанными именами. Версии, которые еще
+        ни разу не увеличивались, равны 0.
+        """
+
+        names = list(names)
+
+        query = """
+            SELECT name, version FROM cache_versions
+            WHERE name = ANY(%s)
+        """
+        cursor.execute(query, (names,))
+
+        versions = dict.fromkeys(names, 0)
+        versions.update(cursor.fetchall())
+
+        if has_app_context():
+            g.cache_versions = dict(current_versions(), **versions)
+
+        logger.debug("Функция 'get_versions', версии: %s", versions)
+
+        return versions
+
+    @retry_connection()
+    @db_connection(own_transaction=True)
+    def bump_versions(self, cursor, names: Iterable[str]) -> None:
+        """
+        Увеличивает версии с указанными именами отдельной транзакцией,
+        которая фиксируется сразу (даже внутри единицы работы), поэтому
+        блокировка строк версий держится только на время этого запроса.
+        """
+
+        query = f"""
+            WITH {bump_versions_cte('SELECT unnest(%s::varchar[])')}
+            SELECT 1
+        """
+        cursor.execute(query, (sorted(names),))
+
+        logger.debug("Функция 'bump_versions', версии: %s", names)
+
+    def bump_after_commit(self, *names: str) -> None:
+        """
+        Увеличивает версии после коммита текущей единицы работы (при
+        откате не увеличивает). Ошибка увеличения записывается в лог и
+        не отменяет уже сохраненные изменения: страницы обновятся после
+        следующего изменения версии или истечения срока кэша.
+        """
+
+        def bump():
+            try:
+                self.bump_versions(names)
+            except psycopg2.Error as error:
+                logger.error(
+                    "Класс: 'CacheVersionRepository', метод: "
+                    "'bump_after_commit'. Версии %s не увеличены: '%s'",
+                    names, error
+                )
+
+        run_after_commit(bump)
@@ -0,0 +1,172 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from page_analyzer.db_connections.connection_manager import run_after_commit
+from page_analyzer.repositories.cache_version import (
+    URLS_VERSION,
+    current_versions,
+    url_version
+)
+from page_analyzer.repositories.pagination import Page
+from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.services.cache import MISSING, Cache
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# noqa Теги значений совпадают с именами версий страниц ('cache_versions'):
+# список URL (страницы 'show_urls') и данные одного URL
+URLS_TAG = URLS_VERSION
+url_tag = url_version
+
+
+class CachedUrlRepository:
+    """
+    Кэширующая обертка над 'UrlRepository'.
+
+    Чтения 'find_url', 'find_checks_urll', 'find_daily_checks' и
+    'show_urls' выполняются через кэш (read-through), а 'save_url',
+    'save_checks_url' и 'save_checks_batch' после коммита удаляют из
+    кэша значения затронутых URL и страницы списка URL. Остальные
+    методы вызываются у репозитория напрямую.
+    """
+
+    def __init__(self, url_repo: UrlRepository, cache: Cache):
+        self.url_repo = url_repo
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.url_repo, name)
+
+    def find_url(self, id: int) -> Optional[Dict[str, Any]]:
+
+        return self._cached(
+            f'url:{id}', (url_tag(id),),
+            lambda: self.url_repo.find_url(id)
+        )
+
+    def show_urls(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Page:
+
+        return self._cached(
+            f'urls:{limit}:{after}:{before}', (URLS_TAG,),
+            lambda: self.url_repo.show_urls(
+                limit=limit, after=after, before=before
+            )
+        )
+
+    def find_checks_urll(
+        self,
+        url_id: int,
+        limit: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Page:
+
+        return self._cached(
+            f'checks:{url_id}:{limit}:{after}:{before}', (url_tag(url_id),),
+            lambda: self.url_repo.find_checks_urll(
+                url_id, limit=limit, after=after, before=before
+            )
+        )
+
+    def find_daily_checks(
+        self, url_id: int, limit: int
+    ) -> List[Dict[str, Any]]:
+
+        return self._cached(
+            f'daily:{url_id}:{limit}', (url_tag(url_id),),
+            lambda: self.url_repo.find_daily_checks(url_id, limit=limit)
+        )
+
+    def save_url(self, url_data: str) -> Tuple[bool, Any]:
+
+        exists, url_id = self.url_repo.save_url(url_data)
+
+        if not exists:
+            self._invalidate(URLS_TAG, url_tag(url_id))
+
+        return exists, url_id
+
+    def save_checks_url(self, url_id: int, check: Dict[str, Any]) -> bool:
+
+        saved = self.url_repo.save_checks_url(url_id, check)
+
+        if saved:
+            self._invalidate(URLS_TAG, url_tag(url_id))
+
+        return saved
+
+    def save_checks_batch(self, checks: List[Dict[str, Any]]) -> int:
+
+        saved = self.url_repo.save_checks_batch(checks)
+
+        if saved:
+            self._invalidate(
+                URLS_TAG, *{url_tag(check['url_id']) for check in checks}
+            )
+
+        return saved
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики кэша (попадания, промахи, вытеснения)."""
+
+        return self.cache.stats()
+
+    def _cached(
+        self, key: str, tags: Tuple[str, ...], load: Callable[[], Any]
+    ) -> Any:
+        """
+        Возвращает значение из кэша или загружает и кэширует его.
+
+        Если версии тегов уже прочитаны в текущем запросе, они входят
+        в ключ, и изменение данных в другом процессе сразу дает промах.
+
+        Отсутствие значения (None) не кэшируется: URL, созданный
+        в другом процессе, не инвалидирует кэш этого процесса, и иначе
+        до истечения 'ttl' для него возвращалась бы страница 404.
+        """
+
+        versions = current_versions()
+        key += ''.join(
+            f':{tag}={versions[tag]}' for tag in tags if tag in versions
+        )
+
+        value = self.cache.get(key)
+
+        if value is not MISSING:
+            logger.debug(
+                "Класс: 'CachedUrlRepository', метод: '_cached'. "
+                "Значение '%s' получено из кэша.",
+                key
+            )
+            return value
+
+        value = load()
+
+        if value is not None:
+            self.cache.set(key, value, tags)
+
+        return value
+
+    def _invalidate(self, *tags: str) -> None:
+        """
+        Удаляет значения с тегами из кэша после коммита транзакции,
+        чтобы параллельный запрос не успел вернуть в кэш старые данные.
+        """
+
+        def invalidate():
+            self.cache.invalidate(*tags)
+
+            logger.debug(
+                "Класс: 'CachedUrlRepository', метод: '_invalidate'. "
+                "Инвалидированы теги: %s",
+                tags
+            )
+
+        run_after_commit(invalidate)
@@ -0,0 +1,384 @@
+"""
+История проверок: помесячные секции таблицы 'url_checks', дневная
+сводка 'url_check_daily' и повторный анализ сохраненных проверок.
+
+Таблица 'url_checks' секционирована по 'created_at' (секция
+'url_checks_YYYY_MM' на каждый месяц и секция 'url_checks_default' для
+строк без своей секции). Старые секции удаляются целиком (при
+необходимости с выгрузкой в архив), поэтому очистка истории не
+оставляет в таблице мертвых строк. Сводка за день обновляется тем же
+запросом, что сохраняет проверки, и хранится после удаления секций.
+"""
+from datetime import date
+import gzip
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from psycopg2 import sql
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    db_connection,
+    retry_connection
+)
+from page_analyzer.repositories.cache_version import bump_versions_cte
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Имя месячной секции 'url_checks' (см. 'url_checks_create_partition')
+PARTITION_NAME = re.compile(r'^url_checks_(\d{4})_(\d{2})$')
+
+
+def daily_rollup_cte(source: str) -> str:
+    """
+    Возвращает CTE 'daily', добавляющее проверки из 'source' (CTE или
+    подзапрос со столбцами url_id, status_code, title, created_at)
+    в дневную сводку 'url_check_daily': число проверок, число проверок
+    по кодам ответа, первый и последний title за день.
+    """
+
+    return f"""
+        daily_statuses AS (
+            SELECT url_id, day, jsonb_object_agg(status, checks) AS codes
+            FROM (
+                SELECT url_id, created_at::date AS day,
+                    COALESCE(status_code::text, 'none') AS status,
+                    count(*) AS checks
+                FROM {source}
+                GROUP BY 1, 2, 3
+            ) AS statuses
+            GROUP BY url_id, day
+        ),
+        daily AS (
+            INSERT INTO url_check_daily AS stored (
+                url_id, day, checks_count, status_codes,
+                first_title, last_title, first_check_at, last_check_at
+            )
+            SELECT checks.url_id, checks.day, checks.checks_count,
+                daily_statuses.codes, checks.first_title,
+                checks.last_title, checks.first_check_at,
+                checks.last_check_at
+            FROM (
+                SELECT url_id, created_at::date AS day,
+                    count(*) AS checks_count,
+                    (array_agg(title ORDER BY created_at))[1]
+                        AS first_title,
+                    (array_agg(title ORDER BY created_at DESC))[1]
+                        AS last_title,
+                    min(created_at) AS first_check_at,
+                    max(created_at) AS last_check_at
+                FROM {source}
+                GROUP BY 1, 2
+            ) AS checks
+            JOIN daily_statuses USING (url_id, day)
+            ORDER BY checks.url_id, checks.day
+            ON CONFLICT (url_id, day) DO UPDATE
+            SET checks_count = stored.checks_count + EXCLUDED.checks_count,
+                status_codes = (
+                    SELECT jsonb_object_agg(key, total)
+                    FROM (
+                        SELECT key, sum(value::int) AS total
+                        FROM (
+                            SELECT * FROM jsonb_each_text(stored.status_codes)
+                            UNION ALL
+                            SELECT * FROM jsonb_each_text(
+                                EXCLUDED.status_codes
+                            )
+                        ) AS counts
+                        GROUP BY key
+                    ) AS merged
+                ),
+                first_title = CASE
+                    WHEN EXCLUDED.first_check_at < stored.first_check_at
+                    THEN EXCLUDED.first_title ELSE stored.first_title
+                END,
+                last_title = CASE
+                    WHEN EXCLUDED.last_check_at >= stored.last_check_at
+                    THEN EXCLUDED.last_title ELSE stored.last_title
+                END,
+                first_check_at = LEAST(
+                    stored.first_check_at, EXCLUDED.first_check_at
+                ),
+                last_check_at = GREATEST(
+                    stored.last_check_at, EXCLUDED.last_check_at
+                )
+        )"""
+
+
+def add_months(day: date, months: int) -> date:
+    """Первое число месяца, отстоящего от месяца 'day' на 'months'."""
+
+    index = day.year * 12 + day.month - 1 + months
+
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Строка пакетного обновления полей проверки ('update_check_fields')
+CHECK_FIELDS_TEMPLATE = (
+    '(%(id)s::int, %(created_at)s::timestamp, %(h1)s::varchar, '
+    '%(title)s::varchar, %(description)s::varchar, %(content_hash)s::bytea, '
+    '%(seo_metrics)s::jsonb)'
+)
+
+
+class CheckHistoryRepository:
+    """
+    Репозиторий истории проверок: создание секций таблицы 'url_checks'
+    на будущие месяцы, удаление (с архивированием) старых и обновление
+    полей проверок при повторном анализе снимков страниц.
+    """
+
+    def __init__(self, connection_pool: 'ConnectionPool'):
+        """
+        Инициализирует CheckHistoryRepository с пулом соединений.
+
+        :param
+            connection_pool: Объект ConnectionPool,
+            который управляет соединениями с базой данных.
+        """
+        self.connection_pool = connection_pool
+
+    @retry_connection()
+    @db_connection()
+    def create_partition(self, cursor, month: date) -> str:
+        """
+        Создает секцию 'url_checks' для месяца 'month', если ее еще нет
+        (строки этого месяца из секции по умолчанию переносятся в нее).
+
+        Returns:
+            Имя секции.
+        """
+
+        cursor.execute('SELECT url_checks_create_partition(%s)', (month,))
+
+        return cursor.fetchone()[0]
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_partitions(self, cursor) -> List[Dict[str, Any]]:
+        """
+        Возвращает месячные секции 'url_checks' по возрастанию месяца:
+        имя ('name'), первый день месяца ('month') и примерное число
+        строк ('rows', по статистике планировщика).
+        """
+
+        query = """
+            SELECT child.relname AS name, child.reltuples::bigint AS rows
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'url_checks'::regclass
+        """
+        cursor.execute(query)
+
+        partitions = []
+
+        for row in cursor.fetchall():
+            match = PARTITION_NAME.match(row['name'])
+
+            if match:
+                year, month = map(int, match.groups())
+                partitions.append(dict(row, month=date(year, month, 1)))
+
+        return sorted(partitions, key=lambda partition: partition['month'])
+
+    @retry_connection()
+    @db_connection()
+    def drop_partition(
+        self, cursor, name: str, archive_dir: Optional[str] = None,
+        keep_since: Optional[date] = None
+    ) -> Optional[str]:
+        """
+        Удаляет месячную секцию 'url_checks'. Если задан 'archive_dir',
+        строки секции предварительно выгружаются в файл
+        '<archive_dir>/<name>.csv.gz'. Версии страниц URL, проверки
+        которых удалены, увеличиваются (см. 'bump_versions_cte').
+
+        Если задан 'keep_since', проверки, повторявшиеся после этой даты
+        ('last_seen_at'), не удаляются: строка свернутой серии хранит
+        время первой проверки в 'created_at' и может оставаться последней
+        проверкой URL. Такие строки переносятся из секции (в архив они
+        тоже попадают): 'created_at' становится равным 'keep_since', то
+        есть серия укорачивается до срока хранения, а порядок проверок
+        URL не меняется.
+
+        Returns:
+            Путь к файлу архива или None.
+        """
+
+        match = PARTITION_NAME.match(name)
+
+        if not match:
+            raise ValueError(f"'{name}' не является месячной секцией")
+
+        partition = sql.Identifier(name)
+        archive_path = None
+
+        if archive_dir:
+            archive_path = self._archive(cursor, partition, name, archive_dir)
+
+        versions = bump_versions_cte(
+            "SELECT DISTINCT 'url:' || url_id FROM {partition}"
+        )
+        cursor.execute(
+            sql.SQL(f'WITH {versions} SELECT 1').format(partition=partition)
+        )
+
+        moved = 0
+
+        if keep_since:
+            month = date(*map(int, match.groups()), 1)
+            moved = self._move_live_runs(cursor, month, keep_since)
+
+        cursor.execute(
+            sql.SQL('DROP TABLE {partition}').format(partition=partition)
+        )
+
+        logger.info(
+            "Функция 'drop_partition', секция '%s' удалена, архив: %s, "
+            "перенесено проверок: %s",
+            name, archive_path, moved
+        )
+
+        return archive_path
+
+    @staticmethod
+    def _move_live_runs(cursor, month: date, keep_since: date) -> int:
+        """
+        Переносит проверки секции месяца 'month', повторявшиеся после
+        'keep_since', в секцию 'keep_since': изменение 'created_at'
+        через родительскую таблицу перемещает строку между секциями.
+
+        Returns:
+            Количество перенесенных проверок.
+        """
+
+        query = """
+            UPDATE url_checks
+            SET created_at = %(keep_since)s
+            WHERE created_at >= %(month)s
+                AND created_at < %(month)s::date + INTERVAL '1 month'
+                AND last_seen_at >= %(keep_since)s
+        """
+        cursor.execute(query, {'month': month, 'keep_since': keep_since})
+
+        return cursor.rowcount
+
+    @staticmethod
+    def _archive(
+        cursor, partition: sql.Identifier, name: str, archive_dir: str
+    ) -> str:
+        """
+        Выгружает строки секции в gzip-файл CSV. Файл записывается под
+        временным именем и переименовывается после полной выгрузки.
+        """
+
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f'{name}.csv.gz')
+
+        query = sql.SQL(
+            'COPY (SELECT * FROM {partition} ORDER BY created_at, id) '
+            'TO STDOUT WITH (FORMAT csv, HEADER)'
+        ).format(partition=partition)
+
+        with gzip.open(f'{path}.tmp', 'wb') as archive:
+            cursor.copy_expert(query.as_string(cursor.connection), archive)
+
+        os.replace(f'{path}.tmp', path)
+
+        return path
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_snapshot_checks(
+        self, cursor, after_id: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает до 'limit' проверок со снимком страницы
+        ('snapshot_hash') с id больше 'after_id' по возрастанию id
+        вместе с адресом проверенного URL ('url').
+        """
+
+        query = """
+            SELECT url_checks.id, url_checks.created_at,
+                url_checks.status_code, url_checks.snapshot_hash,
+                urls.name AS url
+            FROM url_checks
+            JOIN urls ON urls.id = url_checks.url_id
+            WHERE url_checks.id > %s AND url_checks.snapshot_hash IS NOT NULL
+            ORDER BY url_checks.id
+            LIMIT %s
+        """
+        cursor.execute(query, (after_id, limit))
+
+        return cursor.fetchall()
+
+    @retry_connection()
+    @db_connection()
+    def update_check_fields(self, cursor, rows: List[Dict[str, Any]]) -> int:
+        """
+        Обновляет h1, title, description, 'content_hash' и метрики SEO
+        проверок одним запросом UPDATE ... FROM (VALUES ...). Строки
+        ищутся по паре (id, created_at), чтобы запрос обращался только
+        к их секциям; неизменившиеся строки не перезаписываются. Версии
+        страниц затронутых URL увеличиваются.
+
+        Params:
+            rows: Словари с ключами id, created_at, h1, title,
+                description, content_hash, seo_metrics (None - метрики
+                проверки не меняются).
+
+        Returns:
+            Количество измененных проверок.
+        """
+
+        if not rows:
+            return 0
+
+        query = f"""
+            WITH updated AS (
+                UPDATE url_checks
+                SET h1 = fields.h1,
+                    title = fields.title,
+                    description = fields.description,
+                    content_hash = fields.content_hash,
+                    seo_metrics = COALESCE(
+                        fields.seo_metrics, url_checks.seo_metrics
+                    )
+                FROM (VALUES %s) AS fields (
+                    id, created_at, h1, title, description, content_hash,
+                    seo_metrics
+                )
+                WHERE url_checks.id = fields.id
+                    AND url_checks.created_at = fields.created_at
+                    AND (url_checks.h1, url_checks.title,
+                         url_checks.description, url_checks.seo_metrics)
+                        IS DISTINCT FROM
+                        (fields.h1, fields.title, fields.description,
+                         COALESCE(fields.seo_metrics, url_checks.seo_metrics))
+                RETURNING url_checks.url_id
+            ),
+            {bump_versions_cte("SELECT 'url:' || url_id FROM updated")}
+            SELECT count(*) FROM updated
+        """
+
+        rows = [
+            dict(row, seo_metrics=(
+                Json(row['seo_metrics'])
+                if row.get('seo_metrics') is not None else None
+            ))
+            for row in rows
+        ]
+
+        result = execute_values(
+            cursor, query, rows,
+            template=CHECK_FIELDS_TEMPLATE,
+            page_size=len(rows),
+            fetch=True
+        )
+
+        return result[0][0]
@@ -0,0 +1,249 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    db_connection,
+    retry_connection
+)
+from page_analyzer.repositories.cache_version import bump_versions_cte
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# noqa Состояние заданий выводится на странице URL, поэтому изменение задания
+# увеличивает версию этой страницы (см. 'CacheVersionRepository')
+JOB_VERSIONS = bump_versions_cte("SELECT 'url:' || url_id FROM job")
+
+
+class CheckJobRepository:
+    """
+    Репозиторий очереди фоновых проверок URL (таблица 'check_jobs').
+
+    Задания ставятся в очередь обработчиком запроса и выбираются
+    воркерами с помощью 'SELECT ... FOR UPDATE SKIP LOCKED', поэтому
+    несколько воркеров никогда не получат одно и то же задание.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, connection_pool: 'ConnectionPool'):
+        """
+        Инициализирует CheckJobRepository с пулом соединений.
+
+        :param
+            connection_pool: Объект ConnectionPool,
+            который управляет соединениями с базой данных.
+        """
+        self.connection_pool = connection_pool
+
+    @retry_connection()
+    @db_connection()
+    def enqueue(self, cursor, url_id: int) -> Tuple[bool, int]:
+        """
+        Ставит проверку URL в очередь.
+
+        Если для URL уже есть ожидающее или выполняющееся задание,
+        новое задание не создается.
+
+        Returns:
+            Кортеж, где первый элемент - булево значение, указывающее,
+            было ли создано новое задание, второй - идентификатор задания.
+        """
+
+        query = f"""
+            WITH job AS (
+                INSERT INTO check_jobs (url_id, status, created_at)
+                VALUES (%s, %s, NOW())
+                ON CONFLICT (url_id) WHERE status IN ('pending', 'running')
+                DO NOTHING
+                RETURNING id, url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT id FROM job
+        """
+        cursor.execute(query, (url_id, self.PENDING))
+
+        row = cursor.fetchone()
+
+        if row:
+            logger.info(
+                "Функция 'enqueue', задание %s для URL с 'id'=%s "
+                "поставлено в очередь.",
+                row[0], url_id
+            )
+            return True, row[0]
+
+        query = """
+            SELECT id FROM check_jobs
+            WHERE url_id = %s AND status IN ('pending', 'running')
+            LIMIT 1
+        """
+        cursor.execute(query, (url_id,))
+
+        row = cursor.fetchone()
+
+        logger.info(
+            "Функция 'enqueue', для URL с 'id'=%s уже есть активное "
+            "задание: %s",
+            url_id, row
+        )
+
+        return False, row[0] if row else None
+
+    @retry_connection()
+    @db_connection()
+    def enqueue_all(self, cursor) -> int:
+        """
+        Ставит в очередь проверки всех сохраненных URL одним запросом
+        (для URL, у которых уже есть ожидающее или выполняющееся
+        задание, новое не создается).
+
+        Returns:
+            Количество созданных заданий.
+        """
+
+        query = f"""
+            WITH job AS (
+                INSERT INTO check_jobs (url_id, status, created_at)
+                SELECT id, %s, NOW() FROM urls ORDER BY id
+                ON CONFLICT (url_id) WHERE status IN ('pending', 'running')
+                DO NOTHING
+                RETURNING id, url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT count(*) FROM job
+        """
+        cursor.execute(query, (self.PENDING,))
+
+        created = cursor.fetchone()[0]
+
+        logger.info(
+            "Функция 'enqueue_all', поставлено в очередь заданий: %s",
+            created
+        )
+
+        return created
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def claim_job(self, cursor) -> Optional[Dict[str, Any]]:
+        """
+        Забирает из очереди самое старое ожидающее задание и переводит
+        его в состояние 'running'.
+
+        Задания, заблокированные другими воркерами, пропускаются.
+        Возвращает None, если очередь пуста.
+        """
+
+        query = f"""
+            WITH job AS (
+                UPDATE check_jobs
+                SET status = %s, started_at = NOW()
+                WHERE id = (
+                    SELECT id FROM check_jobs
+                    WHERE status = %s
+                    ORDER BY created_at, id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT id, url_id FROM job
+        """
+        cursor.execute(query, (self.RUNNING, self.PENDING))
+
+        result = cursor.fetchone()
+
+        if result:
+            logger.info("Функция 'claim_job', получено задание: %s", result)
+
+        return result
+
+    @retry_connection()
+    @db_connection()
+    def finish_job(
+        self, cursor, job_id: int, status: str, message: str
+    ) -> None:
+        """
+        Завершает задание, сохраняя его итоговое состояние и сообщение.
+        """
+
+        query = f"""
+            WITH job AS (
+                UPDATE check_jobs
+                SET status = %s, message = %s, finished_at = NOW()
+                WHERE id = %s
+                RETURNING url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT url_id FROM job
+        """
+        cursor.execute(query, (status, message[:255], job_id))
+
+        logger.info(
+            "Функция 'finish_job', задание %s завершено со статусом "
+            "'%s': %s",
+            job_id, status, message
+        )
+
+    @retry_connection()
+    @db_connection()
+    def requeue_stale_jobs(self, cursor, timeout: int) -> int:
+        """
+        Возвращает в очередь задания, которые выполняются дольше
+        'timeout' секунд (например, если воркер аварийно завершился).
+
+        Returns:
+            Количество возвращенных в очередь заданий.
+        """
+
+        query = f"""
+            WITH job AS (
+                UPDATE check_jobs
+                SET status = %s, started_at = NULL
+                WHERE status = %s
+                    AND started_at < NOW() - make_interval(secs => %s)
+                RETURNING url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT url_id FROM job
+        """
+        cursor.execute(query, (self.PENDING, self.RUNNING, timeout))
+
+        if cursor.rowcount:
+            logger.warning(
+                "Функция 'requeue_stale_jobs', возвращено в очередь "
+                "зависших заданий: %s",
+                cursor.rowcount
+            )
+
+        return cursor.rowcount
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_jobs_url(
+        self, cursor, url_id: int, limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает последние задания на проверку указанного URL,
+        отсортированные по времени постановки в очередь в порядке убывания.
+        """
+
+        query = """
+            SELECT id, status, message, created_at, started_at, finished_at
+            FROM check_jobs
+            WHERE url_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+        """
+        cursor.execute(query, (url_id, limit))
+
+        return cursor.fetchall()
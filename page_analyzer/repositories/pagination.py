@@ -0,0 +1,141 @@
+from datetime import datetime
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Разделитель времени и идентификатора в курсоре страницы
+CURSOR_SEPARATOR = '~'
+
+
+class Page:
+    """
+    Страница результатов keyset-пагинации.
+
+    Attributes:
+        items: Строки текущей страницы.
+        next_cursor: Курсор следующей (более старой) страницы или None.
+        prev_cursor: Курсор предыдущей (более новой) страницы или None.
+    """
+
+    def __init__(
+        self, items: List[Dict[str, Any]],
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None
+    ):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Кодирует позицию строки (created_at, id) в курсор для URL."""
+
+    return f'{created_at.isoformat()}{CURSOR_SEPARATOR}{id}'
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Декодирует курсор страницы в пару (created_at, id).
+
+    Raises:
+        ValueError: Если курсор некорректен.
+    """
+
+    created_at, separator, id = cursor.rpartition(CURSOR_SEPARATOR)
+
+    if not separator:
+        raise ValueError(f"Некорректный курсор страницы: '{cursor}'")
+
+    return datetime.fromisoformat(created_at), int(id)
+
+
+def clamp_page_size(
+    per_page: Optional[int], default: int, maximum: int
+) -> int:
+    """Ограничивает запрошенный размер страницы диапазоном [1, maximum]."""
+
+    if not per_page:
+        return default
+
+    return max(1, min(per_page, maximum))
+
+
+def fetch_page(
+    cursor,
+    query: str,
+    params: Sequence[Any],
+    sort_columns: Tuple[str, str],
+    cursor_keys: Tuple[str, str],
+    limit: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None
+) -> Page:
+    """
+    Выполняет запрос с keyset-пагинацией по паре (created_at, id)
+    в порядке убывания.
+
+    Вместо OFFSET страница выбирается условием на позицию последней
+    (или первой) строки соседней страницы, поэтому время запроса не
+    зависит от номера страницы, а в память читается не больше
+    'limit + 1' строк.
+
+    Params:
+        query: SQL-запрос с подстановками '{where}' (условие пагинации)
+            и '{order}' (сортировка); последний параметр - LIMIT.
+        params: Параметры запроса без условия пагинации и LIMIT.
+        sort_columns: Столбцы сортировки в SQL (время, идентификатор).
+            Если в списке выборки есть псевдоним с тем же именем,
+            столбцы указываются с именем таблицы: они используются и
+            в WHERE, и в ORDER BY, где имя без таблицы означает
+            псевдоним.
+        cursor_keys: Ключи этих столбцов в строках результата.
+        limit: Размер страницы.
+        after: Курсор - выбрать строки старше этой позиции.
+        before: Курсор - выбрать строки новее этой позиции.
+    """
+
+    columns = f"({', '.join(sort_columns)})"
+    conditions = 'TRUE'
+    args = list(params)
+    direction = 'DESC'
+
+    if after:
+        conditions = f'{columns} < (%s, %s)'
+        args.extend(decode_cursor(after))
+    elif before:
+        conditions = f'{columns} > (%s, %s)'
+        args.extend(decode_cursor(before))
+        direction = 'ASC'  # Ближайшие более новые строки
+
+    order = ', '.join(f'{column} {direction}' for column in sort_columns)
+    args.append(limit + 1)  # Лишняя строка показывает, есть ли еще данные
+
+    cursor.execute(query.format(where=conditions, order=order), args)
+
+    rows = cursor.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if before:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+
+    def position(row: Dict[str, Any]) -> str:
+        return encode_cursor(row[cursor_keys[0]], row[cursor_keys[1]])
+
+    return Page(
+        rows,
+        next_cursor=position(rows[-1]) if rows and has_next else None,
+        prev_cursor=position(rows[0]) if rows and has_prev else None
+    )
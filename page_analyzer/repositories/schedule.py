@@ -0,0 +1,168 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from psycopg2.extras import RealDictCursor
+
+from page_analyzer.config import Config
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    db_connection,
+    retry_connection
+)
+from page_analyzer.repositories.check_job import JOB_VERSIONS
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+def next_check_sql(start: str) -> str:
+    """
+    Возвращает SQL-выражение времени следующей проверки URL (строки
+    'urls'): 'start' плюс интервал URL (или интервал по умолчанию),
+    случайно измененный на долю до SCHEDULER_JITTER, чтобы проверки
+    URL, добавленных одновременно, со временем распределялись.
+    """
+
+    default_interval = int(Config.SCHEDULER_DEFAULT_INTERVAL)
+    jitter = float(Config.SCHEDULER_JITTER)
+
+    return (
+        f"{start} + COALESCE(urls.check_interval, "
+        f"make_interval(secs => {default_interval})) "
+        f"* (1 + {jitter} * (2 * random() - 1))"
+    )
+
+
+class ScheduleRepository:
+    """
+    Репозиторий расписания повторных проверок (столбцы 'check_interval'
+    и 'next_check_at' таблицы 'urls').
+
+    Планировщик выбирает URL, время проверки которых наступило, и в той
+    же транзакции ставит их в очередь 'check_jobs' или переносит на
+    более позднее время (ограничение частоты запросов к хосту).
+    """
+
+    def __init__(self, connection_pool: 'ConnectionPool'):
+        """
+        Инициализирует ScheduleRepository с пулом соединений.
+
+        :param
+            connection_pool: Объект ConnectionPool,
+            который управляет соединениями с базой данных.
+        """
+        self.connection_pool = connection_pool
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def claim_due_urls(self, cursor, limit: int) -> List[Dict[str, Any]]:
+        """
+        Возвращает до 'limit' URL, время проверки которых наступило,
+        начиная с самых просроченных, и текущее время базы данных.
+
+        Строки блокируются до конца транзакции ('FOR UPDATE SKIP LOCKED'),
+        поэтому несколько планировщиков не выберут один и тот же URL.
+        Вызывается внутри 'unit_of_work' вместе с 'schedule'.
+        """
+
+        query = """
+            SELECT id, name, next_check_at, NOW()::timestamp AS now
+            FROM urls
+            WHERE next_check_at <= NOW()
+            ORDER BY next_check_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """
+        cursor.execute(query, (limit,))
+
+        return cursor.fetchall()
+
+    @retry_connection()
+    @db_connection()
+    def schedule(
+        self,
+        cursor,
+        enqueue_ids: List[int],
+        postponed: Dict[int, datetime]
+    ) -> int:
+        """
+        Ставит в очередь проверки URL из 'enqueue_ids' и назначает им
+        время следующей проверки, а URL из 'postponed' переносит
+        на указанное время.
+
+        Returns:
+            Количество созданных заданий (для URL, у которых уже есть
+            активное задание, новое не создается).
+        """
+
+        query = f"""
+            WITH enqueued AS (
+                UPDATE urls
+                SET next_check_at = {next_check_sql('NOW()')}
+                WHERE id = ANY(%s)
+                RETURNING id
+            ),
+            postponed AS (
+                UPDATE urls
+                SET next_check_at = planned.next_check_at
+                FROM unnest(%s::bigint[], %s::timestamp[])
+                    AS planned (id, next_check_at)
+                WHERE urls.id = planned.id
+            ),
+            job AS (
+                INSERT INTO check_jobs (url_id, status, created_at)
+                SELECT id, 'pending', NOW() FROM enqueued
+                ON CONFLICT (url_id) WHERE status IN ('pending', 'running')
+                DO NOTHING
+                RETURNING id, url_id
+            ),
+            {JOB_VERSIONS}
+            SELECT count(*) FROM job
+        """
+        cursor.execute(
+            query,
+            (enqueue_ids, list(postponed), list(postponed.values()))
+        )
+
+        created = cursor.fetchone()[0]
+
+        logger.debug(
+            "Функция 'schedule', поставлено в очередь: %s (создано "
+            "заданий: %s), перенесено: %s",
+            len(enqueue_ids), created, len(postponed)
+        )
+
+        return created
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def backlog(self, cursor) -> Dict[str, Any]:
+        """
+        Возвращает отставание расписания и очереди:
+        число просроченных URL и насколько просрочен самый старый из них
+        (в секундах), число ожидающих заданий и возраст самого старого.
+        """
+
+        query = """
+            SELECT
+                due.count AS due_urls,
+                COALESCE(
+                    EXTRACT(EPOCH FROM NOW() - due.oldest), 0
+                )::float AS schedule_lag,
+                pending.count AS pending_jobs,
+                COALESCE(
+                    EXTRACT(EPOCH FROM NOW() - pending.oldest), 0
+                )::float AS queue_lag
+            FROM (
+                SELECT count(*), min(next_check_at) AS oldest
+                FROM urls WHERE next_check_at <= NOW()
+            ) AS due, (
+                SELECT count(*), min(created_at) AS oldest
+                FROM check_jobs WHERE status = 'pending'
+            ) AS pending
+        """
+        cursor.execute(query)
+
+        return cursor.fetchone()
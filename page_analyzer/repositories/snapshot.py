@@ -0,0 +1,120 @@
+import logging
+from typing import Any, Dict, Optional
+
+from psycopg2.extras import RealDictCursor
+
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    db_connection,
+    retry_connection
+)
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRepository:
+    """
+    Репозиторий снимков страниц (таблица 'page_snapshots').
+
+    Снимок хранится сжатым под хешем исходного содержимого. Время
+    'last_used_at' обновляется при каждом сохранении и чтении снимка,
+    и при превышении общего размера удаляются снимки, которые дольше
+    всех не использовались.
+    """
+
+    def __init__(self, connection_pool: 'ConnectionPool'):
+        """
+        Инициализирует SnapshotRepository с пулом соединений.
+
+        :param
+            connection_pool: Объект ConnectionPool,
+            который управляет соединениями с базой данных.
+        """
+        self.connection_pool = connection_pool
+
+    @retry_connection()
+    @db_connection()
+    def save_snapshot(
+        self, cursor, hash: str, codec: str, size: int, data: bytes
+    ) -> bool:
+        """
+        Сохраняет снимок. Если снимок с таким хешем уже есть, только
+        обновляет время его использования.
+
+        Returns:
+            True, если снимок добавлен, False, если он уже был сохранен.
+        """
+
+        query = """
+            INSERT INTO page_snapshots (hash, codec, size, stored_size, data)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (hash) DO UPDATE SET last_used_at = NOW()
+            RETURNING (xmax = 0) AS inserted
+        """
+        cursor.execute(query, (hash, codec, size, len(data), data))
+
+        return cursor.fetchone()[0]
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_snapshot(
+        self, cursor, hash: str, touch: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает кодек ('codec') и сжатое содержимое ('data') снимка
+        или None, если снимок не сохранен или уже удален. При 'touch'
+        обновляет время использования снимка.
+        """
+
+        if touch:
+            query = """
+                UPDATE page_snapshots SET last_used_at = NOW()
+                WHERE hash = %s
+                RETURNING codec, data
+            """
+        else:
+            query = "SELECT codec, data FROM page_snapshots WHERE hash = %s"
+
+        cursor.execute(query, (hash,))
+
+        result = cursor.fetchone()
+
+        if result is None:
+            return None
+
+        return dict(result, data=bytes(result['data']))
+
+    @retry_connection()
+    @db_connection()
+    def evict_snapshots(self, cursor, max_bytes: int) -> int:
+        """
+        Удаляет давно не использовавшиеся снимки, пока общий размер
+        сжатых снимков больше 'max_bytes'.
+
+        Returns:
+            Количество удаленных снимков.
+        """
+
+        query = """
+            DELETE FROM page_snapshots
+            WHERE hash IN (
+                SELECT hash
+                FROM (
+                    SELECT hash, sum(stored_size) OVER (
+                        ORDER BY last_used_at DESC, hash
+                    ) AS kept_size
+                    FROM page_snapshots
+                ) AS ranked
+                WHERE kept_size > %s
+            )
+        """
+        cursor.execute(query, (max_bytes,))
+
+        logger.debug(
+            "Функция 'evict_snapshots', удалено снимков: %s",
+            cursor.rowcount
+        )
+
+        return cursor.rowcount
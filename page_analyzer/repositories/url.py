@@ -1,20 +1,200 @@
 from datetime import datetime
+import hashlib
 import logging
 from typing import Any, List, Optional, Dict, Tuple
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import Json, RealDictCursor, execute_values
 
 from page_analyzer.db_connections.connection_manager import (
     ConnectionPool,
     db_connection,
+    is_transient,
     retry_connection
 )
+from page_analyzer.repositories.cache_version import (
+    URLS_VERSION,
+    CacheVersionRepository,
+    bump_versions_cte
+)
+from page_analyzer.repositories.check_history import daily_rollup_cte
+from page_analyzer.repositories.pagination import Page, fetch_page
+from page_analyzer.repositories.schedule import next_check_sql
 
 
 # Получение логгера с именем текущего модуля для записи логов
 logger = logging.getLogger(__name__)
 
+# Столбцы таблицы 'url_checks', заполняемые при сохранении проверки,
+# и их типы (значения передаются списком VALUES, тип которого иначе
+# определялся бы по первой строке)
+CHECK_COLUMNS = {
+    'url_id': 'bigint',
+    'status_code': 'int',
+    'h1': 'varchar',
+    'title': 'varchar',
+    'description': 'varchar',
+    'bytes_read': 'int',
+    'etag': 'varchar',
+    'last_modified': 'varchar',
+    'conditional_hit': 'boolean',
+    'created_at': 'timestamp',
+    'content_hash': 'bytea',
+    'snapshot_hash': 'varchar',
+    'seo_metrics': 'jsonb',
+}
+CHECK_VALUES = ', '.join(
+    f'%({column})s::{type_}' for column, type_ in CHECK_COLUMNS.items()
+)
+
+# Поля проверки, по которым она сравнивается с предыдущей
+CONTENT_FIELDS = ('status_code', 'h1', 'title', 'description')
+
+# Версии страниц URL, затронутых сохраненными проверками. Версия списка
+# URL (URLS_VERSION) общая для всех проверок и увеличивается отдельной
+# транзакцией после коммита ('CacheVersionRepository.bump_after_commit'),
+# чтобы сохранения проверок не ждали друг друга на ее строке.
+SAVE_CHECKS_VERSIONS = bump_versions_cte("SELECT 'url:' || url_id FROM saved")
+
+# Сохранение проверок вместе с обновлением сводки о последней проверке
+# в таблице urls и версий страниц URL (одним запросом, в той же
+# транзакции).
+# Если результат проверки (CONTENT_FIELDS) совпадает с последней
+# проверкой URL, новая строка не вставляется: у последней обновляются
+# время 'last_seen_at', счетчик 'seen_count', валидаторы ответа, снимок
+# и метрики SEO. Ответ 304 (результаты взяты из последней проверки, поэтому
+# всегда совпадают с ней) учитывается в счетчике 'conditional_hits' и не
+# заменяет число прочитанных байт 'bytes_read' нулем.
+# Проверка учитывается и в дневной сводке 'url_check_daily'. Строка
+# последней проверки обновляется с условием на 'created_at', чтобы
+# запрос обращался только к ее секции.
+# Следующая плановая проверка отсчитывается от сохраненной (в том числе
+# запущенной вручную).
+SAVE_CHECKS_QUERY = f"""
+    WITH new_checks ({', '.join(CHECK_COLUMNS)}) AS (
+        VALUES {{values}}
+    ),
+    repeated AS (
+        SELECT new_checks.*, last_check.id AS check_id,
+            last_check.created_at AS check_created_at
+        FROM new_checks
+        CROSS JOIN LATERAL (
+            SELECT id, content_hash, created_at
+            FROM url_checks
+            WHERE url_checks.url_id = new_checks.url_id
+            ORDER BY url_checks.created_at DESC, url_checks.id DESC
+            LIMIT 1
+        ) AS last_check
+        WHERE last_check.content_hash = new_checks.content_hash
+    ),
+    bumped AS (
+        UPDATE url_checks
+        SET last_seen_at = repeated.created_at,
+            seen_count = url_checks.seen_count + 1,
+            conditional_hits =
+                url_checks.conditional_hits + repeated.conditional_hit::int,
+            bytes_read = CASE
+                WHEN repeated.conditional_hit THEN url_checks.bytes_read
+                ELSE repeated.bytes_read
+            END,
+            etag = repeated.etag,
+            last_modified = repeated.last_modified,
+            snapshot_hash = COALESCE(
+                repeated.snapshot_hash, url_checks.snapshot_hash
+            ),
+            seo_metrics = COALESCE(
+                repeated.seo_metrics, url_checks.seo_metrics
+            )
+        FROM repeated
+        WHERE url_checks.id = repeated.check_id
+            AND url_checks.created_at = repeated.check_created_at
+        RETURNING repeated.url_id, repeated.status_code, repeated.title,
+            repeated.created_at
+    ),
+    inserted AS (
+        INSERT INTO url_checks (
+            {', '.join(CHECK_COLUMNS)}, last_seen_at, conditional_hits
+        )
+        SELECT new_checks.*, new_checks.created_at,
+            new_checks.conditional_hit::int
+        FROM new_checks
+        WHERE new_checks.url_id NOT IN (SELECT url_id FROM repeated)
+        RETURNING url_id, status_code, title, created_at
+    ),
+    saved AS (
+        SELECT * FROM bumped
+        UNION ALL
+        SELECT * FROM inserted
+    ),
+    {daily_rollup_cte('saved')},
+    {SAVE_CHECKS_VERSIONS}
+    UPDATE urls
+    SET last_check_at = saved.created_at,
+        last_status_code = saved.status_code,
+        next_check_at = {next_check_sql('saved.created_at')}
+    FROM saved
+    WHERE urls.id = saved.url_id
+        AND (
+            urls.last_check_at IS NULL
+            OR urls.last_check_at <= saved.created_at
+        )
+"""
+
+
+# Страница списка URL ('show_urls'). Статус и время последней проверки
+# хранятся в самой таблице urls и обновляются при сохранении проверок
+# (см. 'save_checks_url'). Время последней проверки выводится под именем
+# created_at, поэтому столбцы сортировки указаны с именем таблицы:
+# в ORDER BY имя без таблицы означало бы псевдоним, и условие пагинации
+# (WHERE) и сортировка использовали бы разные столбцы.
+URLS_PAGE_QUERY = """
+    SELECT
+        urls.id,
+        urls.name,
+        urls.last_status_code AS status_code,
+        urls.last_check_at AS created_at,
+        urls.created_at AS url_created_at
+    FROM
+        urls
+    WHERE
+        {where}
+    ORDER BY
+        {order}
+    LIMIT %s;
+"""
+URLS_PAGE_SORT_COLUMNS = ('urls.created_at', 'urls.id')
+
+
+def content_hash(check: Dict[str, Any]) -> bytes:
+    """
+    Возвращает хеш результата проверки: MD5 (16 байт) полей
+    CONTENT_FIELDS, разделенных символом 0x1F (пустое значение - пустая
+    строка). То же выражение используется в миграции 'database.sql'.
+    """
+
+    content = '\x1f'.join(
+        '' if check.get(field) is None else str(check[field])
+        for field in CONTENT_FIELDS
+    )
+
+    return hashlib.md5(content.encode('utf-8')).digest()
+
+
+def check_row(check: Dict[str, Any], **values: Any) -> Dict[str, Any]:
+    """
+    Возвращает параметры строки проверки для SAVE_CHECKS_QUERY:
+    результаты проверки с дополнительными значениями 'values',
+    хешем результата и метриками SEO, обернутыми для JSONB.
+    """
+
+    row = dict(check, **values)
+    row['content_hash'] = content_hash(row)
+
+    if row.get('seo_metrics') is not None:
+        row['seo_metrics'] = Json(row['seo_metrics'])
+
+    return row
+
 
 class UrlRepository:
     def __init__(self, connection_pool: 'ConnectionPool'):
@@ -26,6 +206,7 @@ class UrlRepository:
             который управляет соединениями с базой данных.
         """
         self.connection_pool = connection_pool
+        self.cache_versions = CacheVersionRepository(connection_pool)
 
     @retry_connection()
     @db_connection(cursor_factory=RealDictCursor)
@@ -46,85 +227,90 @@ class UrlRepository:
 
     @retry_connection()
     @db_connection(cursor_factory=RealDictCursor)
-    def show_urls(self, cursor) -> Optional[List[Dict[str, Any]]]:
+    def show_urls(
+        self, cursor,
+        limit: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Page:
         """
-        Извлекает все URL-адреса из базы данных вместе
+        Извлекает страницу URL-адресов из базы данных вместе
         с их статусами и метками времени последних проверок.
-        """
 
-        query = """
-            SELECT
-                urls.id,
-                urls.name,
-                url_checks.status_code,
-                url_checks.created_at,
-                urls.created_at AS url_created_at
-            FROM
-                urls
-            LEFT JOIN
-                url_checks ON urls.id = url_checks.url_id
-                AND url_checks.created_at = (
-                    SELECT MAX(created_at)
-                    FROM url_checks
-                    WHERE urls.id = url_checks.url_id
-                )
-            ORDER BY
-                urls.created_at DESC;
+        URL отсортированы по времени добавления в порядке убывания,
+        страница выбирается по курсору (см. 'fetch_page').
         """
-        cursor.execute(query)
 
-        result = cursor.fetchall()
+        result = fetch_page(
+            cursor, URLS_PAGE_QUERY, (),
+            sort_columns=URLS_PAGE_SORT_COLUMNS,
+            cursor_keys=('url_created_at', 'id'),
+            limit=limit, after=after, before=before
+        )
 
-        if result:
+        if result.items:
             logger.debug(
-                "Функция 'show_urls' получены данные %s", result
+                "Функция 'show_urls' получено строк: %s", len(result)
             )
         else:
             logger.warning(
                 "Функция 'show_urls', данные не найдены! "
-                "result = %s", result
+                "after = %s, before = %s", after, before
             )
 
         return result
 
-    @retry_connection()
-    @db_connection()
-    def save_url(self, cursor, url_data: str) -> Tuple[bool, Any]:
+    def save_url(self, url_data: str) -> Tuple[bool, Any]:
         """
         Сохраняет URL в базе данных.
 
         Если URL уже существует, возвращает его идентификатор.
         Если URL новый, добавляет его в базу и возвращает его идентификатор.
 
+        Выполняется одним запросом INSERT ... ON CONFLICT по уникальному
+        индексу 'urls_name_lower_key', поэтому одновременное добавление
+        одного и того же URL не создает дубликатов. Признак 'xmax = 0'
+        истинен только для строки, вставленной этим запросом. Версия
+        списка URL увеличивается после коммита, только если URL добавлен.
+
         Returns:
             Кортеж, где первый элемент - булево значение,
                         указывающее, существует ли URL,
                         второй элемент - идентификатор URL.
         """
 
-        query = "SELECT id FROM urls WHERE name = %s LIMIT 1;"
-        cursor.execute(query, (url_data,))
+        exists, url_id = self._insert_url(url_data)
 
-        url_id = cursor.fetchone()
+        if not exists:
+            self.cache_versions.bump_after_commit(URLS_VERSION)
 
-        if url_id:
-            logger.info(
-                "Функция 'save_url', URL - %s уже существует, "
-                "id: %s!",
-                url_data, url_id[0]
-            )
-            # noqa Возвращаем True, поскольку URL существует, и его идентификатор
-            return True, url_id[0]
+        return exists, url_id
+
+    @retry_connection()
+    @db_connection()
+    def _insert_url(self, cursor, url_data: str) -> Tuple[bool, Any]:
+        """Запрос 'save_url' (версия списка URL не увеличивается)."""
 
+        # noqa DO UPDATE (а не DO NOTHING) нужен, чтобы RETURNING вернул id существующей строки
         query = """
             INSERT INTO urls (name, created_at)
             VALUES (%s, %s)
-            RETURNING id
+            ON CONFLICT (lower(name)) DO UPDATE SET name = urls.name
+            RETURNING id, (xmax = 0) AS inserted
         """
 
         cursor.execute(query, (url_data, datetime.now()))
 
-        url_id = cursor.fetchone()[0] # noqa Получаем идентификатор нового URL
+        url_id, inserted = cursor.fetchone()
+
+        if not inserted:
+            logger.info(
+                "Функция 'save_url', URL - %s уже существует, "
+                "id: %s!",
+                url_data, url_id
+            )
+            # noqa Возвращаем True, поскольку URL существует, и его идентификатор
+            return True, url_id
 
         logger.info(
             "Функция 'save_url', URL - %s успешно добавлен, "
@@ -134,81 +320,75 @@ class UrlRepository:
         # Возвращаем False, поскольку URL новый, и его идентификатор
         return False, url_id
 
-    @retry_connection()
-    @db_connection(cursor_factory=RealDictCursor)
-    def save_checks_url(
-        self, cursor,
-        url_id: int, status_code: int, h1: str, title: str, description: str
-    ) -> bool:
+    def save_checks_url(self, url_id: int, check: Dict[str, Any]) -> bool:
         """
         Сохраняет данные проверки URL-адреса в базу данных 'url_checks'.
 
         Params:
             url_id: Уникальный идентификатор проверяемого URL-адреса.
-            status_code: Код состояния HTTP, возвращаемый во время проверки.
-            h1: тег H1 содержимого URL-адреса.
-            title: название содержимого URL-адреса.
-            description: Краткое описание содержимого URL-адреса.
+            check: Результаты проверки ('PageAnalyzer.to_check'):
+                status_code - код состояния HTTP,
+                h1, title, description - SEO-поля страницы,
+                bytes_read - количество прочитанных байт тела страницы,
+                etag, last_modified - валидаторы ответа для условных
+                повторных проверок,
+                conditional_hit - страница не изменилась (ответ 304),
+                snapshot_hash - хеш снимка страницы или None,
+                seo_metrics - метрики SEO страницы или None.
+
+        Если результат совпадает с последней проверкой URL, вместо
+        вставки у нее увеличивается счетчик 'seen_count' и обновляется
+        время 'last_seen_at' (см. SAVE_CHECKS_QUERY). Версия списка URL
+        увеличивается после коммита.
 
         Returns:
-            Возвращает True, если вставка прошла успешно,
+            Возвращает True, если сохранение прошло успешно,
             и False, если произошла ошибка.
 
         """
 
-        try:
-            query = """
-                INSERT INTO url_checks (
-                    url_id,
-                    status_code,
-                    h1,
-                    title,
-                    description,
-                    created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
+        saved = self._insert_checks_url(url_id, check)
 
-            cursor.execute(query, (
-                url_id,
-                status_code,
-                h1,
-                title,
-                description,
-                datetime.now())
-            )
+        if saved:
+            self.cache_versions.bump_after_commit(URLS_VERSION)
 
-            logger.info(
-                "Функция 'save_checks_url', успешно сохранила "
-                "данные: "
-                "'url_id': %s, "
-                "'status_code': %s, "
-                "'h1': %s, "
-                "'title': %s, "
-                "'description': %s, "
-                "'created_at': %s, ",
-
-                url_id,
-                status_code,
-                h1,
-                title,
-                description,
-                datetime.now()
-            )
+        return saved
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def _insert_checks_url(
+        self, cursor, url_id: int, check: Dict[str, Any]
+    ) -> bool:
+        """
+        Запрос 'save_checks_url' (версия списка URL не увеличивается).
+
+        Запрос выполняется после точки сохранения: внутри единицы работы
+        транзакция общая для всех вызовов запроса, и ошибка сохранения
+        проверки откатывается только до этой точки, а не оставляет
+        транзакцию прерванной для следующих вызовов. Временные ошибки
+        ('is_transient') не перехватываются, чтобы вызов повторил
+        'retry_connection'.
+        """
+
+        row = check_row(check, url_id=url_id, created_at=datetime.now())
+        query = SAVE_CHECKS_QUERY.format(values=f'({CHECK_VALUES})')
 
-            return True
+        cursor.execute('SAVEPOINT save_checks_url')
 
+        try:
+            cursor.execute(query, row)
         except psycopg2.Error as error:
+            if is_transient(error):
+                raise
+
+            cursor.execute('ROLLBACK TO SAVEPOINT save_checks_url')
+
             logger.error(
                 "В функции 'save_checks_url' произошла ошибка "
-                "при добавление данных: %s, %s, %s, %s, %s, %s."
+                "при добавление данных: %s. "
                 "Ошибка: [%s]",
 
-                url_id,
-                status_code,
-                h1,
-                title,
-                description,
-                datetime.now(),
+                row,
                 str(error),
 
                 exc_info=True
@@ -216,26 +396,178 @@ class UrlRepository:
 
             return False
 
+        cursor.execute('RELEASE SAVEPOINT save_checks_url')
+
+        logger.info(
+            "Функция 'save_checks_url', успешно сохранила "
+            "данные: %s",
+            row
+        )
+
+        return True
+
+    def save_checks_batch(self, checks: List[Dict[str, Any]]) -> int:
+        """
+        Сохраняет результаты множества проверок в таблицу 'url_checks'
+        одним пакетным запросом (повторы последней проверки URL
+        учитываются так же, как в 'save_checks_url').
+
+        Params:
+            checks: Список результатов проверок ('PageAnalyzer.to_check')
+                с идентификатором URL в ключе 'url_id'.
+
+        Returns:
+            Количество сохраненных проверок.
+        """
+
+        if not checks:
+            return 0
+
+        saved = self._insert_checks_batch(checks)
+        self.cache_versions.bump_after_commit(URLS_VERSION)
+
+        return saved
+
+    @retry_connection()
+    @db_connection()
+    def _insert_checks_batch(
+        self, cursor, checks: List[Dict[str, Any]]
+    ) -> int:
+        """Запрос 'save_checks_batch' (версия списка URL не увеличивается)."""
+
+        created_at = datetime.now()
+
+        query = SAVE_CHECKS_QUERY.format(values='%s')
+
+        execute_values(
+            cursor, query,
+            [check_row(check, created_at=created_at) for check in checks],
+            template=f'({CHECK_VALUES})',
+            page_size=len(checks)
+        )
+
+        logger.info(
+            "Функция 'save_checks_batch', успешно сохранено проверок: %s",
+            len(checks)
+        )
+
+        return len(checks)
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_all_urls(self, cursor) -> List[Dict[str, Any]]:
+        """
+        Возвращает идентификаторы и адреса всех сохраненных URL
+        вместе с последней проверкой каждого URL (ключ 'last_check',
+        None, если проверок не было).
+        """
+
+        query = """
+            SELECT
+                urls.id,
+                urls.name,
+                row_to_json(last_check) AS last_check
+            FROM
+                urls
+            LEFT JOIN LATERAL (
+                SELECT status_code, h1, title, description,
+                    etag, last_modified, snapshot_hash, seo_metrics
+                FROM url_checks
+                WHERE url_checks.url_id = urls.id
+                ORDER BY url_checks.created_at DESC, url_checks.id DESC
+                LIMIT 1
+            ) AS last_check ON TRUE
+            ORDER BY
+                urls.id
+        """
+        cursor.execute(query)
+
+        return cursor.fetchall()
+
     @retry_connection()
     @db_connection(cursor_factory=RealDictCursor)
-    def find_checks_urll(self, cursor, url_id: int) -> List[Dict[str, Any]]:
+    def find_last_check(self, cursor, url_id: int) -> Optional[Dict[str, Any]]:
         """
-        Функция выполняет запрос к базе данных для получения всех
+        Возвращает последнюю проверку URL или None, если проверок не было.
+        """
+
+        query = """
+            SELECT * FROM url_checks
+            WHERE url_id = %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        """
+        cursor.execute(query, (url_id,))
+
+        result = cursor.fetchone()
+
+        UrlRepository.add_log('find_last_check', url_id, result)
+
+        return result
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_checks_urll(
+        self, cursor,
+        url_id: int,
+        limit: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> Page:
+        """
+        Функция выполняет запрос к базе данных для получения страницы
         записей о проверках URL, связанных с указанным идентификатором URL.
 
-        Результаты сортируются по времени создания в порядке убывания.
+        Результаты сортируются по времени создания в порядке убывания,
+        страница выбирается по курсору (см. 'fetch_page').
         """
 
+        # noqa Столбцы перечислены явно: 'content_hash' (bytea) не нужен странице и не сериализуется кэшем
         query = """
-                SELECT * FROM url_checks
-                WHERE url_id = %s
-                ORDER BY created_at DESC;
+                SELECT id, url_id, status_code, h1, title, description,
+                    bytes_read, etag, last_modified, conditional_hit,
+                    conditional_hits, created_at, last_seen_at, seen_count
+                FROM url_checks
+                WHERE url_id = %s AND {where}
+                ORDER BY {order}
+                LIMIT %s;
             """
-        cursor.execute(query, (url_id,))
+        result = fetch_page(
+            cursor, query, (url_id,),
+            sort_columns=('created_at', 'id'),
+            cursor_keys=('created_at', 'id'),
+            limit=limit, after=after, before=before
+        )
+
+        UrlRepository.add_log('find_checks_urll', url_id, result.items)
+
+        return result
+
+    @retry_connection()
+    @db_connection(cursor_factory=RealDictCursor)
+    def find_daily_checks(
+        self, cursor, url_id: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает дневную сводку проверок URL ('url_check_daily') за
+        последние 'limit' дней с проверками, начиная с последнего:
+        число проверок, число проверок по кодам ответа ('status_codes'),
+        первый и последний title за день.
+        """
+
+        query = """
+            SELECT day, checks_count, status_codes, first_title,
+                last_title, first_check_at, last_check_at
+            FROM url_check_daily
+            WHERE url_id = %s
+            ORDER BY day DESC
+            LIMIT %s
+        """
+        cursor.execute(query, (url_id, limit))
 
         result = cursor.fetchall()
 
-        UrlRepository.add_log('find_checks_urll', url_id, result)
+        UrlRepository.add_log('find_daily_checks', url_id, result)
 
         return result
 
@@ -247,13 +579,13 @@ class UrlRepository:
         """
 
         if result:
-            logger.info(
+            logger.debug(
                 "Функция '%s', получены данные "
                 "для URL с 'id'=%s, данные: %s",
                 func_name, id, result
             )
         else:
-            logger.info(
+            logger.debug(
                 "Функция '%s', данные не найдены "
                 "для URL с 'id'=%s",
                 func_name, id
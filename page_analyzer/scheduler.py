@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import psycopg2
+
+from page_analyzer.config import Config
+from page_analyzer.db_connections.connection_manager import unit_of_work
+from page_analyzer.metrics import counter, gauge
+from page_analyzer.repositories.schedule import ScheduleRepository
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+SCHEDULER_DUE_URLS = gauge(
+    'page_analyzer_scheduler_due_urls',
+    'URL, время плановой проверки которых наступило.',
+    aggregate='max'
+)
+SCHEDULER_LAG = gauge(
+    'page_analyzer_scheduler_lag_seconds',
+    'Насколько просрочена плановая проверка самого старого URL.',
+    aggregate='max'
+)
+CHECK_QUEUE_PENDING = gauge(
+    'page_analyzer_check_queue_pending_jobs',
+    'Ожидающие задания очереди проверок.',
+    aggregate='max'
+)
+CHECK_QUEUE_LAG = gauge(
+    'page_analyzer_check_queue_lag_seconds',
+    'Возраст самого старого ожидающего задания очереди проверок.',
+    aggregate='max'
+)
+SCHEDULED_URLS = counter(
+    'page_analyzer_scheduler_urls_total',
+    'URL, обработанные планировщиком: поставлены в очередь (enqueued) '
+    'или перенесены из-за ограничения частоты запросов к хосту '
+    '(postponed).',
+    ('action',)
+)
+
+
+class HostRateLimiter:
+    """
+    Ограничение частоты проверок одного хоста: проверки хоста ставятся
+    в очередь не чаще, чем раз в 60 / 'rate' секунд.
+    """
+
+    def __init__(self, rate: float = Config.SCHEDULER_HOST_RATE):
+        self.spacing = timedelta(seconds=60 / rate)
+        self._free_at: Dict[str, datetime] = {}
+
+    def plan(
+        self, hosts: List[str], now: datetime
+    ) -> List[datetime]:
+        """
+        Назначает проверкам хостов 'hosts' (по порядку) время постановки
+        в очередь. Проверки со временем не позже 'now' ставятся в очередь
+        сейчас, и только они занимают место в расписании хоста;
+        остальные переносятся и будут распределены заново, когда
+        наступит назначенное им время.
+        """
+
+        next_slot = {}
+        slots = []
+
+        for host in hosts:
+            slot = max(now, next_slot.get(host, self._free_at.get(host, now)))
+            next_slot[host] = slot + self.spacing
+            slots.append(slot)
+
+            if slot <= now:
+                self._free_at[host] = slot + self.spacing
+
+        # Хосты, свободные к текущему моменту, больше не нужно хранить
+        for host in [h for h, free_at in self._free_at.items()
+                     if free_at <= now]:
+            del self._free_at[host]
+
+        return slots
+
+
+class CheckScheduler:
+    """
+    Планировщик повторных проверок.
+
+    Выбирает URL, время плановой проверки которых наступило
+    ('urls.next_check_at'), и ставит их в очередь 'check_jobs', откуда
+    их забирают воркеры ('CheckWorker' -> 'handle_checks_url'). Проверки
+    одного хоста распределяются во времени ('HostRateLimiter'), а пока
+    очередь переполнена, новые задания не добавляются. Отставание
+    расписания и очереди выводится в метрики.
+
+    Ограничение частоты ведется в памяти процесса, поэтому планировщик
+    запускается в одном экземпляре (несколько экземпляров не поставят
+    один URL дважды, но ограничение будет действовать в каждом отдельно).
+    """
+
+    def __init__(
+        self, schedule_repo: ScheduleRepository, connection_pool,
+        tick: float = Config.SCHEDULER_TICK,
+        batch_size: int = Config.SCHEDULER_BATCH_SIZE,
+        max_pending: int = Config.SCHEDULER_MAX_PENDING,
+        limiter: Optional[HostRateLimiter] = None
+    ):
+        self.schedule_repo = schedule_repo
+        self.connection_pool = connection_pool
+        self.tick = tick
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.limiter = limiter or HostRateLimiter()
+
+    def run_once(self) -> int:
+        """
+        Выполняет один проход планировщика.
+
+        Returns:
+            Количество выбранных URL (поставленных в очередь
+            и перенесенных).
+        """
+
+        backlog = self.schedule_repo.backlog()
+        self.export(backlog)
+
+        if backlog['pending_jobs'] >= self.max_pending:
+            logger.warning(
+                "Класс: 'CheckScheduler', метод: 'run_once'. "
+                "В очереди %s ожидающих заданий (предел %s), новые "
+                "проверки не ставятся. Просрочено URL: %s.",
+                backlog['pending_jobs'], self.max_pending,
+                backlog['due_urls']
+            )
+            return 0
+
+        with unit_of_work(self.connection_pool):
+            due = self.schedule_repo.claim_due_urls(self.batch_size)
+
+            if not due:
+                return 0
+
+            now = due[0]['now']
+            slots = self.limiter.plan(
+                [urlparse(row['name']).netloc.lower() for row in due], now
+            )
+
+            enqueue_ids = [
+                row['id'] for row, slot in zip(due, slots) if slot <= now
+            ]
+            postponed = {
+                row['id']: slot for row, slot in zip(due, slots) if slot > now
+            }
+
+            created = self.schedule_repo.schedule(enqueue_ids, postponed)
+
+        SCHEDULED_URLS.inc(len(enqueue_ids), action='enqueued')
+        SCHEDULED_URLS.inc(len(postponed), action='postponed')
+
+        logger.info(
+            "Класс: 'CheckScheduler', метод: 'run_once'. "
+            "Поставлено в очередь URL: %s (новых заданий: %s), "
+            "перенесено из-за ограничения частоты: %s",
+            len(enqueue_ids), created, len(postponed)
+        )
+
+        return len(due)
+
+    @staticmethod
+    def export(backlog: Dict[str, float]) -> None:
+        """Записывает отставание расписания и очереди в метрики."""
+
+        SCHEDULER_DUE_URLS.set(backlog['due_urls'])
+        SCHEDULER_LAG.set(backlog['schedule_lag'])
+        CHECK_QUEUE_PENDING.set(backlog['pending_jobs'])
+        CHECK_QUEUE_LAG.set(backlog['queue_lag'])
+
+    def run_forever(self) -> None:
+        """
+        Выполняет проходы, пока процесс не будет остановлен сигналом.
+        Если выбрана полная пачка URL, следующий проход начинается
+        сразу, иначе - через 'tick' секунд.
+        """
+
+        logger.info(
+            "Класс: 'CheckScheduler', метод: 'run_forever'. "
+            "Планировщик запущен."
+        )
+
+        while True:
+            try:
+                selected = self.run_once()
+            except psycopg2.Error as error:
+                logger.error(
+                    "Класс: 'CheckScheduler', метод: 'run_forever'. "
+                    "Ошибка прохода планировщика: '%s'",
+                    error
+                )
+                selected = 0
+
+            if selected < self.batch_size:
+                time.sleep(self.tick)
+
+
+def main() -> None:
+    """Точка входа планировщика: 'python -m page_analyzer.scheduler'."""
+
+    from page_analyzer import app
+    from page_analyzer.metrics import start_flusher
+
+    if app.config['METRICS_ENABLED']:
+        start_flusher()  # noqa Отставание расписания и очереди попадает в общий /metrics
+
+    CheckScheduler(app.schedule_repo, app.connection_pool).run_forever()
+
+
+if __name__ == '__main__':
+    main()
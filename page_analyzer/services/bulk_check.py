@@ -0,0 +1,245 @@
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from page_analyzer.config import Config
+from page_analyzer.db_connections.connection_manager import (
+    release_unit_of_work
+)
+from page_analyzer.services.http_client import get_session_pool
+from page_analyzer.services.parser import PageAnalyzer
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+# Фоновая массовая проверка процесса ('start_background_check')
+_background_lock = threading.Lock()
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Возвращает перцентиль списка значений (метод ближайшего ранга).
+    Для пустого списка возвращает 0.
+    """
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+
+    return ordered[rank - 1]
+
+
+class BulkCheckReport:
+    """Итоги массовой проверки: количество, пропускная способность, задержки."""
+
+    def __init__(
+        self, total: int, succeeded: int, saved: int,
+        elapsed: float, latencies: List[float],
+        connections: int = 0, reused_connections: int = 0
+    ):
+        self.total = total
+        self.succeeded = succeeded
+        self.failed = total - succeeded
+        self.saved = saved
+        self.elapsed = elapsed
+        self.throughput = total / elapsed if elapsed > 0 else 0.0
+        self.p50 = percentile(latencies, 50)
+        self.p90 = percentile(latencies, 90)
+        self.p99 = percentile(latencies, 99)
+        self.max = max(latencies, default=0.0)
+        self.connections = connections
+        self.reused_connections = reused_connections
+
+    def summary(self) -> str:
+        """Возвращает краткое текстовое описание итогов проверки."""
+
+        return (
+            f'Проверено: {self.total}, успешно: {self.succeeded}, '
+            f'с ошибками: {self.failed}, сохранено: {self.saved}. '
+            f'Время: {self.elapsed:.2f} с, '
+            f'{self.throughput:.1f} URL/с. '
+            f'Задержка p50/p90/p99/max: {self.p50:.2f}/{self.p90:.2f}/'
+            f'{self.p99:.2f}/{self.max:.2f} с. '
+            f'Соединений открыто: {self.connections}, '
+            f'использовано повторно: {self.reused_connections}'
+        )
+
+
+class BulkChecker:
+    """
+    Массовая конкурентная проверка URL.
+
+    Страницы загружаются пулом потоков с общим ограничением
+    одновременных запросов и отдельным ограничением на каждый хост,
+    а все успешные результаты сохраняются одним пакетным INSERT.
+    """
+
+    def __init__(
+        self, url_repo,
+        concurrency: int = Config.BULK_CHECK_CONCURRENCY,
+        per_host: int = Config.BULK_CHECK_PER_HOST
+    ):
+        self.url_repo = url_repo
+        self.concurrency = max(concurrency, 1)
+        self.per_host = max(per_host, 1)
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def run(self, urls: Optional[List[Dict[str, Any]]] = None) -> \
+            BulkCheckReport:
+        """
+        Проверяет переданные URL (по умолчанию - все сохраненные URL)
+        и сохраняет результаты.
+
+        Params:
+            urls: Список словарей с ключами 'id', 'name' и
+                необязательным 'last_check' (последняя проверка URL
+                для условного запроса).
+        """
+
+        if urls is None:
+            urls = self.url_repo.find_all_urls()
+
+        # noqa Загрузка страниц долгая: соединение не держим, сохраним результаты в новой транзакции
+        release_unit_of_work()
+
+        logger.info(
+            "Класс: 'BulkChecker', метод: 'run'. "
+            "Начата проверка %s URL, concurrency: %s, per_host: %s",
+            len(urls), self.concurrency, self.per_host
+        )
+
+        session_pool = get_session_pool()
+        stats_before = session_pool.stats()
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(
+                executor.map(self._check_one, self._interleave_hosts(urls))
+            )
+
+        checks = [check for check, _ in results if check]
+        latencies = [latency for _, latency in results]
+
+        elapsed = time.perf_counter() - started
+        stats_after = session_pool.stats()
+
+        saved = self.url_repo.save_checks_batch(checks)
+
+        report = BulkCheckReport(
+            len(urls), len(checks), saved, elapsed, latencies,
+            connections=(
+                stats_after['connections'] - stats_before['connections']
+            ),
+            reused_connections=(
+                stats_after['reused_connections']
+                - stats_before['reused_connections']
+            )
+        )
+
+        logger.info(
+            "Класс: 'BulkChecker', метод: 'run'. %s", report.summary()
+        )
+
+        return report
+
+    def _check_one(
+        self, url: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Проверяет один URL, соблюдая ограничение на его хост.
+
+        Returns:
+            Кортеж из данных проверки (или None при ошибке)
+            и времени проверки в секундах.
+        """
+
+        analyzer = PageAnalyzer(url['name'], last_check=url.get('last_check'))
+
+        with self._host_limit(url['name']):
+            started = time.perf_counter()
+            errors = analyzer.get_page_content()
+            latency = time.perf_counter() - started
+
+        if errors:
+            return None, latency
+
+        return dict(analyzer.to_check(), url_id=url['id']), latency
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        """Возвращает семафор, ограничивающий запросы к хосту URL."""
+
+        host = urlparse(url).netloc
+
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(
+                    self.per_host
+                )
+
+            return self._host_limits[host]
+
+    @staticmethod
+    def _interleave_hosts(
+        urls: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Перемешивает URL по хостам (по кругу), чтобы потоки пула
+        реже простаивали в ожидании семафора одного и того же хоста.
+        """
+
+        by_host = defaultdict(deque)
+
+        for url in urls:
+            by_host[urlparse(url['name']).netloc].append(url)
+
+        queues = deque(by_host.values())
+        ordered = []
+
+        while queues:
+            queue = queues.popleft()
+            ordered.append(queue.popleft())
+
+            if queue:
+                queues.append(queue)
+
+        return ordered
+
+
+def start_background_check(url_repo) -> bool:
+    """
+    Запускает проверку всех сохраненных URL ('BulkChecker') в фоновом
+    потоке, чтобы обработчик запроса не ждал загрузки страниц. В одном
+    процессе одновременно выполняется не больше одной такой проверки.
+
+    Returns:
+        True, если проверка запущена, False, если предыдущая фоновая
+        проверка еще выполняется.
+    """
+
+    if not _background_lock.acquire(blocking=False):
+        return False
+
+    def run() -> None:
+        try:
+            BulkChecker(url_repo).run()
+        except Exception:  # noqa Ошибка фоновой проверки не должна теряться без следа
+            logger.exception(
+                "Функция 'start_background_check', фоновая проверка "
+                "всех URL завершилась ошибкой"
+            )
+        finally:
+            _background_lock.release()
+
+    threading.Thread(target=run, name='bulk-check', daemon=True).start()
+
+    return True
@@ -0,0 +1,322 @@
+from collections import OrderedDict
+import logging
+import pickle
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from page_analyzer.config import Config
+
+try:
+    import redis
+except ImportError:  # redis - необязательная зависимость
+    redis = None
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Признак отсутствия значения в кэше (None - допустимое значение)
+MISSING = object()
+
+_Entry = Tuple[float, Any, Tuple[str, ...]]
+
+
+class CacheStats:
+    """Счетчики попаданий, промахов и вытеснений кэша."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class Cache:
+    """
+    Интерфейс кэша.
+
+    Каждое значение сохраняется с набором тегов (например, 'url:5'),
+    а 'invalidate' удаляет все значения с указанными тегами.
+    """
+
+    name: str = ''
+
+    def get(self, key: str) -> Any:
+        """Возвращает значение по ключу или MISSING."""
+
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        raise NotImplementedError
+
+    def invalidate(self, *tags: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class LRUCache(Cache):
+    """
+    Ограниченный кэш в памяти процесса: при переполнении вытесняется
+    значение, которое дольше всех не запрашивалось, а значения старше
+    'ttl' секунд считаются устаревшими.
+
+    Кэш потокобезопасен. Значения не копируются, поэтому изменять
+    полученные из кэша объекты нельзя.
+    """
+
+    name = 'memory'
+
+    def __init__(
+        self,
+        maxsize: int = Config.URL_CACHE_MAXSIZE,
+        ttl: float = Config.URL_CACHE_TTL
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        # Ключ -> (момент устаревания, значение, теги)
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Any:
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self._stats.misses += 1
+                return MISSING
+
+            expires_at, value, _ = entry
+
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+
+            return value
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+
+        tags = tuple(tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self._stats.invalidations += 1
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+
+        with self._lock:
+            return dict(
+                self._stats.as_dict(),
+                backend=self.name,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+    def _remove(self, key: str) -> None:
+        """Удаляет значение и его ключ из тегов. Вызывается под блокировкой."""
+
+        _, _, tags = self._entries.pop(key)
+
+        for tag in tags:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache(Cache):
+    """
+    Общий для всех процессов (воркеров gunicorn, воркера очереди)
+    кэш в Redis.
+
+    Значения сериализуются pickle и хранятся 'ttl' секунд, вытеснение
+    при нехватке памяти выполняет сам Redis (политика maxmemory).
+    Для каждого тега хранится множество ключей, которое удаляется
+    вместе с ключами при инвалидации. Ошибки Redis не прерывают
+    запрос: кэш считается пустым. Счетчики попаданий и промахов
+    ведутся в каждом процессе отдельно.
+
+    Требует установленного пакета 'redis'.
+    """
+
+    name = 'redis'
+
+    def __init__(
+        self,
+        url: str = Config.URL_CACHE_REDIS_URL,
+        ttl: float = Config.URL_CACHE_TTL,
+        prefix: str = 'page_analyzer:'
+    ):
+        if redis is None:
+            raise ValueError(
+                "Для кэша 'redis' необходимо установить пакет 'redis'"
+            )
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Any:
+
+        try:
+            payload = self.client.get(self.prefix + key)
+        except redis.RedisError as error:
+            self._log_error('get', error)
+            payload = None
+
+        with self._lock:
+            if payload is None:
+                self._stats.misses += 1
+                return MISSING
+
+            self._stats.hits += 1
+
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+
+        key = self.prefix + key
+
+        try:
+            with self.client.pipeline() as pipeline:
+                pipeline.set(key, pickle.dumps(value), ex=self.ttl)
+
+                for tag in tags:
+                    tag_key = f'{self.prefix}tag:{tag}'
+                    pipeline.sadd(tag_key, key)
+                    pipeline.expire(tag_key, self.ttl)
+
+                pipeline.execute()
+        except redis.RedisError as error:
+            self._log_error('set', error)
+
+    def invalidate(self, *tags: str) -> None:
+
+        tag_keys = [f'{self.prefix}tag:{tag}' for tag in tags]
+
+        try:
+            with self.client.pipeline() as pipeline:
+                for tag_key in tag_keys:
+                    pipeline.smembers(tag_key)
+                members = pipeline.execute()
+
+            keys = set().union(*members) if members else set()
+
+            if keys or tag_keys:
+                deleted = self.client.delete(*keys, *tag_keys)
+
+                with self._lock:
+                    self._stats.invalidations += deleted
+        except redis.RedisError as error:
+            self._log_error('invalidate', error)
+
+    def clear(self) -> None:
+
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + '*'))
+
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as error:
+            self._log_error('clear', error)
+
+    def stats(self) -> Dict[str, Any]:
+
+        with self._lock:
+            return dict(self._stats.as_dict(), backend=self.name)
+
+    @staticmethod
+    def _log_error(method: str, error: Exception) -> None:
+        logger.warning(
+            "Класс: 'RedisCache', метод: '%s'. Ошибка Redis: '%s'",
+            method, error
+        )
+
+
+def create_cache(
+    backend: Optional[str] = None,
+    maxsize: Optional[int] = None,
+    ttl: Optional[float] = None,
+    prefix: str = 'page_analyzer:'
+) -> Optional[Cache]:
+    """
+    Создает кэш по имени ('memory', 'redis' или 'none').
+    Для 'none' возвращает None. Параметры, не переданные явно,
+    берутся из настроек кэша URL ('URL_CACHE_*').
+
+    Raises:
+        ValueError: Если кэш неизвестен или не установлен пакет 'redis'.
+    """
+
+    backend = backend or Config.URL_CACHE_BACKEND
+    ttl = Config.URL_CACHE_TTL if ttl is None else ttl
+
+    if backend == 'none':
+        return None
+
+    if backend == LRUCache.name:
+        return LRUCache(maxsize=maxsize or Config.URL_CACHE_MAXSIZE, ttl=ttl)
+
+    if backend == RedisCache.name:
+        return RedisCache(ttl=ttl, prefix=prefix)
+
+    raise ValueError(
+        f"Неизвестный кэш: '{backend}'. Доступны: memory, redis, none"
+    )
@@ -0,0 +1,174 @@
+from html.parser import HTMLParser
+import logging
+from typing import List, Optional, Tuple
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+# Элементы без закрывающего тега: они не попадают в стек открытых тегов
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed',
+    'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link',
+    'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track',
+    'wbr'
+})
+
+# Содержимое этих элементов не входит в текст родителя
+# (так же, как в 'Tag.text' у BeautifulSoup)
+NON_TEXT_ELEMENTS = frozenset({'script', 'style', 'template'})
+
+
+class PageExtractor(HTMLParser):
+    """
+    Инкрементальный извлекатель SEO-полей страницы.
+
+    Разбирает HTML по событиям, без построения дерева, и собирает
+    текст первого H1, текст первого TITLE и содержимое первого
+    META name="description". Данные можно передавать частями через
+    'feed', а свойство 'complete' сообщает, что все поля найдены
+    и дальнейшее чтение страницы не требуется.
+
+    Закрытие тегов повторяет поведение BeautifulSoup с "html.parser":
+    закрывающий тег снимает со стека все теги до совпадающего
+    открытого, а непарные закрывающие теги игнорируются.
+
+    Если передан набор метрик ('metrics', см. 'seo_metrics.MetricSet'),
+    события разбора передаются и ему, поэтому метрики вычисляются
+    в том же проходе, а 'complete' истинно, только когда готовы и
+    все метрики ('MetricSet.done').
+    """
+
+    def __init__(self, metrics=None):
+        super().__init__(convert_charrefs=True)
+
+        self.metrics = metrics
+
+        self.h1: Optional[str] = None
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+
+        self._stack: List[str] = []  # Стек открытых тегов
+        self._h1_depth: Optional[int] = None  # Позиция H1 в стеке
+        self._title_depth: Optional[int] = None  # Позиция TITLE в стеке
+        self._h1_parts: List[str] = []
+        self._title_parts: List[str] = []
+        self._non_text_depth = 0  # Вложенность в script/style/template
+
+    @property
+    def complete(self) -> bool:
+        """Все три поля найдены, и их значения больше не изменятся."""
+
+        return (
+            (self.metrics is None or self.metrics.done)
+            and self.h1 is not None
+            and self.title is not None
+            and self.description is not None
+        )
+
+    def result(self) -> Tuple[str, str, str]:
+        """
+        Возвращает найденные значения (h1, title, description).
+        Для ненайденных полей возвращается пустая строка.
+        """
+
+        h1 = self.h1
+        if h1 is None:
+            # H1 не был закрыт до конца документа
+            h1 = ''.join(self._h1_parts)
+
+        title = self.title
+        if title is None:
+            title = ''.join(self._title_parts)
+
+        return h1, title, self.description or ''
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+
+        if self.metrics is not None:
+            self.metrics.start(tag, attrs)
+
+        if tag == 'meta':
+            self._handle_meta(attrs)
+
+        if tag in VOID_ELEMENTS:
+            return
+
+        self._stack.append(tag)
+
+        if tag in NON_TEXT_ELEMENTS:
+            self._non_text_depth += 1
+        elif tag == 'h1' and self.h1 is None and self._h1_depth is None:
+            self._h1_depth = len(self._stack)
+        elif (
+            tag == 'title'
+            and self.title is None
+            and self._title_depth is None
+        ):
+            self._title_depth = len(self._stack)
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        # Самозакрывающийся тег ('<div/>') сразу закрывается
+        if self.metrics is not None:
+            self.metrics.start(tag, attrs)
+            self.metrics.end(tag)
+
+        if tag == 'meta':
+            self._handle_meta(attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+
+        if self.metrics is not None:
+            self.metrics.end(tag)
+
+        if tag not in self._stack:
+            return  # Непарный закрывающий тег
+
+        while self._stack:
+            closed = self._stack.pop()
+            depth = len(self._stack) + 1
+
+            if closed in NON_TEXT_ELEMENTS:
+                self._non_text_depth -= 1
+
+            if depth == self._h1_depth:
+                self.h1 = ''.join(self._h1_parts)
+                self._h1_depth = None
+
+            if depth == self._title_depth:
+                self.title = ''.join(self._title_parts)
+                self._title_depth = None
+
+            if closed == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+
+        if self._non_text_depth:
+            return
+
+        if self.metrics is not None:
+            self.metrics.data(data)
+
+        if self._h1_depth is not None:
+            self._h1_parts.append(data)
+
+        if self._title_depth is not None:
+            self._title_parts.append(data)
+
+    def unknown_decl(self, data: str) -> None:
+        # Секции CDATA входят в текст элемента, как в BeautifulSoup
+        if data.startswith('CDATA['):
+            self.handle_data(data[len('CDATA['):])
+
+    def _handle_meta(self, attrs) -> None:
+        """Запоминает содержимое первого META name="description"."""
+
+        if self.description is not None:
+            return
+
+        attributes = dict(attrs)
+
+        if attributes.get('name') == 'description':
+            self.description = attributes.get('content') or ''
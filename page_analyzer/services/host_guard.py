@@ -0,0 +1,205 @@
+from collections import OrderedDict
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from page_analyzer.circuit_breaker import CircuitBreaker, CircuitOpenError
+from page_analyzer.config import Config
+from page_analyzer.metrics import HOST_FAST_FAILURES
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+class HostUnavailableError(requests.exceptions.ConnectionError):
+    """
+    Запрос к хосту не выполнялся: хост недавно не отвечал (выключатель
+    хоста разомкнут) или его имя не удалось разрешить в DNS.
+    """
+
+
+class HostGuard:
+    """
+    Учет отказов проверяемых хостов.
+
+    Для каждого хоста ведется свой выключатель ('CircuitBreaker'): после
+    'failure_threshold' ошибок соединения или таймаутов подряд запросы
+    к хосту в течение 'reset_timeout' секунд сразу завершаются ошибкой
+    'HostUnavailableError', затем пропускается один пробный запрос.
+    Имена, которые не удалось разрешить в DNS, запоминаются на 'dns_ttl'
+    секунд (негативный кэш): повторные проверки мертвого домена не ждут
+    DNS. Число отслеживаемых хостов ограничено 'max_hosts' (вытесняются
+    давно не использовавшиеся).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = Config.HOST_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = Config.HOST_BREAKER_RESET_TIMEOUT,
+        dns_ttl: float = Config.DNS_NEGATIVE_TTL,
+        max_hosts: int = Config.HOST_BREAKER_MAX_HOSTS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.dns_ttl = dns_ttl
+        self.max_hosts = max_hosts
+
+        self._breakers: 'OrderedDict[str, CircuitBreaker]' = OrderedDict()
+        self._dns_failures: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str) -> None:
+        """
+        Проверяет, можно ли выполнять запрос к хосту.
+
+        Raises:
+            HostUnavailableError: Если имя хоста недавно не разрешилось
+                или выключатель хоста разомкнут.
+        """
+
+        expires_at = self._dns_failure(host)
+
+        if expires_at is not None:
+            HOST_FAST_FAILURES.inc(reason='dns')
+            raise HostUnavailableError(
+                f"Имя хоста '{host}' не найдено в DNS (повтор через "
+                f"{expires_at - time.monotonic():.0f} с)."
+            )
+
+        try:
+            self._breaker(host).before_call()
+        except CircuitOpenError as error:
+            HOST_FAST_FAILURES.inc(reason='circuit_open')
+            raise HostUnavailableError(
+                f"Хост '{host}' не отвечает, запросы к нему приостановлены "
+                f"(повтор через {error.retry_after:.0f} с)."
+            ) from error
+
+    def record_success(self, host: str) -> None:
+        """Хост ответил (с любым кодом статуса)."""
+
+        self._breaker(host).record_success()
+
+    def record_error(self, host: str, error: Exception) -> None:
+        """
+        Учитывает ошибку запроса к хосту. Отказом считаются ошибки
+        соединения и таймауты; ошибка DNS также запоминается.
+        """
+
+        breaker = self._breaker(host)
+
+        if not isinstance(error, (requests.exceptions.ConnectionError,
+                                  requests.exceptions.Timeout)):
+            breaker.record_success()  # noqa Ошибка не связана с доступностью хоста
+            return
+
+        if is_dns_failure(error):
+            self._remember_dns_failure(host)
+
+        breaker.record_failure()
+
+    def stats(self) -> Dict[str, int]:
+        """Число хостов с разомкнутым выключателем и в негативном кэше DNS."""
+
+        now = time.monotonic()
+
+        with self._lock:
+            breakers = list(self._breakers.values())
+            dns_failures = sum(
+                1 for expires_at in self._dns_failures.values()
+                if expires_at > now
+            )
+
+        return {
+            'unavailable_hosts': sum(
+                1 for breaker in breakers if breaker.state != 'closed'
+            ),
+            'dns_negative_hosts': dns_failures,
+        }
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+
+        with self._lock:
+            breaker = self._breakers.get(host)
+
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    host,
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.reset_timeout,
+                    metrics=False
+                )
+
+                while len(self._breakers) > self.max_hosts:
+                    self._breakers.popitem(last=False)
+            else:
+                self._breakers.move_to_end(host)
+
+            return breaker
+
+    def _dns_failure(self, host: str) -> Optional[float]:
+        """Возвращает время истечения записи негативного кэша DNS."""
+
+        with self._lock:
+            expires_at = self._dns_failures.get(host)
+
+            if expires_at is None:
+                return None
+
+            if expires_at <= time.monotonic():
+                del self._dns_failures[host]
+                return None
+
+            return expires_at
+
+    def _remember_dns_failure(self, host: str) -> None:
+
+        with self._lock:
+            self._dns_failures[host] = time.monotonic() + self.dns_ttl
+            self._dns_failures.move_to_end(host)
+
+            while len(self._dns_failures) > self.max_hosts:
+                self._dns_failures.popitem(last=False)
+
+        logger.info(
+            "Класс: 'HostGuard', метод: '_remember_dns_failure'. "
+            "Имя хоста '%s' не разрешилось, запросы к нему будут сразу "
+            "завершаться ошибкой %s с.",
+            host, self.dns_ttl
+        )
+
+
+def is_dns_failure(error: BaseException) -> bool:
+    """
+    Проверяет, что причиной ошибки запроса была ошибка разрешения имени
+    (socket.gaierror в цепочке исключений requests и urllib3).
+    """
+
+    stack, seen = [error], set()
+
+    while stack:
+        current = stack.pop()
+
+        if not isinstance(current, BaseException) or id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        if isinstance(current, socket.gaierror) \
+                or type(current).__name__ == 'NameResolutionError':
+            return True
+
+        stack.extend((
+            current.__cause__,
+            current.__context__,
+            getattr(current, 'reason', None),  # urllib3 MaxRetryError
+        ))
+        stack.extend(
+            arg for arg in current.args if isinstance(arg, BaseException)
+        )
+
+    return False
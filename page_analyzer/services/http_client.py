@@ -0,0 +1,237 @@
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from page_analyzer.config import Config
+from page_analyzer.services.host_guard import HostGuard
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+class _HostSession:
+    """Сессия requests для одного хоста и время ее последнего использования."""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    Пул HTTP-сессий с keep-alive соединениями, по одной сессии на хост.
+
+    Повторные проверки одного и того же хоста используют уже открытые
+    TCP/TLS-соединения вместо нового рукопожатия. Количество хостов
+    ограничено: при переполнении закрывается сессия, которая дольше всех
+    не использовалась, а сессии, простаивающие дольше 'idle_timeout'
+    секунд, закрываются при следующем обращении к пулу.
+
+    Запросы к хостам, которые недавно не отвечали или не разрешились
+    в DNS, сразу завершаются ошибкой (см. 'HostGuard').
+    """
+
+    def __init__(
+        self,
+        max_hosts: int = Config.HTTP_POOL_MAX_HOSTS,
+        pool_maxsize: int = Config.HTTP_POOL_MAXSIZE,
+        idle_timeout: float = Config.HTTP_POOL_IDLE_TIMEOUT,
+        connect_timeout: float = Config.HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = Config.HTTP_READ_TIMEOUT
+    ):
+        self.max_hosts = max_hosts
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = (connect_timeout, read_timeout)
+        self.host_guard = HostGuard()
+
+        self._sessions: 'OrderedDict[str, _HostSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        # Счетчики закрытых сессий, чтобы статистика не обнулялась
+        self._retired_requests = 0
+        self._retired_connections = 0
+        self._evicted = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Выполняет GET-запрос через сессию хоста URL."""
+
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет запрос через сессию хоста URL.
+
+        Если таймаут не передан, используются таймауты соединения
+        и чтения из конфигурации.
+        """
+
+        kwargs.setdefault('timeout', self.timeout)
+
+        host = urlparse(url).netloc.lower()
+        self.host_guard.before_request(host)
+
+        try:
+            response = self._session_for(url).request(method, url, **kwargs)
+        except Exception as error:
+            self.host_guard.record_error(host, error)
+            raise
+
+        self.host_guard.record_success(host)
+
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики пула: число хостов, выполненных запросов,
+        открытых соединений и запросов, выполненных по уже открытому
+        соединению (сэкономленных рукопожатий).
+        """
+
+        with self._lock:
+            requests_total = self._retired_requests
+            connections_total = self._retired_connections
+
+            for entry in self._sessions.values():
+                requests_count, connections = self._session_counters(
+                    entry.session
+                )
+                requests_total += requests_count
+                connections_total += connections
+
+            return {
+                'hosts': len(self._sessions),
+                'evicted_sessions': self._evicted,
+                'requests': requests_total,
+                'connections': connections_total,
+                'reused_connections': requests_total - connections_total,
+                **self.host_guard.stats(),
+            }
+
+    def close(self) -> None:
+        """Закрывает все сессии пула."""
+
+        with self._lock:
+            while self._sessions:
+                _, entry = self._sessions.popitem(last=False)
+                self._retire(entry)
+
+    def _session_for(self, url: str) -> requests.Session:
+        """Возвращает сессию хоста URL, создавая ее при необходимости."""
+
+        host = urlparse(url).netloc.lower()
+        now = time.monotonic()
+
+        with self._lock:
+            if now - self._last_sweep > self.idle_timeout / 2:
+                self._evict_idle(now)
+
+            entry = self._sessions.get(host)
+
+            if entry is None:
+                entry = _HostSession(self._create_session())
+                self._sessions[host] = entry
+
+                while len(self._sessions) > self.max_hosts:
+                    _, oldest = self._sessions.popitem(last=False)
+                    self._retire(oldest)
+            else:
+                self._sessions.move_to_end(host)
+
+            entry.last_used = now
+
+            return entry.session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # noqa Несколько пулов на сессию: редиректы могут вести на другую схему или порт
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=self.pool_maxsize
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        return session
+
+    def _evict_idle(self, now: float) -> None:
+        """Закрывает сессии, простаивающие дольше 'idle_timeout'."""
+
+        self._last_sweep = now
+
+        idle_hosts = [
+            host for host, entry in self._sessions.items()
+            if now - entry.last_used > self.idle_timeout
+        ]
+
+        for host in idle_hosts:
+            self._retire(self._sessions.pop(host))
+
+        if idle_hosts:
+            logger.debug(
+                "Класс: 'SessionPool', метод: '_evict_idle'. "
+                "Закрыто простаивающих сессий: %s",
+                len(idle_hosts)
+            )
+
+    def _retire(self, entry: _HostSession) -> None:
+        """Закрывает сессию, сохраняя ее счетчики."""
+
+        requests_count, connections = self._session_counters(entry.session)
+        self._retired_requests += requests_count
+        self._retired_connections += connections
+        self._evicted += 1
+
+        entry.session.close()
+
+    @staticmethod
+    def _session_counters(session: requests.Session) -> tuple[int, int]:
+        """
+        Возвращает число запросов и открытых соединений по всем пулам
+        соединений urllib3 сессии.
+        """
+
+        requests_count = connections = 0
+
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+
+            for key in pools.keys():
+                pool = pools.get(key)
+
+                if pool is not None:
+                    requests_count += pool.num_requests
+                    connections += pool.num_connections
+
+        return requests_count, connections
+
+
+_session_pool: Optional[SessionPool] = None
+_session_pool_pid: Optional[int] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """
+    Возвращает общий для процесса пул HTTP-сессий.
+
+    После fork (например, в воркерах gunicorn) создается новый пул,
+    чтобы процессы не делили сокеты родителя.
+    """
+
+    global _session_pool, _session_pool_pid
+
+    with _session_pool_lock:
+        if _session_pool is None or _session_pool_pid != os.getpid():
+            _session_pool = SessionPool()
+            _session_pool_pid = os.getpid()
+
+        return _session_pool
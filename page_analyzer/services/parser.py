@@ -1,28 +1,90 @@
+import codecs
+from http import HTTPStatus
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional
 
-from bs4 import BeautifulSoup
+import psycopg2
 import requests
 
+from page_analyzer.config import Config
+from page_analyzer.metrics import FETCH_DURATION, PARSE_DURATION
+from page_analyzer.services.http_client import get_session_pool
+from page_analyzer.services.parser_backends import get_backend
+from page_analyzer.services.seo_metrics import create_metric_set
+from page_analyzer.services.snapshot_store import (
+    SnapshotStore,
+    get_snapshot_store
+)
+
 
 # Получение логгера с именем текущего модуля для записи логов
 logger = logging.getLogger(__name__)
 
+# noqa Максимальная длина текстовых полей проверки (VARCHAR(255) в 'url_checks')
+MAX_FIELD_LENGTH = 255
+
+
+def truncate_field(value: Optional[str]) -> Optional[str]:
+    """Обрезает значение поля проверки до MAX_FIELD_LENGTH символов."""
+
+    return value[:MAX_FIELD_LENGTH] if value else value
+
 
 class PageAnalyzer:
-    def __init__(self, url: str):
+    def __init__(
+        self, url: str,
+        streaming: bool = Config.FETCH_STREAMING,
+        byte_budget: int = Config.FETCH_BYTE_BUDGET,
+        parser_backend: str = Config.PARSER_BACKEND,
+        last_check: Optional[Dict[str, Any]] = None,
+        snapshot_store: Optional[SnapshotStore] = None,
+        seo_metrics: Optional[List[str]] = None
+    ):
         """
         Инициализация класса PageAnalyzer.
 
         Params:
             url: URL страницы, которую необходимо проанализировать.
+            streaming: Читать тело страницы потоком и прекращать чтение,
+                как только найдены все поля.
+            byte_budget: Максимальное количество байт тела страницы,
+                которое читается в потоковом режиме.
+            parser_backend: Имя способа разбора HTML
+                (ключ словаря 'parser_backends.BACKENDS').
+            last_check: Последняя сохраненная проверка URL. Если задана,
+                запрос отправляется с If-None-Match / If-Modified-Since,
+                и при ответе 304 ее результаты используются повторно.
+            snapshot_store: Хранилище снимков страниц (по умолчанию -
+                общее хранилище SNAPSHOT_BACKEND). Если снимки
+                сохраняются, тело страницы читается до 'byte_budget'
+                байт, даже когда все поля уже найдены.
+            seo_metrics: Имена метрик SEO (по умолчанию - параметр
+                SEO_METRICS). Метрики вычисляются в том же проходе
+                разбора, что и h1, title и description; при потоковой
+                загрузке чтение продолжается, пока не готовы все
+                метрики (метрикам ссылок, изображений и заголовков
+                нужна вся страница, до 'byte_budget' байт).
         """
 
         self.url = url
+        self.streaming = streaming
+        self.byte_budget = byte_budget
+        self.parser_backend = parser_backend
         self.status_code = None
         self.h1 = None
         self.title = None
         self.description = None
+        self.bytes_read = None  # Сколько байт тела страницы было прочитано
+        self.last_check = last_check
+        self.etag = None
+        self.last_modified = None
+        self.conditional_hit = False  # noqa Страница не изменилась (ответ 304)
+        self.parse_seconds = 0.0  # Время разбора HTML (без загрузки)
+        self.snapshot_store = snapshot_store or get_snapshot_store()
+        self.snapshot_hash = None  # Хеш сохраненного снимка страницы
+        self.metric_names = seo_metrics
+        self.seo_metrics = None  # noqa Результаты метрик SEO: имя метрики -> значение
 
     def get_page_content(self) -> Dict[str, Any]:
         """
@@ -41,22 +103,48 @@ class PageAnalyzer:
             "Попытка получить контент страницы для URL: %s",
             self.url
         )
+        started = time.perf_counter()
+        outcome = 'error'
         try:
-            # Выполняем GET-запрос к указанному URL с таймаутом в 10 секунд
-            response = requests.get(self.url, timeout=10)
-            response.encoding = 'utf-8'
+            # noqa Выполняем GET-запрос через общий пул keep-alive сессий (таймауты из Config)
+            response = get_session_pool().get(
+                self.url, stream=self.streaming,
+                headers=self.conditional_headers()
+            )
 
-            # Проверяем, была ли ошибка в запросе (например, 404, 500 и т.д.)
-            response.raise_for_status()
+            with response:
+                response.encoding = 'utf-8'
 
-            self.status_code = response.status_code
-            logger.info(
-                "Класс: 'PageAnalyzer', метод: 'get_page_content'. "
-                "Успешно получен контент страницы, статус код: %s",
-                self.status_code
-            )
-            # Передаем текст страницы в метод анализа
-            self.parse_page(response.text)
+                # noqa Проверяем, была ли ошибка в запросе (например, 404, 500 и т.д.)
+                response.raise_for_status()
+
+                self.etag = response.headers.get('ETag')
+                self.last_modified = response.headers.get('Last-Modified')
+
+                if response.status_code == HTTPStatus.NOT_MODIFIED \
+                        and self.last_check:
+                    # Страница не изменилась: тело не загружаем и не разбираем
+                    outcome = 'not_modified'
+                    self.reuse_last_check()
+                    return None
+
+                self.status_code = response.status_code
+                logger.info(
+                    "Класс: 'PageAnalyzer', метод: 'get_page_content'. "
+                    "Успешно получен ответ страницы, статус код: %s",
+                    self.status_code
+                )
+
+                if self.streaming:
+                    # Читаем и разбираем тело страницы по частям
+                    self.stream_page(response)
+                else:
+                    self.bytes_read = len(response.content)
+                    self.store_snapshot(response.content)
+                    # Передаем текст страницы в метод анализа
+                    self.parse_page(response.text)
+
+                outcome = 'ok'
 
         except requests.exceptions.RequestException as req_err:
             logger.error(
@@ -71,46 +159,204 @@ class PageAnalyzer:
                 'category': 'danger'
             }
             return errors
+        finally:
+            self.observe_timings(time.perf_counter() - started, outcome)
 
-    def parse_page(self, page_content: str) -> None:
+    def observe_timings(self, elapsed: float, outcome: str) -> None:
         """
-        Парсит контент HTML страницы, извлекая заголовок H1,
-        заголовок страницы (title) и описание (meta description).
+        Записывает в метрики время загрузки страницы (без разбора)
+        и время разбора HTML.
         """
 
-        logger.debug(
-            "Класс: 'PageAnalyzer', метод: 'parse_page'. "
-            "Начинаю парсинг контента страницы"
+        FETCH_DURATION.observe(elapsed - self.parse_seconds, outcome=outcome)
+
+        if self.parse_seconds:
+            PARSE_DURATION.observe(
+                self.parse_seconds, backend=self.parser_backend
+            )
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Возвращает заголовки условного запроса по валидаторам
+        последней проверки (ETag и Last-Modified).
+        """
+
+        headers = {}
+
+        if not self.last_check:
+            return headers
+
+        if self.last_check.get('etag'):
+            headers['If-None-Match'] = self.last_check['etag']
+
+        if self.last_check.get('last_modified'):
+            headers['If-Modified-Since'] = self.last_check['last_modified']
+
+        return headers
+
+    def reuse_last_check(self) -> None:
+        """
+        Заполняет результаты проверки данными последней проверки
+        (сервер ответил 304 Not Modified).
+        """
+
+        self.conditional_hit = True
+        self.bytes_read = 0
+        self.status_code = self.last_check['status_code']
+        self.h1 = self.last_check['h1']
+        self.title = self.last_check['title']
+        self.description = self.last_check['description']
+        self.snapshot_hash = self.last_check.get('snapshot_hash')
+        self.seo_metrics = self.last_check.get('seo_metrics')
+        # В ответе 304 валидаторы могут отсутствовать
+        self.etag = self.etag or self.last_check.get('etag')
+        self.last_modified = \
+            self.last_modified or self.last_check.get('last_modified')
+
+        logger.info(
+            "Класс: 'PageAnalyzer', метод: 'reuse_last_check'. "
+            "Страница %s не изменилась, используются результаты "
+            "последней проверки.",
+            self.url
         )
 
-        soup = BeautifulSoup(page_content, "html.parser")
+    def to_check(self) -> Dict[str, Any]:
+        """
+        Возвращает результаты проверки в виде словаря для сохранения
+        в таблицу 'url_checks'. Текстовые поля обрезаются до длины
+        столбцов: одно слишком длинное значение иначе прервало бы
+        пакетное сохранение всех проверок ('save_checks_batch').
+        """
+
+        return {
+            'status_code': self.status_code,
+            'h1': truncate_field(self.h1),
+            'title': truncate_field(self.title),
+            'description': truncate_field(self.description),
+            'bytes_read': self.bytes_read,
+            'etag': truncate_field(self.etag) or None,
+            'last_modified': truncate_field(self.last_modified) or None,
+            'conditional_hit': self.conditional_hit,
+            'snapshot_hash': self.snapshot_hash,
+            'seo_metrics': self.seo_metrics,
+        }
+
+    def stream_page(self, response: requests.Response) -> None:
+        """
+        Читает тело страницы частями, не более 'byte_budget' байт.
+
+        Если способ разбора инкрементальный, части сразу передаются
+        в парсер, и чтение прекращается, как только найдены H1, title и
+        meta description (если не сохраняются снимки страниц и не
+        вычисляются метрики SEO). Иначе
+        прочитанный текст разбирается целиком. Количество прочитанных
+        байт сохраняется в 'bytes_read'.
+        """
+
+        backend = get_backend(self.parser_backend)
+        metrics = create_metric_set(self.metric_names, self.url)
+        extractor = backend.create_extractor(metrics) \
+            if backend.incremental else None
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        keep_body = self.snapshot_store is not None
+        parts = []
+        self.bytes_read = 0
+
+        for chunk in response.iter_content(chunk_size=Config.FETCH_CHUNK_SIZE):
+            chunk = chunk[:self.byte_budget - self.bytes_read]
+            self.bytes_read += len(chunk)
+
+            if extractor and not extractor.complete:
+                self.feed_extractor(extractor, decoder.decode(chunk))
 
-        # Извлекаем заголовок H1
-        self.h1 = soup.find('h1').text if soup.find('h1') else ''
+            if keep_body or not extractor:
+                parts.append(chunk)
+
+            # noqa Все поля найдены: дальше страница читается только для снимка
+            if extractor and extractor.complete and not keep_body:
+                break
+
+            if self.bytes_read >= self.byte_budget:
+                break
+
+        body = b''.join(parts)
+
+        if extractor:
+            self.feed_extractor(
+                extractor, decoder.decode(b'', final=True), final=True
+            )
+            self.h1, self.title, self.description = extractor.result()
+            self.seo_metrics = metrics.results() if metrics else None
+        else:
+            self.parse_page(body.decode('utf-8', errors='replace'))
+
+        self.store_snapshot(body)
 
         logger.debug(
-            "Класс: 'PageAnalyzer', метод: 'parse_page'. "
-            "H1 заголовок (h1): '%s'",
-            self.h1
+            "Класс: 'PageAnalyzer', метод: 'stream_page'. "
+            "Прочитано байт: %s, h1: '%s', title: '%s', description: '%s'",
+            self.bytes_read, self.h1, self.title, self.description
         )
 
-        # Извлекаем заголовок страницы
-        self.title = soup.find('title').text if soup.find('title') else ''
+    def feed_extractor(
+        self, extractor, text: str, final: bool = False
+    ) -> None:
+        """Передает часть текста инкрементальному парсеру."""
+
+        parse_started = time.perf_counter()
+        extractor.feed(text)
+
+        if final:
+            extractor.close()
+
+        self.parse_seconds += time.perf_counter() - parse_started
+
+    def store_snapshot(self, body: bytes) -> None:
+        """
+        Сохраняет тело страницы в хранилище снимков. Ошибка хранилища
+        не прерывает проверку: снимок просто не будет сохранен.
+        """
+
+        if self.snapshot_store is None:
+            return
+
+        try:
+            self.snapshot_hash = self.snapshot_store.put(body)
+        except (OSError, psycopg2.Error) as error:
+            logger.warning(
+                "Класс: 'PageAnalyzer', метод: 'store_snapshot'. "
+                "Снимок страницы %s не сохранен: '%s'",
+                self.url, error
+            )
+
+    def parse_page(self, page_content: str) -> None:
+        """
+        Парсит контент HTML страницы, извлекая заголовок H1,
+        заголовок страницы (title), описание (meta description)
+        и метрики SEO.
+
+        Способ разбора задается параметром 'PARSER_BACKEND' конфигурации
+        (см. 'page_analyzer.services.parser_backends').
+        """
 
         logger.debug(
             "Класс: 'PageAnalyzer', метод: 'parse_page'. "
-            "Заголовок страницы (title): '%s'",
-            self.title
+            "Начинаю парсинг контента страницы, способ разбора: '%s'",
+            self.parser_backend
         )
 
-        # Извлекаем мета-описание
-        desc_meta = soup.find('meta', attrs={'name': 'description'})
-        has_content = desc_meta and 'content' in desc_meta.attrs
-
-        self.description = desc_meta['content'] if has_content else ''
+        parse_started = time.perf_counter()
+        backend = get_backend(self.parser_backend)
+        metrics = create_metric_set(self.metric_names, self.url)
+        self.h1, self.title, self.description = backend.extract(
+            page_content, metrics
+        )
+        self.seo_metrics = metrics.results() if metrics else None
+        self.parse_seconds += time.perf_counter() - parse_started
 
         logger.debug(
             "Класс: 'PageAnalyzer', метод: 'parse_page'. "
-            "Описание страницы (description): '%s'",
-            self.description
+            "H1 заголовок (h1): '%s', заголовок страницы (title): '%s', "
+            "описание страницы (description): '%s'",
+            self.h1, self.title, self.description
         )
@@ -0,0 +1,219 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from page_analyzer.services.extractor import NON_TEXT_ELEMENTS, PageExtractor
+from page_analyzer.services.seo_metrics import MetricSet
+
+try:
+    import lxml.html
+except ImportError:  # lxml - необязательная зависимость
+    lxml = None
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Размер части текста, передаваемой в 'PageExtractor' за один вызов
+STREAM_PARSE_CHUNK = 16384
+
+
+class ParserBackend:
+    """
+    Интерфейс способа разбора HTML.
+
+    Способ разбора извлекает из текста страницы кортеж
+    (h1, title, description). Способы с 'incremental = True' умеют
+    принимать страницу частями через 'create_extractor', что позволяет
+    прекращать загрузку страницы, как только найдены все поля.
+
+    Если передан набор метрик SEO ('metrics'), он заполняется одним
+    проходом 'PageExtractor' по странице.
+    """
+
+    name: str = ''
+    incremental: bool = False
+
+    def extract(
+        self, page_content: str, metrics: Optional[MetricSet] = None
+    ) -> Tuple[str, str, str]:
+        raise NotImplementedError
+
+    def create_extractor(
+        self, metrics: Optional[MetricSet] = None
+    ) -> PageExtractor:
+        raise NotImplementedError(
+            f"Способ разбора '{self.name}' не поддерживает "
+            "инкрементальный разбор"
+        )
+
+    @staticmethod
+    def collect_metrics(
+        page_content: str, metrics: Optional[MetricSet]
+    ) -> None:
+        """Вычисляет метрики SEO одним проходом по странице."""
+
+        if metrics is None:
+            return
+
+        extractor = PageExtractor(metrics)
+        extractor.feed(page_content)
+        extractor.close()
+
+
+class SoupBackend(ParserBackend):
+    """Разбор деревом BeautifulSoup со встроенным парсером 'html.parser'."""
+
+    name = 'html.parser'
+
+    def extract(
+        self, page_content: str, metrics: Optional[MetricSet] = None
+    ) -> Tuple[str, str, str]:
+
+        self.collect_metrics(page_content, metrics)
+
+        soup = BeautifulSoup(page_content, 'html.parser')
+
+        h1_tag = soup.find('h1')
+        title_tag = soup.find('title')
+        desc_meta = soup.find('meta', attrs={'name': 'description'})
+
+        h1 = h1_tag.text if h1_tag else ''
+        title = title_tag.text if title_tag else ''
+        has_content = desc_meta and 'content' in desc_meta.attrs
+        description = desc_meta['content'] if has_content else ''
+
+        return h1, title, description
+
+
+class LxmlBackend(ParserBackend):
+    """
+    Разбор библиотекой lxml (libxml2).
+
+    Требует установленного пакета 'lxml'. На некорректной разметке
+    libxml2 может восстанавливать структуру документа иначе,
+    чем 'html.parser'.
+    """
+
+    name = 'lxml'
+
+    def extract(
+        self, page_content: str, metrics: Optional[MetricSet] = None
+    ) -> Tuple[str, str, str]:
+
+        self.collect_metrics(page_content, metrics)
+
+        if not page_content.strip():
+            return '', '', ''
+
+        document = lxml.html.document_fromstring(page_content)
+
+        h1_tag = document.find('.//h1')
+        title_tag = document.find('.//title')
+        desc_meta = document.find('.//meta[@name="description"]')
+
+        h1 = self._text(h1_tag) if h1_tag is not None else ''
+        title = self._text(title_tag) if title_tag is not None else ''
+        description = ''
+        if desc_meta is not None:
+            description = desc_meta.get('content') or ''
+
+        return h1, title, description
+
+    @classmethod
+    def _text(cls, element) -> str:
+        """
+        Возвращает текст элемента и его потомков без содержимого
+        script/style/template и комментариев (как 'Tag.text' в bs4).
+        """
+
+        if any(
+            ancestor.tag in NON_TEXT_ELEMENTS
+            for ancestor in element.iterancestors()
+        ):
+            return ''
+
+        parts = [element.text or '']
+
+        for child in element:
+            if isinstance(child.tag, str) and \
+                    child.tag not in NON_TEXT_ELEMENTS:
+                parts.append(cls._text(child))
+
+            parts.append(child.tail or '')
+
+        return ''.join(parts)
+
+
+class StreamBackend(ParserBackend):
+    """
+    Однопроходный разбор 'PageExtractor' без построения дерева.
+    Разбор прекращается, как только найдены все три поля.
+    """
+
+    name = 'stream'
+    incremental = True
+
+    def extract(
+        self, page_content: str, metrics: Optional[MetricSet] = None
+    ) -> Tuple[str, str, str]:
+
+        extractor = self.create_extractor(metrics)
+
+        # Передаем текст частями, чтобы не разбирать остаток страницы,
+        # когда все поля уже найдены (и метрики не вычисляются)
+        for start in range(0, len(page_content), STREAM_PARSE_CHUNK):
+            extractor.feed(page_content[start:start + STREAM_PARSE_CHUNK])
+
+            if extractor.complete:
+                break
+
+        extractor.close()
+
+        return extractor.result()
+
+    def create_extractor(
+        self, metrics: Optional[MetricSet] = None
+    ) -> PageExtractor:
+        return PageExtractor(metrics)
+
+
+# Доступные способы разбора HTML (значения 'Config.PARSER_BACKEND')
+BACKENDS: Dict[str, ParserBackend] = {
+    backend.name: backend
+    for backend in (SoupBackend(), LxmlBackend(), StreamBackend())
+}
+
+
+def available_backends() -> Dict[str, ParserBackend]:
+    """Возвращает способы разбора, зависимости которых установлены."""
+
+    return {
+        name: backend for name, backend in BACKENDS.items()
+        if name != LxmlBackend.name or lxml is not None
+    }
+
+
+def get_backend(name: str) -> ParserBackend:
+    """
+    Возвращает способ разбора HTML по имени.
+
+    Raises:
+        ValueError: Если способ разбора неизвестен или его
+            зависимости не установлены.
+    """
+
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Неизвестный способ разбора HTML: '{name}'. "
+            f"Доступны: {', '.join(BACKENDS)}"
+        )
+
+    if name not in available_backends():
+        raise ValueError(
+            f"Для способа разбора HTML '{name}' необходимо "
+            f"установить пакет '{name}'"
+        )
+
+    return BACKENDS[name]
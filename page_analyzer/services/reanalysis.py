@@ -0,0 +1,278 @@
+"""
+Повторный анализ сохраненных снимков страниц.
+
+Когда меняется извлечение полей ('PageAnalyzer.parse_page'), h1,
+title, description и метрики SEO старых проверок пересчитываются по
+снимкам страниц без повторной загрузки сайтов. Основной процесс
+выбирает проверки пачками и передает их пулу процессов
+('ProcessPoolExecutor'); процессы читают
+и распаковывают снимки, разбирают HTML и возвращают новые значения,
+которые записываются одним запросом на пачку. После каждой пачки номер
+последней проверки сохраняется в файл, поэтому прерванный проход
+продолжается с того же места.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from page_analyzer.config import Config
+from page_analyzer.repositories.check_history import CheckHistoryRepository
+from page_analyzer.repositories.url import content_hash
+from page_analyzer.services.parser import PageAnalyzer, truncate_field
+from page_analyzer.services.snapshot_store import create_snapshot_store
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# Хранилище снимков и способ разбора процесса пула ('init_worker')
+_worker_store = None
+_worker_parser_backend = None
+
+
+def init_worker(parser_backend: str) -> None:
+    """Инициализирует процесс пула: создает свое хранилище снимков."""
+
+    global _worker_store, _worker_parser_backend
+
+    _worker_store = create_snapshot_store()
+    _worker_parser_backend = parser_backend
+
+
+def analyze_batch(
+    checks: List[Tuple[int, Any, Optional[int], str, str]]
+) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Разбирает снимки пачки проверок (id, created_at, status_code,
+    snapshot_hash, url). Выполняется в процессе пула.
+
+    Returns:
+        Новые значения полей проверок, число проверок без снимка
+        (снимок удален при ограничении размера) и число снимков,
+        которые не удалось прочитать или разобрать.
+    """
+
+    rows = []
+    missing = failed = 0
+
+    for check_id, created_at, status_code, snapshot, url in checks:
+        try:
+            body = _worker_store.get(snapshot, touch=False)
+
+            if body is None:
+                missing += 1
+                continue
+
+            analyzer = PageAnalyzer(
+                url, parser_backend=_worker_parser_backend,
+                snapshot_store=_worker_store
+            )
+            analyzer.parse_page(body.decode('utf-8', errors='replace'))
+        except Exception as error:  # noqa Поврежденный снимок не должен останавливать проход
+            logger.warning(
+                "Функция 'analyze_batch', снимок '%s' проверки %s "
+                "не разобран: '%s'",
+                snapshot, check_id, error
+            )
+            failed += 1
+            continue
+
+        fields = {
+            'h1': truncate_field(analyzer.h1),
+            'title': truncate_field(analyzer.title),
+            'description': truncate_field(analyzer.description),
+        }
+        rows.append(dict(
+            fields,
+            id=check_id,
+            created_at=created_at,
+            content_hash=content_hash(dict(fields, status_code=status_code)),
+            seo_metrics=analyzer.seo_metrics
+        ))
+
+    return rows, missing, failed
+
+
+class ReanalysisReport:
+    """Итоги и скорость повторного анализа."""
+
+    def __init__(self, after_id: int = 0):
+        self.after_id = after_id  # noqa Проход начат после этой проверки (0 - с начала)
+        self.processed = 0
+        self.updated = 0
+        self.missing = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def add(self, processed: int, updated: int, missing: int,
+            failed: int) -> None:
+        self.processed += processed
+        self.updated += updated
+        self.missing += missing
+        self.failed += failed
+
+    @property
+    def pages_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started
+
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Краткий отчет для вывода в консоль."""
+
+        return (
+            f'Проверок обработано: {self.processed}, изменено: '
+            f'{self.updated}, без снимка: {self.missing}, с ошибкой '
+            f'разбора: {self.failed}. Время: '
+            f'{time.monotonic() - self.started:.1f} с, '
+            f'{self.pages_per_second:.1f} страниц/с'
+        )
+
+
+class Reanalyzer:
+    """
+    Повторный анализ снимков страниц всех проверок со снимком.
+
+    Одновременно в пуле находится не больше 2 * 'workers' пачек,
+    а результаты записываются в порядке пачек: контрольная точка
+    ('checkpoint_path') всегда указывает на проверку, до которой
+    включительно все пачки записаны.
+    """
+
+    def __init__(
+        self,
+        history_repo: CheckHistoryRepository,
+        workers: int = Config.REANALYZE_WORKERS,
+        batch_size: int = Config.REANALYZE_BATCH_SIZE,
+        checkpoint_path: str = Config.REANALYZE_CHECKPOINT,
+        parser_backend: str = Config.PARSER_BACKEND,
+        progress_interval: float = 10.0
+    ):
+        self.history_repo = history_repo
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.parser_backend = parser_backend
+        self.progress_interval = progress_interval
+
+    def run(self, restart: bool = False) -> ReanalysisReport:
+        """
+        Выполняет проход. Если есть контрольная точка прерванного
+        прохода (и не задан 'restart'), продолжает с нее. После
+        завершения прохода контрольная точка удаляется.
+        """
+
+        after_id = 0 if restart else self.load_checkpoint()
+        report = ReanalysisReport(after_id)
+        last_progress = time.monotonic()
+
+        logger.info(
+            "Класс: 'Reanalyzer', метод: 'run'. Повторный анализ снимков "
+            "с проверки %s, процессов: %s, размер пачки: %s",
+            after_id, self.workers, self.batch_size
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.parser_backend,)
+        ) as executor:
+            pending: Deque = deque()
+
+            while True:
+                after_id = self._submit(executor, pending, after_id)
+
+                if not pending:
+                    break
+
+                self._write_batch(pending.popleft(), report)
+
+                if time.monotonic() - last_progress >= self.progress_interval:
+                    last_progress = time.monotonic()
+                    self.log_progress(report)
+
+        self.remove_checkpoint()
+        self.log_progress(report)
+
+        return report
+
+    def _submit(self, executor, pending: Deque, after_id: int) -> int:
+        """
+        Выбирает следующие пачки проверок и передает их пулу, пока
+        в пуле меньше 2 * 'workers' пачек. Возвращает id последней
+        выбранной проверки.
+        """
+
+        while len(pending) < self.workers * 2:
+            checks = self.history_repo.find_snapshot_checks(
+                after_id, self.batch_size
+            )
+
+            if not checks:
+                break
+
+            after_id = checks[-1]['id']
+            batch = [
+                (check['id'], check['created_at'], check['status_code'],
+                 check['snapshot_hash'], check['url'])
+                for check in checks
+            ]
+            pending.append(
+                (after_id, len(batch), executor.submit(analyze_batch, batch))
+            )
+
+        return after_id
+
+    def _write_batch(self, item: Tuple, report: ReanalysisReport) -> None:
+        """Записывает результаты пачки и сохраняет контрольную точку."""
+
+        last_id, processed, future = item
+        rows, missing, failed = future.result()
+
+        updated = self.history_repo.update_check_fields(rows)
+
+        report.add(processed, updated, missing, failed)
+        self.save_checkpoint(last_id)
+
+    def log_progress(self, report: ReanalysisReport) -> None:
+        logger.info(
+            "Класс: 'Reanalyzer', метод: 'run'. %s", report.summary()
+        )
+
+    def load_checkpoint(self) -> int:
+        """Возвращает id последней записанной проверки (0 - с начала)."""
+
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as file:
+                return int(json.load(file)['last_id'])
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError, TypeError) as error:
+            logger.warning(
+                "Класс: 'Reanalyzer', метод: 'load_checkpoint'. "
+                "Контрольная точка '%s' повреждена ('%s'), проход "
+                "начинается с начала.",
+                self.checkpoint_path, error
+            )
+            return 0
+
+    def save_checkpoint(self, last_id: int) -> None:
+        """Записывает контрольную точку (через временный файл)."""
+
+        temp_path = f'{self.checkpoint_path}.tmp'
+
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'last_id': last_id, 'saved_at': time.time()}, file)
+
+        os.replace(temp_path, self.checkpoint_path)
+
+    def remove_checkpoint(self) -> None:
+
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,124 @@
+from datetime import date
+import logging
+from typing import List, Optional
+
+from page_analyzer.config import Config
+from page_analyzer.repositories.check_history import (
+    CheckHistoryRepository,
+    add_months
+)
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+class RetentionReport:
+    """Итоги обслуживания секций 'url_checks'."""
+
+    def __init__(self, dry_run: bool = False):
+        self.created: List[str] = []
+        self.dropped: List[str] = []
+        self.archived: List[str] = []
+        self.dry_run = dry_run
+
+    def summary(self) -> str:
+        """Краткий отчет для вывода в консоль."""
+
+        action = 'Будут удалены' if self.dry_run else 'Удалены'
+
+        lines = [
+            "Секции текущего и следующих месяцев: "
+            f"{', '.join(self.created) or '-'}",
+            f"{action} секции: {', '.join(self.dropped) or '-'}",
+        ]
+
+        if self.archived:
+            lines.append(f"Архивы: {', '.join(self.archived)}")
+
+        return '\n'.join(lines)
+
+
+class CheckRetention:
+    """
+    Обслуживание истории проверок: создает секции 'url_checks' на
+    'months_ahead' месяцев вперед (чтобы новые проверки не попадали
+    в секцию по умолчанию) и удаляет секции месяцев, закончившихся
+    раньше, чем 'retention_months' месяцев назад. Свернутые серии
+    проверок, повторявшиеся в пределах срока хранения, переносятся
+    из удаляемых секций (см. 'drop_partition'). Дневная сводка
+    'url_check_daily' при этом сохраняется.
+    """
+
+    def __init__(
+        self,
+        history_repo: CheckHistoryRepository,
+        retention_months: int = Config.CHECKS_RETENTION_MONTHS,
+        months_ahead: int = Config.CHECKS_PARTITIONS_AHEAD,
+        archive_dir: Optional[str] = Config.CHECKS_ARCHIVE_DIR
+    ):
+        self.history_repo = history_repo
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.archive_dir = archive_dir or None
+
+    def run(
+        self, today: Optional[date] = None, dry_run: bool = False
+    ) -> RetentionReport:
+        """
+        Выполняет обслуживание. При 'dry_run' секции не создаются
+        и не удаляются, а в отчет попадают секции, которые были бы
+        удалены.
+        """
+
+        today = today or date.today()
+        report = RetentionReport(dry_run=dry_run)
+
+        if not dry_run:
+            for months in range(self.months_ahead + 1):
+                report.created.append(
+                    self.history_repo.create_partition(
+                        add_months(today, months)
+                    )
+                )
+
+        for partition in self.expired_partitions(today):
+            report.dropped.append(partition['name'])
+
+            if dry_run:
+                continue
+
+            archive_path = self.history_repo.drop_partition(
+                partition['name'], archive_dir=self.archive_dir,
+                keep_since=self.cutoff(today)
+            )
+
+            if archive_path:
+                report.archived.append(archive_path)
+
+        logger.info(
+            "Класс: 'CheckRetention', метод: 'run'. "
+            "Секции созданы: %s, удалены: %s (dry_run: %s)",
+            report.created, report.dropped, dry_run
+        )
+
+        return report
+
+    def cutoff(self, today: date) -> date:
+        """Начало срока хранения: более ранние проверки удаляются."""
+
+        return add_months(today, -self.retention_months)
+
+    def expired_partitions(self, today: date) -> List[dict]:
+        """Секции месяцев, вышедших за срок хранения."""
+
+        if self.retention_months <= 0:
+            return []
+
+        # Секция месяца 'month' хранит строки до add_months(month, 1)
+        cutoff = self.cutoff(today)
+
+        return [
+            partition for partition in self.history_repo.find_partitions()
+            if add_months(partition['month'], 1) <= cutoff
+        ]
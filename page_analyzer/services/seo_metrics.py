@@ -0,0 +1,425 @@
+"""
+Метрики SEO страницы, вычисляемые за один проход по документу.
+
+Каждая метрика ('SeoMetric') подписывается на события разбора:
+открывающие и закрывающие теги из своих списков и текст. Набор метрик
+('MetricSet') получает события от 'PageExtractor' во время того же
+прохода, в котором извлекаются h1, title и description, и передает
+каждое событие только подписанным на него метрикам. Поэтому новая
+метрика добавляет к разбору лишь свои обработчики, а не еще один
+обход документа. Метрика, которой не нужна вся страница (например,
+данные из HEAD), сообщает об этом свойством 'done', и потоковая
+загрузка прекращается, как только все поля и все метрики готовы.
+Результаты сохраняются в столбец 'url_checks.seo_metrics' (JSONB):
+имя метрики -> ее значение.
+
+Метрики подключаются параметром 'SEO_METRICS': имена встроенных метрик
+или пути 'модуль:Класс' к классам-наследникам 'SeoMetric'.
+"""
+import importlib
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Type
+from urllib.parse import urlparse
+
+from page_analyzer.config import Config
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+HEADING_TAGS = frozenset(f'h{level}' for level in range(1, 7))
+
+# Сколько заголовков и символов заголовка сохраняется в структуре
+MAX_OUTLINE_HEADINGS = 20
+MAX_HEADING_TEXT = 100
+
+
+def rel_values(attrs: Dict[str, Optional[str]]) -> FrozenSet[str]:
+    """Значения атрибута rel тега (без учета регистра)."""
+
+    return frozenset((attrs.get('rel') or '').lower().split())
+
+
+class SeoMetric:
+    """
+    Интерфейс метрики SEO.
+
+    Метрика получает открывающие теги из 'start_tags' ('start'),
+    закрывающие теги из 'end_tags' ('end') и, если 'wants_data',
+    текст вне script/style/template ('data'). Метод 'result'
+    возвращает значение, сериализуемое в JSON. Экземпляр метрики
+    создается для каждой разбираемой страницы. Свойство 'done'
+    истинно, когда значение метрики больше не изменится (по умолчанию
+    метрике нужен весь документ).
+    """
+
+    name: str = ''
+    start_tags: FrozenSet[str] = frozenset()
+    end_tags: FrozenSet[str] = frozenset()
+    wants_data: bool = False
+
+    def __init__(self, url: str = ''):
+        self.url = url  # Адрес страницы
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        pass
+
+    def end(self, tag: str) -> None:
+        pass
+
+    def data(self, text: str) -> None:
+        pass
+
+    @property
+    def done(self) -> bool:
+        return False
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class HeadMetric(SeoMetric):
+    """
+    Метрика по тегам HEAD: готова, как только найдено значение или
+    закончился HEAD (закрыт HEAD или начат BODY). Наследники
+    подписываются на открытие BODY и закрытие HEAD.
+    """
+
+    end_tags = frozenset({'head'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.head_closed = False
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        if tag == 'body':
+            self.head_closed = True
+
+    def end(self, tag: str) -> None:
+
+        if tag == 'head':
+            self.head_closed = True
+
+    @property
+    def done(self) -> bool:
+        return self.head_closed or self.result() is not None
+
+
+# Зарегистрированные метрики (значения 'Config.SEO_METRICS')
+METRICS: Dict[str, Type[SeoMetric]] = {}
+
+
+def register_metric(metric: Type[SeoMetric]) -> Type[SeoMetric]:
+    """Регистрирует класс метрики под ее именем (можно как декоратор)."""
+
+    METRICS[metric.name] = metric
+
+    return metric
+
+
+@register_metric
+class CanonicalMetric(HeadMetric):
+    """Адрес первого LINK rel="canonical" в HEAD или None."""
+
+    name = 'canonical'
+    start_tags = frozenset({'link', 'body'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.href: Optional[str] = None
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        super().start(tag, attrs)
+
+        if self.done:
+            return
+
+        if 'canonical' in rel_values(attrs):
+            self.href = (attrs.get('href') or '').strip()
+
+    def result(self) -> Optional[str]:
+        return self.href
+
+
+@register_metric
+class RobotsMetric(HeadMetric):
+    """
+    Директивы первого META name="robots" в HEAD и признаки noindex
+    и nofollow (директива 'none' означает обе). None, если тега нет.
+    """
+
+    name = 'robots'
+    start_tags = frozenset({'meta', 'body'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.directives: Optional[List[str]] = None
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        super().start(tag, attrs)
+
+        if self.done:
+            return
+
+        if (attrs.get('name') or '').lower() == 'robots':
+            self.directives = [
+                directive.strip().lower()
+                for directive in (attrs.get('content') or '').split(',')
+                if directive.strip()
+            ]
+
+    def result(self) -> Optional[Dict[str, Any]]:
+
+        if self.directives is None:
+            return None
+
+        return {
+            'directives': self.directives,
+            'noindex': bool({'noindex', 'none'} & set(self.directives)),
+            'nofollow': bool({'nofollow', 'none'} & set(self.directives)),
+        }
+
+
+@register_metric
+class LinksMetric(SeoMetric):
+    """
+    Число ссылок (A с атрибутом href): всего, на страницы того же хоста
+    (в том числе относительных), на другие хосты и с rel="nofollow".
+    Ссылки mailto:, tel:, javascript: и т.п. учитываются только в 'total'.
+    """
+
+    name = 'links'
+    start_tags = frozenset({'a'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.host = urlparse(url).netloc.lower()
+        self.counts = {'total': 0, 'internal': 0, 'external': 0,
+                       'nofollow': 0}
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        href = attrs.get('href')
+
+        if href is None:
+            return
+
+        self.counts['total'] += 1
+
+        if 'nofollow' in rel_values(attrs):
+            self.counts['nofollow'] += 1
+
+        target = urlparse(href.strip())
+
+        if target.scheme and target.scheme.lower() not in ('http', 'https'):
+            return
+
+        if target.netloc and target.netloc.lower() != self.host:
+            self.counts['external'] += 1
+        else:
+            self.counts['internal'] += 1
+
+    def result(self) -> Dict[str, int]:
+        return self.counts
+
+
+@register_metric
+class ImagesMetric(SeoMetric):
+    """
+    Число изображений (IMG): всего, без атрибута alt и с пустым alt
+    (пустой alt допустим для декоративных изображений).
+    """
+
+    name = 'images'
+    start_tags = frozenset({'img'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.counts = {'total': 0, 'missing_alt': 0, 'empty_alt': 0}
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        self.counts['total'] += 1
+
+        if 'alt' not in attrs:
+            self.counts['missing_alt'] += 1
+        elif not (attrs['alt'] or '').strip():
+            self.counts['empty_alt'] += 1
+
+    def result(self) -> Dict[str, int]:
+        return self.counts
+
+
+@register_metric
+class HeadingsMetric(SeoMetric):
+    """
+    Структура заголовков H1-H6: число заголовков каждого уровня, число
+    пропусков уровня (например, H4 сразу после H2) и первые
+    MAX_OUTLINE_HEADINGS заголовков (уровень и текст).
+    """
+
+    name = 'headings'
+    start_tags = HEADING_TAGS
+    end_tags = HEADING_TAGS
+    wants_data = True
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.counts = dict.fromkeys(sorted(HEADING_TAGS), 0)
+        self.skipped_levels = 0
+        self.outline: List[List[Any]] = []
+        self._previous_level = 0
+        self._level = 0  # Уровень заголовка, текст которого собирается
+        self._parts: List[str] = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+
+        level = int(tag[1])
+        self.counts[tag] += 1
+
+        if self._previous_level and level > self._previous_level + 1:
+            self.skipped_levels += 1
+
+        self._previous_level = level
+
+        # Незакрытый заголовок заканчивается там, где начинается следующий
+        self._finish_heading()
+        self._level = level
+
+    def end(self, tag: str) -> None:
+
+        if int(tag[1]) == self._level:
+            self._finish_heading()
+
+    def data(self, text: str) -> None:
+
+        if self._level:
+            self._parts.append(text)
+
+    def result(self) -> Dict[str, Any]:
+
+        self._finish_heading()
+
+        return {
+            'counts': self.counts,
+            'skipped_levels': self.skipped_levels,
+            'outline': self.outline,
+        }
+
+    def _finish_heading(self) -> None:
+
+        if not self._level:
+            return
+
+        if len(self.outline) < MAX_OUTLINE_HEADINGS:
+            text = ' '.join(''.join(self._parts).split())
+            self.outline.append([self._level, text[:MAX_HEADING_TEXT]])
+
+        self._level = 0
+        self._parts = []
+
+
+class MetricSet:
+    """
+    Набор метрик одной страницы. Передает события разбора только
+    метрикам, подписанным на них: обработка тега, на который никто
+    не подписан, сводится к одному поиску в словаре.
+    """
+
+    def __init__(self, metrics: List[SeoMetric]):
+        self.metrics = metrics
+
+        self._start_handlers: Dict[str, List[SeoMetric]] = {}
+        self._end_handlers: Dict[str, List[SeoMetric]] = {}
+        self._data_handlers = [
+            metric for metric in metrics if metric.wants_data
+        ]
+
+        for metric in metrics:
+            for tag in metric.start_tags:
+                self._start_handlers.setdefault(tag, []).append(metric)
+
+            for tag in metric.end_tags:
+                self._end_handlers.setdefault(tag, []).append(metric)
+
+    def start(self, tag: str, attrs) -> None:
+
+        metrics = self._start_handlers.get(tag)
+
+        if metrics:
+            attributes = dict(attrs)
+
+            for metric in metrics:
+                metric.start(tag, attributes)
+
+    def end(self, tag: str) -> None:
+
+        for metric in self._end_handlers.get(tag, ()):
+            metric.end(tag)
+
+    def data(self, text: str) -> None:
+
+        for metric in self._data_handlers:
+            metric.data(text)
+
+    @property
+    def done(self) -> bool:
+        """Значения всех метрик больше не изменятся."""
+
+        return all(metric.done for metric in self.metrics)
+
+    def results(self) -> Dict[str, Any]:
+        """Значения всех метрик: имя метрики -> результат."""
+
+        return {metric.name: metric.result() for metric in self.metrics}
+
+
+def get_metric(name: str) -> Type[SeoMetric]:
+    """
+    Возвращает класс метрики по имени зарегистрированной метрики или
+    по пути 'модуль:Класс'.
+
+    Raises:
+        ValueError: Если метрика неизвестна.
+    """
+
+    if name in METRICS:
+        return METRICS[name]
+
+    if ':' in name:
+        module_name, _, class_name = name.partition(':')
+
+        try:
+            return getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as error:
+            raise ValueError(
+                f"Не удалось загрузить метрику '{name}': {error}"
+            ) from error
+
+    raise ValueError(
+        f"Неизвестная метрика SEO: '{name}'. "
+        f"Доступны: {', '.join(METRICS)}"
+    )
+
+
+def create_metric_set(
+    names: Optional[Iterable[str]] = None, url: str = ''
+) -> Optional[MetricSet]:
+    """
+    Создает набор метрик для страницы 'url'. По умолчанию набор
+    задается параметром 'SEO_METRICS' (имена через запятую). Если
+    метрики не заданы, возвращает None.
+    """
+
+    if names is None:
+        names = Config.SEO_METRICS.split(',')
+
+    names = [name.strip() for name in names if name.strip()]
+
+    if not names:
+        return None
+
+    return MetricSet([get_metric(name)(url) for name in names])
@@ -0,0 +1,385 @@
+"""
+Хранилище снимков загруженных страниц.
+
+Тело страницы сжимается (zstd или gzip) и сохраняется под SHA-256
+исходного содержимого, поэтому одинаковые страницы хранятся один раз,
+а проверки ('url_checks.snapshot_hash') ссылаются на снимок по хешу.
+Снимки позволяют извлечь из страниц новые данные без повторной
+загрузки. Общий размер снимков ограничен: при превышении удаляются
+снимки, которые дольше всех не сохранялись и не читались (LRU), поэтому
+снимок старой проверки может отсутствовать.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from page_analyzer.config import Config
+
+try:
+    import zstandard
+except ImportError:  # zstandard - необязательная зависимость
+    zstandard = None
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+# noqa Доля предельного размера: после записи такого объема снимков выполняется вытеснение
+EVICTION_STEP = 0.05
+
+_Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+
+def _zstd_codec() -> _Codec:
+
+    def compress(data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+
+    def decompress(data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    return compress, decompress
+
+
+def _gzip_codec() -> _Codec:
+
+    def compress(data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=6)
+
+    return compress, gzip.decompress
+
+
+def get_codec(name: str) -> Tuple[str, _Codec]:
+    """
+    Возвращает имя и функции сжатия и распаковки кодека ('zstd',
+    'gzip' или 'auto' - zstd, если установлен пакет 'zstandard').
+
+    Raises:
+        ValueError: Если кодек неизвестен или для 'zstd' не установлен
+            пакет 'zstandard'.
+    """
+
+    if name == 'auto':
+        name = 'zstd' if zstandard is not None else 'gzip'
+
+    if name == 'gzip':
+        return name, _gzip_codec()
+
+    if name == 'zstd':
+        if zstandard is None:
+            raise ValueError(
+                "Для сжатия снимков 'zstd' необходимо установить "
+                "пакет 'zstandard'"
+            )
+        return name, _zstd_codec()
+
+    raise ValueError(
+        f"Неизвестный способ сжатия снимков: '{name}'. "
+        "Доступны: zstd, gzip, auto"
+    )
+
+
+def snapshot_hash(body: bytes) -> str:
+    """Хеш содержимого страницы (SHA-256, 64 шестнадцатеричных символа)."""
+
+    return hashlib.sha256(body).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Интерфейс хранилища снимков.
+
+    'put' сжимает и сохраняет тело страницы и возвращает его хеш,
+    'get' возвращает исходное тело по хешу или None.
+    """
+
+    name: str = ''
+
+    def __init__(
+        self,
+        max_bytes: int = Config.SNAPSHOT_MAX_BYTES,
+        compression: str = Config.SNAPSHOT_COMPRESSION
+    ):
+        self.max_bytes = max_bytes
+        self.codec, (self._compress, _) = get_codec(compression)
+
+        self._lock = threading.Lock()
+        self._written = 0  # noqa Байт записано после последнего вытеснения
+        self._stats = {'stored': 0, 'deduplicated': 0, 'evicted': 0}
+
+    def put(self, body: bytes) -> str:
+        """Сохраняет тело страницы и возвращает его хеш."""
+
+        hash = snapshot_hash(body)
+
+        if self._touch(hash):
+            self._count('deduplicated')
+            return hash
+
+        data = self._compress(body)
+        stored = self._save(hash, len(body), data)
+        self._count('stored' if stored else 'deduplicated')
+
+        if stored:
+            self._after_write(len(data))
+
+        return hash
+
+    def get(self, hash: str, touch: bool = True) -> Optional[bytes]:
+        """
+        Возвращает тело страницы по хешу или None. При 'touch=False'
+        время использования снимка не обновляется (массовое чтение
+        снимков не должно вытеснять из хранилища недавние).
+        """
+
+        found = self._load(hash, touch)
+
+        if found is None:
+            return None
+
+        codec, data = found
+        _, (_, decompress) = get_codec(codec)
+
+        return decompress(data)
+
+    def evict(self) -> int:
+        """
+        Удаляет давно не использовавшиеся снимки, пока их общий размер
+        больше 'max_bytes'.
+
+        Returns:
+            Количество удаленных снимков.
+        """
+
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики сохраненных, повторных и вытесненных снимков."""
+
+        with self._lock:
+            return dict(self._stats, backend=self.name)
+
+    def _touch(self, hash: str) -> bool:
+        """
+        Обновляет время использования сохраненного снимка. Возвращает
+        False, если снимка нет (или хранилище не проверяет заранее).
+        """
+
+        return False
+
+    def _save(self, hash: str, size: int, data: bytes) -> bool:
+        raise NotImplementedError
+
+    def _load(self, hash: str, touch: bool) -> Optional[Tuple[str, bytes]]:
+        raise NotImplementedError
+
+    def _count(self, event: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[event] += value
+
+    def _after_write(self, stored_size: int) -> None:
+        """Запускает вытеснение после записи очередной доли предела."""
+
+        with self._lock:
+            self._written += stored_size
+
+            if self._written < self.max_bytes * EVICTION_STEP:
+                return
+
+            self._written = 0
+
+        self._count('evicted', self.evict())
+
+
+class FileSnapshotStore(SnapshotStore):
+    """
+    Снимки в файлах каталога 'directory':
+    '<directory>/<хеш[:2]>/<хеш>.<кодек>'. Время использования снимка -
+    время изменения файла (обновляется при повторном сохранении и
+    чтении), поэтому каталог может быть общим для нескольких процессов.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, directory: str = Config.SNAPSHOT_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def evict(self) -> int:
+
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+            evicted += 1
+
+        if evicted:
+            logger.info(
+                "Класс: 'FileSnapshotStore', метод: 'evict'. "
+                "Удалено снимков: %s, размер снимков: %s байт",
+                evicted, total
+            )
+
+        return evicted
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Время изменения, размер и путь каждого снимка каталога."""
+
+        files = []
+
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue  # Снимок, который сейчас записывается
+
+                path = os.path.join(root, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((status.st_mtime, status.st_size, path))
+
+        return files
+
+    def _path(self, hash: str, codec: str) -> str:
+        return os.path.join(self.directory, hash[:2], f'{hash}.{codec}')
+
+    def _touch(self, hash: str) -> bool:
+
+        try:
+            os.utime(self._path(hash, self.codec))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _save(self, hash: str, size: int, data: bytes) -> bool:
+
+        path = self._path(hash, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # noqa Запись во временный файл и переименование: читатель не увидит неполный снимок
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.tmp'
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return True
+
+    def _load(self, hash: str, touch: bool) -> Optional[Tuple[str, bytes]]:
+
+        # Снимок мог быть сохранен до смены SNAPSHOT_COMPRESSION
+        for codec in dict.fromkeys((self.codec, 'zstd', 'gzip')):
+            path = self._path(hash, codec)
+
+            try:
+                with open(path, 'rb') as file:
+                    data = file.read()
+            except FileNotFoundError:
+                continue
+
+            if touch:
+                os.utime(path)
+
+            return codec, data
+
+        return None
+
+
+class DatabaseSnapshotStore(SnapshotStore):
+    """Снимки в таблице 'page_snapshots' (см. 'SnapshotRepository')."""
+
+    name = 'database'
+
+    def __init__(self, snapshot_repo, **kwargs):
+        super().__init__(**kwargs)
+        self.snapshot_repo = snapshot_repo
+
+    def evict(self) -> int:
+
+        return self.snapshot_repo.evict_snapshots(self.max_bytes)
+
+    def _save(self, hash: str, size: int, data: bytes) -> bool:
+
+        return self.snapshot_repo.save_snapshot(hash, self.codec, size, data)
+
+    def _load(self, hash: str, touch: bool) -> Optional[Tuple[str, bytes]]:
+
+        found = self.snapshot_repo.find_snapshot(hash, touch=touch)
+
+        return (found['codec'], found['data']) if found else None
+
+
+def create_snapshot_store(
+    backend: Optional[str] = None
+) -> Optional[SnapshotStore]:
+    """
+    Создает хранилище снимков по имени ('filesystem', 'database' или
+    'none'). Для 'none' возвращает None.
+
+    Raises:
+        ValueError: Если хранилище или способ сжатия неизвестны.
+    """
+
+    backend = backend or Config.SNAPSHOT_BACKEND
+
+    if backend == 'none':
+        return None
+
+    if backend == FileSnapshotStore.name:
+        return FileSnapshotStore()
+
+    if backend == DatabaseSnapshotStore.name:
+        from page_analyzer.db_connections.connection_manager import (
+            ConnectionPool
+        )
+        from page_analyzer.repositories.snapshot import SnapshotRepository
+
+        return DatabaseSnapshotStore(
+            SnapshotRepository(ConnectionPool(Config.DATABASE_URL))
+        )
+
+    raise ValueError(
+        f"Неизвестное хранилище снимков: '{backend}'. "
+        "Доступны: filesystem, database, none"
+    )
+
+
+_snapshot_store: Optional[SnapshotStore] = None
+_snapshot_store_created = False
+_snapshot_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """
+    Возвращает общее для процесса хранилище снимков (SNAPSHOT_BACKEND)
+    или None, если снимки не сохраняются.
+    """
+
+    global _snapshot_store, _snapshot_store_created
+
+    with _snapshot_store_lock:
+        if not _snapshot_store_created:
+            _snapshot_store = create_snapshot_store()
+            _snapshot_store_created = True
+
+        return _snapshot_store
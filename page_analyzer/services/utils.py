@@ -4,6 +4,9 @@ from urllib.parse import urlparse
 import validators
 from flask import abort
 
+from page_analyzer.db_connections.connection_manager import (
+    release_unit_of_work
+)
 from page_analyzer.services.parser import PageAnalyzer
 
 # Получение логгера с именем текущего модуля для записи логов
@@ -23,8 +26,9 @@ def handle_new_url(
     """
 
     logger.debug("Функция: 'handle_new_url'. Полученный URL: %s", url)
-    # Нормализуем URL
-    normalize_url = '://'.join(urlparse(url)[:2])
+    # noqa Нормализуем URL: схема и хост не зависят от регистра (схему приводит urlparse)
+    parsed_url = urlparse(url)
+    normalize_url = f'{parsed_url.scheme}://{parsed_url.netloc.lower()}'
 
     logger.debug(
         "Функция: 'handle_new_url'. Нормализованный URL: %s",
@@ -85,8 +89,14 @@ def handle_checks_url(
         "Функция: 'handle_checks_url'. Найденная информация о URL: %s",
         info_url
     )
+    # noqa Последняя проверка нужна для условного запроса (ETag / Last-Modified)
+    last_check = url_repo.find_last_check(url_id)
+
+    # noqa Не держим соединение с открытой транзакцией, пока загружается страница
+    release_unit_of_work()
+
     # Создаем объект анализатора страницы с использованием извлеченного URL
-    analyzer = PageAnalyzer(info_url['name'])
+    analyzer = PageAnalyzer(info_url['name'], last_check=last_check)
     # Получаем содержимое страницы и проверяем наличие ошибок
     errors = analyzer.get_page_content()
 
@@ -100,16 +110,13 @@ def handle_checks_url(
         )
     else:
         logger.debug(
-            "Функция: 'handle_checks_url'. Полученный статус кода: '%s'",
-            analyzer.status_code
+            "Функция: 'handle_checks_url'. Полученный статус кода: '%s', "
+            "страница не изменилась (ответ 304): %s",
+            analyzer.status_code, analyzer.conditional_hit
         )
 
         status_save_url = url_repo.save_checks_url(
-            url_id,
-            analyzer.status_code,
-            analyzer.h1,
-            analyzer.title,
-            analyzer.description
+            url_id, analyzer.to_check()
         )
 
         if status_save_url:
@@ -131,6 +138,45 @@ def handle_checks_url(
     return message, category
 
 
+def handle_enqueue_check(
+    url_id: int, url_repo, job_repo
+) -> tuple[str, str]:
+
+    """
+    Ставит проверку URL в очередь фоновых проверок.
+
+    Саму проверку выполняет воркер ('page_analyzer.worker'),
+    поэтому обработчик запроса не ждет ответа проверяемого сайта.
+
+    Returns:
+        Сообщение о результате постановки в очередь и его категорию.
+    """
+
+    logger.debug(
+        "Функция: 'handle_enqueue_check'. Полученный URL_ID: %s", url_id
+    )
+
+    if not url_repo.find_url(url_id):
+        logger.error(
+            "Функция: 'handle_enqueue_check'. Не найден URL для ID: %s",
+            url_id
+        )
+        return 'Не удалось найти URL', 'danger'
+
+    created, job_id = job_repo.enqueue(url_id)
+
+    logger.info(
+        "Функция: 'handle_enqueue_check'. URL_ID: %s, задание: %s, "
+        "создано новое: %s",
+        url_id, job_id, created
+    )
+
+    if created:
+        return 'Проверка поставлена в очередь', 'info'
+
+    return 'Проверка уже находится в очереди', 'info'
+
+
 def validate(url: str) -> dict:
     """
     Проверяет корректность указанного URL.
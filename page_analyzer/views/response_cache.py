@@ -0,0 +1,124 @@
+from functools import wraps
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from flask import current_app, make_response, request, session
+
+from page_analyzer.services.cache import MISSING
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+_templates_fingerprint: Optional[str] = None
+
+
+def templates_fingerprint() -> str:
+    """
+    Возвращает хэш содержимого шаблонов приложения.
+
+    Хэш входит в ETag, чтобы после изменения шаблонов (новой версии
+    приложения) браузеры не получали 304 для старой разметки. Он
+    одинаков во всех процессах, запущенных из одних и тех же файлов.
+    """
+
+    global _templates_fingerprint
+
+    if _templates_fingerprint is None:
+        digest = hashlib.md5()
+        templates = Path(current_app.root_path) / current_app.template_folder
+
+        for path in sorted(templates.glob('*.html')):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+
+        _templates_fingerprint = digest.hexdigest()
+
+    return _templates_fingerprint
+
+
+def cached_response(*version_names: str) -> Callable:
+    """
+    Декоратор GET-обработчика: кэширует отрисованную страницу и
+    отвечает 304, если ETag из 'If-None-Match' совпадает.
+
+    ETag (и ключ кэша) строится из версий страницы, отпечатка шаблонов
+    и пути запроса с параметрами, поэтому для проверки ETag достаточно
+    одного чтения версий, без запросов данных и отрисовки шаблона.
+
+    Страницы с ожидающими flash-сообщениями не кэшируются: сообщение
+    показывается один раз и не должно попасть в кэш.
+
+    Params:
+        version_names: Имена версий из таблицы 'cache_versions';
+            могут содержать аргументы обработчика, например 'url:{id}'.
+    """
+
+    def decorator(view: Callable) -> Callable:
+
+        @wraps(view)
+        def wrapper(**kwargs):
+
+            if '_flashes' in session:
+                response = make_response(view(**kwargs))
+                response.headers['Cache-Control'] = 'no-store'
+
+                return response
+
+            names = [name.format(**kwargs) for name in version_names]
+            versions = current_app.cache_version_repo.get_versions(names)
+
+            key = ':'.join(
+                [templates_fingerprint(), request.full_path]
+                + [f'{name}={versions[name]}' for name in names]
+            )
+            etag = hashlib.md5(key.encode()).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                logger.debug(
+                    "Декоратор 'cached_response'. Обработчик '%s'. "
+                    "ETag совпадает, ответ 304: %s",
+                    view.__name__, etag
+                )
+                response = current_app.response_class(status=304)
+            else:
+                response = _render(view, kwargs, f'response:{etag}')
+
+            response.set_etag(etag)
+            # Клиент и прокси хранят ответ, но каждый раз проверяют ETag
+            response.headers['Cache-Control'] = 'no-cache'
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _render(view: Callable, kwargs: dict, key: str):
+    """
+    Возвращает ответ обработчика из кэша или вызывает обработчик
+    и кэширует успешный ответ.
+    """
+
+    cache = current_app.response_cache
+
+    if cache is not None:
+        body = cache.get(key)
+
+        if body is not MISSING:
+            logger.debug(
+                "Декоратор 'cached_response'. Обработчик '%s'. "
+                "Страница получена из кэша: %s",
+                view.__name__, key
+            )
+            return make_response(body)
+
+    response = make_response(view(**kwargs))
+
+    if cache is not None and response.status_code == 200:
+        cache.set(key, response.get_data())
+
+    return response
@@ -8,14 +8,23 @@ from flask import (
     url_for,
     redirect,
     request,
-    flash
+    flash,
+    jsonify
 )
 
+from page_analyzer.repositories.cache_version import URLS_VERSION
+from page_analyzer.repositories.pagination import (
+    clamp_page_size,
+    decode_cursor
+)
+from page_analyzer.services.bulk_check import start_background_check
 from page_analyzer.services.utils import (
     handle_new_url,
     handle_checks_url,
+    handle_enqueue_check,
     validate
 )
+from page_analyzer.views.response_cache import cached_response
 
 
 # Получение логгера с именем текущего модуля для записи логов
@@ -24,6 +33,37 @@ logger = logging.getLogger(__name__)
 url_blueprint = Blueprint('url', __name__)
 
 
+def page_args(default_size: int) -> dict:
+    """
+    Извлекает параметры страницы из строки запроса: курсоры 'after'
+    или 'before' и размер страницы 'per_page'.
+
+    Некорректный курсор приводит к ошибке 400.
+    """
+
+    after = request.args.get('after') or None
+    before = None if after else request.args.get('before') or None
+
+    for cursor in (after, before):
+        if cursor is None:
+            continue
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            logger.warning(
+                "Функция: 'page_args'. Некорректный курсор: '%s'", cursor
+            )
+            abort(400)
+
+    limit = clamp_page_size(
+        request.args.get('per_page', type=int),
+        default_size,
+        current_app.config['MAX_PAGE_SIZE']
+    )
+
+    return {'limit': limit, 'after': after, 'before': before}
+
+
 @url_blueprint.route('/', methods=['GET'])
 def home():
     """
@@ -36,6 +76,7 @@ def home():
 
 
 @url_blueprint.route('/urls', methods=['GET'])
+@cached_response(URLS_VERSION)
 def get_url():
     """
     Обработчик для получения и отображения всех сохранённых URL.
@@ -46,9 +87,14 @@ def get_url():
 
     logger.info("Обработчик: 'get_urls'. Метод: 'GET'")
 
-    all_urls = current_app.url_repo.show_urls()  # noqa На GET-запрос выводим все существующие URL-ы.
+    # На GET-запрос выводим страницу существующих URL-ов.
+    all_urls = current_app.url_repo.show_urls(
+        **page_args(current_app.config['URLS_PAGE_SIZE'])
+    )
 
-    logger.debug("Обработчик: 'get_urls'. Показ всех URL-ов: %s", all_urls)
+    logger.debug(
+        "Обработчик: 'get_urls'. Показ URL-ов на странице: %s", len(all_urls)
+    )
 
     return render_template('all_urls.html', urls=all_urls)  # noqa Возвращаем шаблон со списком URL-ов
 
@@ -96,7 +142,41 @@ def post_url():
     return redirect(url_for('url.show_url', id=url_id))  # noqa Перенаправляем на страницу с полученным из формы URL.
 
 
+@url_blueprint.route('/urls/checks', methods=['POST'])
+def checks_all_urls():
+    """
+    Обработчик массовой проверки всех сохранённых URL.
+
+    Обработчик не ждет загрузки страниц: проверки всех URL ставятся
+    в очередь фоновых проверок, а если очередь отключена, массовая
+    проверка ('BulkChecker') запускается в фоновом потоке. Дождаться
+    итогов проверки можно командой 'page_analyzer check-all'.
+    """
+
+    logger.info("Обработчик: 'checks_all_urls'. Метод: 'POST'")
+
+    if current_app.config['CHECK_QUEUE_ENABLED']:
+        created = current_app.check_job_repo.enqueue_all()
+        message = f'Проверки поставлены в очередь: {created}'
+        category = 'info'
+    elif start_background_check(current_app.url_repo):
+        message = 'Проверка всех URL запущена в фоне'
+        category = 'info'
+    else:
+        message = 'Проверка всех URL уже выполняется'
+        category = 'warning'
+
+    logger.info(
+        "Обработчик: 'checks_all_urls'. Сообщение: '%s'", message
+    )
+
+    flash(message, category)
+
+    return redirect(url_for('url.get_url'))
+
+
 @url_blueprint.route('/urls/<int:id>', methods=['GET'])
+@cached_response('url:{id}')
 def show_url(id):
     """
     Обработчик для отображения деталей URL по его ID.
@@ -126,18 +206,30 @@ def show_url(id):
         id, info_url
     )
     # Получаем данные о проверках для данного URL
-    info_checks_url = current_app.url_repo.find_checks_urll(id)
+    info_checks_url = current_app.url_repo.find_checks_urll(
+        id, **page_args(current_app.config['CHECKS_PAGE_SIZE'])
+    )
 
-    logger.info(
+    logger.debug(
         "Обработчик: 'show_url'. "
         "Получены данные о проверке URL с ID: %s, данные: %s",
-        id, info_checks_url
+        id, info_checks_url.items
+    )
+
+    # Получаем состояние последних заданий в очереди проверок
+    check_jobs = current_app.check_job_repo.find_jobs_url(id)
+
+    # noqa Длинная история выводится по дням из сводки, а не из строк url_checks
+    daily_checks = current_app.url_repo.find_daily_checks(
+        id, limit=current_app.config['DAILY_CHECKS_DAYS']
     )
 
     return render_template(
         'url_detail.html',
         url=info_url,
-        checks_url=info_checks_url
+        checks_url=info_checks_url,
+        check_jobs=check_jobs,
+        daily_checks=daily_checks
     )
 
 
@@ -151,8 +243,14 @@ def checks_url(url_id):
         "Обработчик: 'checks_url'. Метод: '%s'. Проверка URL с ID: %s",
         request.method, url_id
     )
-    # Вызываем функцию проверки URL и получаем сообщение о результате
-    message, category = handle_checks_url(url_id, current_app.url_repo)
+    if current_app.config['CHECK_QUEUE_ENABLED']:
+        # Ставим проверку в очередь, ее выполнит фоновый воркер
+        message, category = handle_enqueue_check(
+            url_id, current_app.url_repo, current_app.check_job_repo
+        )
+    else:
+        # noqa Вызываем функцию проверки URL и получаем сообщение о результате
+        message, category = handle_checks_url(url_id, current_app.url_repo)
 
     logger.info(
         "Обработчик: 'checks_url'. "
@@ -163,3 +261,15 @@ def checks_url(url_id):
     flash(message, category)
     # Перенаправляем на страницу с деталями проверяемого URL
     return redirect(url_for('url.show_url', id=url_id))
+
+
+@url_blueprint.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Возвращает в JSON счетчики кэша URL текущего процесса:
+    попадания, промахи, вытеснения и инвалидации.
+    """
+
+    get_stats = getattr(current_app.url_repo, 'cache_stats', None)
+
+    return jsonify(get_stats() if get_stats else {'backend': 'none'})
@@ -0,0 +1,105 @@
+import logging
+import time
+
+from page_analyzer.config import Config
+from page_analyzer.services.utils import handle_checks_url
+
+
+# Получение логгера с именем текущего модуля для записи логов
+logger = logging.getLogger(__name__)
+
+
+class CheckWorker:
+    """
+    Воркер очереди фоновых проверок.
+
+    Забирает задания из таблицы 'check_jobs', выполняет проверку URL
+    через 'handle_checks_url' и сохраняет итоговое состояние задания.
+    Можно запускать несколько воркеров одновременно.
+    """
+
+    def __init__(
+        self, url_repo, job_repo,
+        poll_interval: float = Config.CHECK_WORKER_POLL_INTERVAL,
+        job_timeout: int = Config.CHECK_JOB_TIMEOUT
+    ):
+        self.url_repo = url_repo
+        self.job_repo = job_repo
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+
+    def run_once(self) -> bool:
+        """
+        Выполняет одно задание из очереди.
+
+        Returns:
+            True, если задание было выполнено, и False, если очередь пуста.
+        """
+
+        job = self.job_repo.claim_job()
+
+        if not job:
+            return False
+
+        logger.info(
+            "Класс: 'CheckWorker', метод: 'run_once'. "
+            "Начата проверка URL с ID: %s, задание: %s",
+            job['url_id'], job['id']
+        )
+
+        try:
+            message, category = handle_checks_url(
+                job['url_id'], self.url_repo
+            )
+        except Exception as error:
+            logger.error(
+                "Класс: 'CheckWorker', метод: 'run_once'. "
+                "Ошибка при выполнении задания %s: %s",
+                job['id'], error, exc_info=True
+            )
+            message, category = 'Ошибка при сохранении проверки', 'danger'
+
+        status = (
+            self.job_repo.DONE if category == 'success'
+            else self.job_repo.FAILED
+        )
+        self.job_repo.finish_job(job['id'], status, message)
+
+        return True
+
+    def run_forever(self) -> None:
+        """
+        Обрабатывает задания, пока процесс не будет остановлен сигналом.
+
+        Зависшие задания периодически возвращаются в очередь.
+        """
+
+        logger.info(
+            "Класс: 'CheckWorker', метод: 'run_forever'. Воркер запущен."
+        )
+
+        last_requeue = 0.0
+
+        while True:
+            if time.monotonic() - last_requeue > self.job_timeout:
+                self.job_repo.requeue_stale_jobs(self.job_timeout)
+                last_requeue = time.monotonic()
+
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+
+def main() -> None:
+    """Точка входа воркера: 'python -m page_analyzer.worker'."""
+
+    from page_analyzer import app
+    from page_analyzer.metrics import start_flusher
+
+    if app.config['METRICS_ENABLED']:
+        start_flusher()  # noqa Метрики загрузки и разбора страниц попадают в общий /metrics
+
+    CheckWorker(app.url_repo, app.check_job_repo).run_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+База данных PostgreSQL для тестов репозиториев.
+
+Тесты с базой данных выполняются, только если задана переменная
+окружения TEST_DATABASE_URL - адрес отдельной тестовой базы: перед
+каждым тестом схема public этой базы удаляется и создается заново
+из 'database.sql'. Без TEST_DATABASE_URL такие тесты пропускаются.
+"""
+import os
+from pathlib import Path
+import unittest
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from page_analyzer.db_connections.connection_manager import ConnectionPool
+
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+SCHEMA_PATH = Path(__file__).parent.parent / 'database.sql'
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, 'не задан TEST_DATABASE_URL')
+class PostgresTestCase(unittest.TestCase):
+    """
+    Тест с чистой базой данных: 'self.pool' - пул соединений
+    с тестовой базой, 'query' выполняет запрос вне репозиториев.
+    """
+
+    def setUp(self):
+        connection = psycopg2.connect(TEST_DATABASE_URL)
+
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(
+                    'DROP SCHEMA public CASCADE; CREATE SCHEMA public;'
+                )
+                cursor.execute(SCHEMA_PATH.read_text(encoding='utf-8'))
+        finally:
+            connection.close()
+
+        # Пул - одиночка: тест получает свой экземпляр
+        ConnectionPool._instance = None
+        self.pool = ConnectionPool(TEST_DATABASE_URL)
+
+    def tearDown(self):
+        self.pool.close_connection_pool()
+        ConnectionPool._instance = None
+
+    def query(self, query: str, params=()) -> list:
+        """Выполняет запрос отдельным соединением и возвращает строки."""
+
+        connection = psycopg2.connect(TEST_DATABASE_URL)
+
+        try:
+            with connection, connection.cursor(
+                cursor_factory=RealDictCursor
+            ) as cursor:
+                cursor.execute(query, params)
+
+                return cursor.fetchall() if cursor.description else []
+        finally:
+            connection.close()
@@ -0,0 +1,71 @@
+"""
+Сохранение результатов массовой проверки: поля проверки обрезаются
+до длины столбцов 'url_checks', поэтому страница со слишком длинным
+title не прерывает пакетное сохранение остальных проверок.
+"""
+import unittest
+
+from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.services.parser import MAX_FIELD_LENGTH, PageAnalyzer
+from tests.postgres import PostgresTestCase
+
+
+LONG_TEXT = 'Очень длинный заголовок ' * 20
+
+
+def analyze(url: str, title: str) -> PageAnalyzer:
+    """Разбирает страницу с заданным title (без загрузки)."""
+
+    analyzer = PageAnalyzer(url)
+    analyzer.status_code = 200
+    analyzer.parse_page(
+        f'<html><head><title>{title}</title>'
+        f'<meta name="description" content="{LONG_TEXT}"></head>'
+        f'<body><h1>{title}</h1></body></html>'
+    )
+
+    return analyzer
+
+
+class ToCheckTest(unittest.TestCase):
+
+    def test_long_fields_are_truncated(self):
+        check = analyze('https://long.example', LONG_TEXT).to_check()
+
+        self.assertGreater(len(LONG_TEXT), MAX_FIELD_LENGTH)
+
+        for field in ('h1', 'title', 'description'):
+            self.assertEqual(check[field], LONG_TEXT[:MAX_FIELD_LENGTH])
+
+    def test_short_and_missing_fields_are_kept(self):
+        analyzer = PageAnalyzer('https://empty.example')
+        analyzer.title = 'Заголовок'
+
+        check = analyzer.to_check()
+
+        self.assertEqual(check['title'], 'Заголовок')
+        self.assertIsNone(check['h1'])
+        self.assertIsNone(check['etag'])
+
+
+class SaveChecksBatchTest(PostgresTestCase):
+
+    def test_batch_with_oversized_title_is_saved(self):
+        repo = UrlRepository(self.pool)
+        pages = {
+            'https://short.example': 'Короткий',
+            'https://long.example': LONG_TEXT,
+        }
+        checks = []
+
+        for url, title in pages.items():
+            _, url_id = repo.save_url(url)
+            checks.append(dict(analyze(url, title).to_check(), url_id=url_id))
+
+        self.assertEqual(repo.save_checks_batch(checks), 2)
+
+        rows = self.query('SELECT title FROM url_checks ORDER BY url_id')
+        self.assertEqual(
+            [row['title'] for row in rows],
+            ['Короткий', LONG_TEXT[:MAX_FIELD_LENGTH]]
+        )
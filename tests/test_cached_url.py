@@ -0,0 +1,81 @@
+"""
+Кэширующий репозиторий ('CachedUrlRepository'): чтения выполняются
+через кэш, сохранения инвалидируют значения затронутых URL, а
+отсутствие URL не кэшируется.
+"""
+import unittest
+
+from flask import Flask, g
+
+from page_analyzer.repositories.cached_url import CachedUrlRepository
+from page_analyzer.services.cache import LRUCache
+
+
+class FakeUrlRepository:
+    """Репозиторий в памяти, считающий обращения к 'find_url'."""
+
+    def __init__(self):
+        self.urls = {}
+        self.loads = 0
+
+    def find_url(self, id):
+        self.loads += 1
+
+        return self.urls.get(id)
+
+    def save_url(self, url_data):
+        url_id = len(self.urls) + 1
+        self.urls[url_id] = {'id': url_id, 'name': url_data}
+
+        return False, url_id
+
+    def save_checks_url(self, url_id, check):
+        return True
+
+
+class CachedUrlRepositoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.url_repo = FakeUrlRepository()
+        self.repo = CachedUrlRepository(
+            self.url_repo, LRUCache(maxsize=10, ttl=60)
+        )
+
+    def test_found_url_is_cached(self):
+        _, url_id = self.url_repo.save_url('https://site.example')
+
+        self.assertEqual(self.repo.find_url(url_id)['id'], url_id)
+        self.assertEqual(self.repo.find_url(url_id)['id'], url_id)
+        self.assertEqual(self.url_repo.loads, 1)
+
+    def test_missing_url_is_not_cached(self):
+        self.assertIsNone(self.repo.find_url(1))
+
+        # URL создан в обход этого кэша (в другом процессе)
+        self.url_repo.save_url('https://site.example')
+
+        self.assertEqual(self.repo.find_url(1)['id'], 1)
+        self.assertEqual(self.url_repo.loads, 2)
+
+    def test_save_invalidates_url(self):
+        _, url_id = self.repo.save_url('https://site.example')
+        self.repo.find_url(url_id)
+
+        self.assertTrue(self.repo.save_checks_url(url_id, {}))
+        self.repo.find_url(url_id)
+
+        self.assertEqual(self.url_repo.loads, 2)
+
+    def test_read_versions_are_part_of_key(self):
+        _, url_id = self.url_repo.save_url('https://site.example')
+
+        with Flask(__name__).app_context():
+            g.cache_versions = {f'url:{url_id}': 1}
+            self.repo.find_url(url_id)
+            self.repo.find_url(url_id)
+
+            # Версию увеличил другой процесс: значение загружается заново
+            g.cache_versions = {f'url:{url_id}': 2}
+            self.repo.find_url(url_id)
+
+        self.assertEqual(self.url_repo.loads, 2)
@@ -0,0 +1,165 @@
+"""
+Свертка повторяющихся проверок ('SAVE_CHECKS_QUERY'): проверка
+с тем же результатом, что последняя проверка URL, не вставляет новую
+строку, а увеличивает ее счетчик 'seen_count'. Результаты сравниваются
+по хешу 'content_hash', который вычисляется в Python и в миграции
+'database.sql' одинаково.
+"""
+import hashlib
+import re
+import time
+import unittest
+
+from page_analyzer.repositories.url import UrlRepository, content_hash
+from tests.postgres import SCHEMA_PATH, PostgresTestCase
+
+
+CHECK = {
+    'status_code': 200, 'h1': 'H', 'title': 'T', 'description': 'D',
+    'bytes_read': 100, 'etag': '"v1"', 'last_modified': None,
+    'conditional_hit': False, 'snapshot_hash': None, 'seo_metrics': None,
+}
+
+# Выражение хеша из миграции 'database.sql'
+BACKFILL_HASH = re.search(
+    r"content_hash = (decode\(md5\(concat\(.*?\)\), 'hex'\))",
+    SCHEMA_PATH.read_text(encoding='utf-8'), re.DOTALL
+).group(1)
+
+HASH_CASES = [
+    {'status_code': 200, 'h1': 'H', 'title': 'T', 'description': 'D'},
+    {'status_code': None, 'h1': None, 'title': None, 'description': None},
+    {'status_code': 200, 'h1': '', 'title': None, 'description': ''},
+    {'status_code': 404, 'h1': 'Заголовок', 'title': '', 'description': 'x'},
+]
+
+
+class ContentHashTest(unittest.TestCase):
+
+    def test_missing_and_empty_fields_hash_equally(self):
+        self.assertEqual(
+            content_hash(HASH_CASES[1]),
+            hashlib.md5('\x1f\x1f\x1f'.encode()).digest()
+        )
+        self.assertEqual(
+            content_hash({'status_code': 200, 'h1': None}),
+            content_hash({'status_code': 200, 'h1': ''})
+        )
+
+    def test_fields_are_separated(self):
+        self.assertNotEqual(
+            content_hash({'h1': 'ab', 'title': ''}),
+            content_hash({'h1': 'a', 'title': 'b'})
+        )
+
+
+class SaveChecksDedupTest(PostgresTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.repo = UrlRepository(self.pool)
+        _, self.url_id = self.repo.save_url('https://site.example')
+
+    def checks(self) -> list:
+        return self.query(
+            'SELECT * FROM url_checks WHERE url_id = %s ORDER BY id',
+            (self.url_id,)
+        )
+
+    def save(self, **values) -> None:
+        self.assertTrue(
+            self.repo.save_checks_url(self.url_id, dict(CHECK, **values))
+        )
+        time.sleep(0.001)  # noqa Время проверок различается
+
+    def test_first_check_inserts_row(self):
+        self.save()
+
+        [row] = self.checks()
+        self.assertEqual(row['seen_count'], 1)
+        self.assertEqual(row['last_seen_at'], row['created_at'])
+        self.assertEqual(bytes(row['content_hash']), content_hash(CHECK))
+
+        [url] = self.query('SELECT * FROM urls')
+        self.assertEqual(url['last_check_at'], row['created_at'])
+        self.assertEqual(url['last_status_code'], 200)
+
+    def test_identical_check_bumps_seen_count(self):
+        self.save()
+        self.save(etag='"v2"', bytes_read=120)
+
+        [row] = self.checks()
+        self.assertEqual(row['seen_count'], 2)
+        self.assertGreater(row['last_seen_at'], row['created_at'])
+        self.assertEqual(row['etag'], '"v2"')
+        self.assertEqual(row['bytes_read'], 120)
+
+        [url] = self.query('SELECT last_check_at FROM urls')
+        self.assertEqual(url['last_check_at'], row['last_seen_at'])
+
+    def test_not_modified_check_keeps_bytes_read(self):
+        self.save()
+        self.save(conditional_hit=True, bytes_read=0)
+
+        [row] = self.checks()
+        self.assertEqual(row['seen_count'], 2)
+        self.assertEqual(row['conditional_hits'], 1)
+        self.assertEqual(row['bytes_read'], 100)
+
+    def test_changed_field_inserts_row(self):
+        self.save()
+        self.save()
+        self.save(title='Новый title')
+
+        rows = self.checks()
+        self.assertEqual([row['seen_count'] for row in rows], [2, 1])
+        self.assertEqual(rows[1]['title'], 'Новый title')
+
+        # Возврат к прежнему результату - снова новая строка: сравнение
+        # выполняется только с последней проверкой
+        self.save()
+        self.assertEqual(len(self.checks()), 3)
+
+    def test_batch_collapses_like_single_checks(self):
+        self.save()
+        _, other_id = self.repo.save_url('https://other.example')
+
+        self.repo.save_checks_batch([
+            dict(CHECK, url_id=self.url_id),
+            dict(CHECK, url_id=other_id),
+        ])
+
+        rows = self.query(
+            'SELECT url_id, seen_count FROM url_checks ORDER BY url_id'
+        )
+        self.assertEqual(
+            [(row['url_id'], row['seen_count']) for row in rows],
+            [(self.url_id, 2), (other_id, 1)]
+        )
+
+    def test_python_hash_matches_backfill_expression(self):
+        for case in HASH_CASES:
+            with self.subTest(case=case):
+                [row] = self.query(
+                    f'SELECT {BACKFILL_HASH} AS hash FROM (SELECT '
+                    '%(status_code)s::int AS status_code, '
+                    '%(h1)s::varchar AS h1, %(title)s::varchar AS title, '
+                    '%(description)s::varchar AS description) AS checks',
+                    case
+                )
+                self.assertEqual(bytes(row['hash']), content_hash(case))
+
+
+class SaveUrlTest(PostgresTestCase):
+
+    def test_existing_url_is_found_by_upsert(self):
+        repo = UrlRepository(self.pool)
+
+        exists, url_id = repo.save_url('https://site.example')
+        self.assertFalse(exists)
+
+        # Уникальный индекс по lower(name): тот же URL в другом регистре
+        exists, same_id = repo.save_url('https://SITE.example')
+        self.assertTrue(exists)
+        self.assertEqual(same_id, url_id)
+        self.assertEqual(len(self.query('SELECT id FROM urls')), 1)
@@ -0,0 +1,151 @@
+"""
+Очередь фоновых проверок ('CheckJobRepository', 'CheckWorker'):
+одно активное задание на URL, выбор заданий с 'SKIP LOCKED' и
+итоговое состояние задания после проверки.
+"""
+import unittest
+from unittest import mock
+
+import psycopg2
+
+from page_analyzer.repositories.check_job import CheckJobRepository
+from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.worker import CheckWorker
+from tests.postgres import TEST_DATABASE_URL, PostgresTestCase
+
+
+class FakeJobRepository:
+    """Очередь в памяти, запоминающая завершенные задания."""
+
+    DONE = CheckJobRepository.DONE
+    FAILED = CheckJobRepository.FAILED
+
+    def __init__(self, *jobs):
+        self.jobs = list(jobs)
+        self.finished = []
+
+    def claim_job(self):
+        return self.jobs.pop(0) if self.jobs else None
+
+    def finish_job(self, job_id, status, message):
+        self.finished.append((job_id, status, message))
+
+
+class CheckWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.job_repo = FakeJobRepository({'id': 1, 'url_id': 10})
+        self.worker = CheckWorker(None, self.job_repo)
+
+    def run_job(self, **handle) -> None:
+        with mock.patch(
+            'page_analyzer.worker.handle_checks_url', **handle
+        ):
+            self.assertTrue(self.worker.run_once())
+
+    def test_empty_queue(self):
+        self.assertFalse(CheckWorker(None, FakeJobRepository()).run_once())
+
+    def test_successful_check_is_done(self):
+        self.run_job(return_value=('Страница успешно проверена', 'success'))
+
+        self.assertEqual(self.job_repo.finished, [
+            (1, 'done', 'Страница успешно проверена')
+        ])
+
+    def test_failed_check_is_failed(self):
+        self.run_job(return_value=('Произошла ошибка при проверке', 'danger'))
+
+        self.assertEqual(self.job_repo.finished[0][1], 'failed')
+
+    def test_exception_fails_job(self):
+        with self.assertLogs('page_analyzer.worker', 'ERROR'):
+            self.run_job(side_effect=RuntimeError('сбой'))
+
+        self.assertEqual(self.job_repo.finished, [
+            (1, 'failed', 'Ошибка при сохранении проверки')
+        ])
+
+
+class CheckJobRepositoryTest(PostgresTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.repo = CheckJobRepository(self.pool)
+        url_repo = UrlRepository(self.pool)
+        self.url_ids = [
+            url_repo.save_url(f'https://site{number}.example')[1]
+            for number in range(2)
+        ]
+
+    def test_one_active_job_per_url(self):
+        created, job_id = self.repo.enqueue(self.url_ids[0])
+        self.assertTrue(created)
+
+        self.assertEqual(self.repo.enqueue(self.url_ids[0]), (False, job_id))
+
+        # Выполняющееся задание тоже активно
+        self.repo.claim_job()
+        self.assertEqual(self.repo.enqueue(self.url_ids[0]), (False, job_id))
+
+        # После завершения задания URL снова можно поставить в очередь
+        self.repo.finish_job(job_id, self.repo.DONE, 'готово')
+        created, next_id = self.repo.enqueue(self.url_ids[0])
+        self.assertTrue(created)
+        self.assertNotEqual(next_id, job_id)
+
+    def test_enqueue_all_skips_active_jobs(self):
+        self.repo.enqueue(self.url_ids[0])
+
+        self.assertEqual(self.repo.enqueue_all(), 1)
+        self.assertEqual(self.repo.enqueue_all(), 0)
+
+    def test_claim_in_queue_order(self):
+        first = self.repo.enqueue(self.url_ids[0])[1]
+        second = self.repo.enqueue(self.url_ids[1])[1]
+
+        self.assertEqual(self.repo.claim_job()['id'], first)
+        self.assertEqual(self.repo.claim_job()['id'], second)
+        self.assertIsNone(self.repo.claim_job())
+
+        [job] = self.query(
+            'SELECT status, started_at FROM check_jobs WHERE id = %s',
+            (first,)
+        )
+        self.assertEqual(job['status'], 'running')
+        self.assertIsNotNone(job['started_at'])
+
+    def test_claim_skips_locked_job(self):
+        first = self.repo.enqueue(self.url_ids[0])[1]
+        second = self.repo.enqueue(self.url_ids[1])[1]
+
+        # Первое задание заблокировал другой воркер (его транзакция
+        # еще не зафиксирована): ожидания нет, выбирается следующее
+        connection = psycopg2.connect(TEST_DATABASE_URL)
+        self.addCleanup(connection.close)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM check_jobs WHERE id = %s FOR UPDATE',
+                (first,)
+            )
+
+            self.assertEqual(self.repo.claim_job()['id'], second)
+            self.assertIsNone(self.repo.claim_job())
+
+        connection.rollback()
+
+        self.assertEqual(self.repo.claim_job()['id'], first)
+
+    def test_stale_running_job_is_requeued(self):
+        job_id = self.repo.enqueue(self.url_ids[0])[1]
+        self.repo.claim_job()
+
+        self.assertEqual(self.repo.requeue_stale_jobs(timeout=3600), 0)
+
+        self.query(
+            "UPDATE check_jobs SET started_at = NOW() - interval '2 hours'"
+        )
+
+        self.assertEqual(self.repo.requeue_stale_jobs(timeout=3600), 1)
+        self.assertEqual(self.repo.claim_job()['id'], job_id)
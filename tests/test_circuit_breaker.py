@@ -0,0 +1,164 @@
+"""
+Автоматический выключатель ('CircuitBreaker') и повторы вызовов
+репозитория ('retry_connection'): какие ошибки размыкают выключатель,
+а какие не меняют его состояния.
+"""
+import time
+import unittest
+
+import psycopg2
+
+from page_analyzer.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError
+)
+from page_analyzer.db_connections.connection_manager import (
+    DatabaseUnavailableError,
+    PoolTimeoutError,
+    retry_connection
+)
+
+
+RESET_TIMEOUT = 0.01
+
+
+class QueryError(psycopg2.Error):
+    """Ошибка запроса: сервер ответил (синтаксическая ошибка)."""
+
+    pgcode = '42601'
+
+
+def create_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        'test', failure_threshold=2, reset_timeout=RESET_TIMEOUT,
+        metrics=False
+    )
+
+
+def wait_half_open(breaker: CircuitBreaker) -> None:
+    time.sleep(RESET_TIMEOUT * 1.5)
+    assert breaker.state == HALF_OPEN
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_opens_after_threshold_and_closes_after_probe(self):
+        breaker = create_breaker()
+
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        wait_half_open(breaker)
+        breaker.before_call()
+
+        # Пока пробный вызов выполняется, остальные вызовы отклоняются
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_failed_probe_opens_again(self):
+        breaker = create_breaker()
+
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+
+        wait_half_open(breaker)
+        breaker.before_call()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_release_probe_keeps_state(self):
+        breaker = create_breaker()
+
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+
+        wait_half_open(breaker)
+        breaker.before_call()
+        breaker.release_probe()
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.before_call()  # Место пробного вызова освобождено
+
+
+class RetryConnectionBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = create_breaker()
+
+        @retry_connection(attempts=1, breaker=self.breaker)
+        def call(error=None):
+            if error is not None:
+                raise error
+
+            return 'ok'
+
+        self.call = call
+
+    def open_breaker(self) -> None:
+        for _ in range(2):
+            with self.assertRaises(psycopg2.OperationalError):
+                self.call(psycopg2.OperationalError('connection refused'))
+
+        self.assertEqual(self.breaker.state, OPEN)
+
+        with self.assertRaises(DatabaseUnavailableError):
+            self.call()
+
+    def test_pool_timeout_probe_does_not_close_breaker(self):
+        self.open_breaker()
+        wait_half_open(self.breaker)
+
+        with self.assertRaises(PoolTimeoutError):
+            self.call(PoolTimeoutError('нет свободных соединений'))
+
+        # Сервер не опрашивался: выключатель не замкнут, а следующий
+        # пробный вызов с отказом соединения снова его размыкает
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            self.call(psycopg2.OperationalError('connection refused'))
+
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_non_database_errors_do_not_close_breaker(self):
+        self.open_breaker()
+        wait_half_open(self.breaker)
+
+        for error in (QueryError('syntax error'), KeyboardInterrupt()):
+            with self.subTest(error=type(error).__name__):
+                with self.assertRaises(type(error)):
+                    self.call(error)
+
+                self.assertEqual(self.breaker.state, HALF_OPEN)
+
+        self.assertEqual(self.call(), 'ok')
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_pool_timeout_does_not_reset_failures(self):
+        with self.assertRaises(psycopg2.OperationalError):
+            self.call(psycopg2.OperationalError('connection refused'))
+
+        with self.assertRaises(PoolTimeoutError):
+            self.call(PoolTimeoutError('нет свободных соединений'))
+
+        with self.assertRaises(psycopg2.OperationalError):
+            self.call(psycopg2.OperationalError('connection refused'))
+
+        self.assertEqual(self.breaker.state, OPEN)
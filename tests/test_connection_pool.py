@@ -0,0 +1,212 @@
+"""
+Пул соединений ('ConnectionPool') с поддельным 'psycopg2.connect':
+ожидание свободного соединения, проверка и замена соединений, возврат
+чужого соединения и пул дочернего процесса после fork.
+"""
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+import warnings
+
+import psycopg2
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INTRANS
+)
+
+from page_analyzer.db_connections.connection_manager import (
+    ConnectionPool,
+    PoolTimeoutError
+)
+
+
+class FakeInfo:
+    transaction_status = TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.connection.broken:
+            raise psycopg2.OperationalError('server closed the connection')
+
+
+class FakeConnection:
+    """Соединение без сервера: запоминает откаты и закрытие."""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.info = FakeInfo()
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.opened = []
+        patcher = mock.patch('psycopg2.connect', side_effect=self.connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        ConnectionPool._instance = None
+        self.addCleanup(setattr, ConnectionPool, '_instance', None)
+
+    def connect(self, db_url):
+        connection = FakeConnection()
+        self.opened.append(connection)
+
+        return connection
+
+    def create_pool(self, **kwargs) -> ConnectionPool:
+        options = dict(
+            maxconn=1, acquire_timeout=1.0, max_age=3600,
+            health_check_after=3600
+        )
+        options.update(kwargs)
+
+        return ConnectionPool('postgresql://test', **options)
+
+    def test_timeout_when_pool_is_exhausted(self):
+        pool = self.create_pool()
+        pool.acquire()
+
+        started = time.monotonic()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire(timeout=0.05)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertIsNone(pool.get_connection(timeout=0.01))
+        self.assertEqual(len(self.opened), 1)
+
+    def test_waiter_wakes_on_release(self):
+        pool = self.create_pool()
+        connection = pool.acquire()
+        received = []
+
+        waiter = threading.Thread(
+            target=lambda: received.append(pool.acquire(timeout=5))
+        )
+        waiter.start()
+
+        # Дожидаемся, пока поток встанет в очередь ожидания
+        while pool.stats()['waiting'] == 0:
+            time.sleep(0.001)
+
+        pool.release_connection(connection)
+        waiter.join(timeout=5)
+
+        self.assertEqual(received, [connection])
+        self.assertEqual(pool.stats()['waiting'], 0)
+
+    def test_open_transaction_is_rolled_back_on_release(self):
+        pool = self.create_pool()
+        connection = pool.acquire()
+        connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+
+        pool.release_connection(connection)
+
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertIs(pool.acquire(), connection)
+
+    def test_stale_connection_is_replaced(self):
+        pool = self.create_pool(health_check_after=0)
+        connection = pool.acquire()
+        pool.release_connection(connection)
+        connection.broken = True  # noqa Сервер закрыл соединение, пока оно простаивало
+
+        replacement = pool.acquire()
+
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_over_age_connection_is_replaced(self):
+        pool = self.create_pool(max_age=0.01)
+        connection = pool.acquire()
+        pool.release_connection(connection)
+        time.sleep(0.02)
+
+        replacement = pool.acquire()
+
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_foreign_connection_is_rejected(self):
+        pool = self.create_pool()
+        own = pool.acquire()
+        foreign = FakeConnection()
+        foreign.info.transaction_status = TRANSACTION_STATUS_INTRANS
+
+        with self.assertLogs(
+            'page_analyzer.db_connections.connection_manager', 'WARNING'
+        ):
+            pool.release_connection(foreign)
+
+        # Чужое соединение не откатывается и не попадает в пул
+        self.assertEqual(foreign.rollbacks, 0)
+        self.assertEqual(
+            {key: pool.stats()[key] for key in ('size', 'idle', 'in_use')},
+            {'size': 1, 'idle': 0, 'in_use': 1}
+        )
+
+        pool.release_connection(own)
+
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'нужен os.fork')
+    def test_child_process_starts_with_empty_pool(self):
+        pool = self.create_pool(maxconn=2)
+        inherited = pool.acquire()
+        pool.release_connection(pool.acquire())
+
+        read_end, write_end = os.pipe()
+
+        with warnings.catch_warnings():
+            # noqa Поток слушателя логов дочернему процессу не нужен
+            warnings.simplefilter('ignore', DeprecationWarning)
+            pid = os.fork()
+
+        if pid == 0:  # pragma: no cover - дочерний процесс
+            try:
+                stats = pool.stats()
+                own = pool.acquire(timeout=0.1)
+                result = (
+                    stats['size'] == 0 and stats['idle'] == 0
+                    and stats['in_use'] == 0 and own is not inherited
+                )
+                os.write(write_end, b'1' if result else b'0')
+            finally:
+                os._exit(0)
+
+        os.close(write_end)
+        result = os.read(read_end, 1)
+        os.close(read_end)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(result, b'1')
+        # Соединения родителя остаются в его пуле
+        self.assertEqual(pool.stats()['size'], 2)
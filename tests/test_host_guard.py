@@ -0,0 +1,101 @@
+"""
+Учет отказов проверяемых хостов ('HostGuard'): выключатель хоста
+после ошибок соединения, негативный кэш DNS и ограничение числа
+отслеживаемых хостов.
+"""
+import socket
+import time
+import unittest
+
+import requests
+
+from page_analyzer.services.host_guard import (
+    HostGuard,
+    HostUnavailableError,
+    is_dns_failure
+)
+
+
+def dns_error() -> requests.exceptions.ConnectionError:
+    """Ошибка requests, причина которой - ошибка разрешения имени."""
+
+    try:
+        try:
+            raise socket.gaierror(-2, 'Name or service not known')
+        except socket.gaierror as error:
+            raise OSError('Failed to resolve') from error
+    except OSError as error:
+        return requests.exceptions.ConnectionError(error)
+
+
+class HostGuardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.guard = HostGuard(
+            failure_threshold=2, reset_timeout=0.05, dns_ttl=0.05,
+            max_hosts=2
+        )
+
+    def failed(self, host: str, error: Exception) -> None:
+        self.guard.before_request(host)
+        self.guard.record_error(host, error)
+
+    def test_connection_failures_open_host_breaker(self):
+        for _ in range(2):
+            self.failed('down.example', requests.exceptions.ConnectTimeout())
+
+        with self.assertRaises(HostUnavailableError):
+            self.guard.before_request('down.example')
+
+        # Другие хосты не затронуты
+        self.guard.before_request('up.example')
+        self.assertEqual(self.guard.stats()['unavailable_hosts'], 1)
+
+        # noqa После 'reset_timeout' пропускается пробный запрос, успех замыкает выключатель
+        time.sleep(0.06)
+        self.guard.before_request('down.example')
+        self.guard.record_success('down.example')
+        self.guard.before_request('down.example')
+        self.assertEqual(self.guard.stats()['unavailable_hosts'], 0)
+
+    def test_other_errors_do_not_count(self):
+        for _ in range(3):
+            self.failed('site.example', requests.exceptions.TooManyRedirects())
+
+        self.guard.before_request('site.example')
+
+    def test_dns_failure_is_cached(self):
+        self.failed('missing.example', dns_error())
+
+        with self.assertRaisesRegex(HostUnavailableError, 'DNS'):
+            self.guard.before_request('missing.example')
+
+        self.assertEqual(self.guard.stats()['dns_negative_hosts'], 1)
+
+        time.sleep(0.06)
+        self.guard.before_request('missing.example')
+        self.assertEqual(self.guard.stats()['dns_negative_hosts'], 0)
+
+    def test_least_recently_used_hosts_are_evicted(self):
+        for _ in range(2):
+            self.failed('a.example', requests.exceptions.ConnectionError())
+
+        self.guard.before_request('b.example')
+        self.guard.before_request('c.example')
+
+        # noqa Выключатель 'a.example' вытеснен: хост снова считается доступным
+        self.guard.before_request('a.example')
+
+
+class DnsFailureTest(unittest.TestCase):
+
+    def test_gaierror_in_exception_chain(self):
+        self.assertTrue(is_dns_failure(dns_error()))
+
+    def test_other_connection_errors(self):
+        self.assertFalse(is_dns_failure(
+            requests.exceptions.ConnectionError(
+                ConnectionRefusedError(111, 'Connection refused')
+            )
+        ))
+        self.assertFalse(is_dns_failure(requests.exceptions.ReadTimeout()))
@@ -0,0 +1,167 @@
+"""
+Запись логов через очередь ('log_setup'): ограничение размера
+сообщений, выборка отладочных сообщений и отбрасывание записей при
+переполнении очереди.
+"""
+import logging
+import queue
+import sys
+import unittest
+
+from page_analyzer.log_setup import (
+    PayloadLimitFilter,
+    RouteHandler,
+    RoutingQueueHandler,
+    SamplingFilter,
+    parse_sampling
+)
+
+
+def make_record(
+    msg: str, *args, name: str = 'page_analyzer', level: int = logging.DEBUG,
+    **extra
+) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+
+    return record
+
+
+class CollectingHandler(logging.Handler):
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class PayloadLimitFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = PayloadLimitFilter(max_length=50)
+
+    def test_container_args_are_shortened(self):
+        record = make_record('Строки: %s', list(range(1000)))
+
+        self.assertTrue(self.limiter.filter(record))
+        self.assertEqual(
+            record.getMessage(),
+            'Строки: [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...]'
+        )
+        self.assertIsNone(record.args)
+
+    def test_long_message_is_truncated(self):
+        record = make_record('x' * 80)
+        self.limiter.filter(record)
+
+        self.assertEqual(
+            record.getMessage(), 'x' * 50 + '... [обрезано, всего 80 симв.]'
+        )
+
+    def test_long_string_arg_is_shortened(self):
+        record = make_record('Ответ: %s', 'y' * 80, payload_limit=100)
+        self.limiter.filter(record)
+
+        self.assertEqual(record.getMessage(), 'Ответ: ' + 'y' * 50 + '...')
+
+    def test_payload_limit_from_record(self):
+        record = make_record('z' * 100, payload_limit=200)
+        self.limiter.filter(record)
+
+        self.assertEqual(record.getMessage(), 'z' * 100)
+
+    def test_short_message_is_kept(self):
+        record = make_record("Функция '%s', id=%s", 'find_url', 42)
+        self.limiter.filter(record)
+
+        self.assertEqual(record.getMessage(), "Функция 'find_url', id=42")
+
+
+class SamplingFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sampling = SamplingFilter(parse_sampling(
+            'page_analyzer.db_connections=0.25, page_analyzer.noisy=0'
+        ))
+
+    def passed(self, count: int, msg: str = 'Соединение получено', **kw):
+        return sum(
+            self.sampling.filter(make_record(msg, **kw))
+            for _ in range(count)
+        )
+
+    def test_parse_sampling(self):
+        self.assertEqual(
+            parse_sampling(' a=0.5,,b.c = 0 '), {'a': 0.5, 'b.c': 0.0}
+        )
+
+    def test_every_nth_debug_record_per_template(self):
+        name = 'page_analyzer.db_connections.connection_manager'
+
+        self.assertEqual(self.passed(8, name=name), 2)
+        # У другого шаблона сообщения свой счетчик
+        self.assertEqual(self.passed(1, 'Соединение возвращено', name=name), 1)
+
+    def test_info_and_unconfigured_loggers_are_kept(self):
+        self.assertEqual(self.passed(
+            4, name='page_analyzer.db_connections', level=logging.INFO
+        ), 4)
+        self.assertEqual(self.passed(4, name='page_analyzer.views'), 4)
+
+    def test_zero_rate_drops_debug(self):
+        self.assertEqual(self.passed(4, name='page_analyzer.noisy.sub'), 0)
+
+    def test_decision_is_kept_on_record(self):
+        record = make_record('x', name='page_analyzer.db_connections')
+        self.sampling.filter(make_record('x', name=record.name))
+
+        # Вторая запись шаблона отбрасывается на всех обработчиках
+        self.assertFalse(self.sampling.filter(record))
+        self.assertFalse(self.sampling.filter(record))
+
+
+class RoutingQueueHandlerTest(unittest.TestCase):
+
+    def test_full_queue_drops_records(self):
+        handler = RoutingQueueHandler(queue.Queue(maxsize=1), 'page_analyzer')
+
+        for _ in range(3):
+            handler.handle(make_record('x', level=logging.INFO))
+
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 2)
+
+    def test_record_is_routed_without_formatting(self):
+        handler = RoutingQueueHandler(queue.Queue(), 'page_analyzer')
+        payload = ['значение']
+
+        try:
+            raise ValueError('ошибка')
+        except ValueError:
+            record = make_record('Данные: %s', payload, level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+            handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+
+        self.assertEqual(queued.log_route, 'page_analyzer')
+        self.assertIs(queued.args[0], payload)
+        self.assertIsNone(queued.exc_info)
+        self.assertIn('ValueError: ошибка', queued.exc_text)
+
+    def test_route_handler_respects_handler_levels(self):
+        console = CollectingHandler(logging.INFO)
+        log_file = CollectingHandler(logging.WARNING)
+        route_handler = RouteHandler(
+            {'page_analyzer': [console, log_file]}, PayloadLimitFilter()
+        )
+
+        for level in (logging.INFO, logging.WARNING):
+            route_handler.handle(
+                make_record('x', level=level, log_route='page_analyzer')
+            )
+
+        self.assertEqual(len(console.records), 2)
+        self.assertEqual(len(log_file.records), 1)
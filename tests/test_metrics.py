@@ -0,0 +1,93 @@
+"""
+Объединение снимков метрик процессов ('aggregate'): снимок
+завершившегося процесса переносится в общий снимок и удаляется,
+а его счетчики и гистограммы продолжают учитываться ровно один раз.
+"""
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from page_analyzer.metrics import DEAD_SNAPSHOT, aggregate, snapshot_path
+
+
+def dead_pid() -> int:
+    """Возвращает pid завершившегося процесса."""
+
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+
+    return process.pid
+
+
+def metrics(requests: int, duration: float, connections: int) -> dict:
+    return {
+        'requests_total': {
+            'type': 'counter', 'help': 'Запросы.', 'labelnames': ['status'],
+            'samples': [[['200'], requests]],
+        },
+        'duration_seconds': {
+            'type': 'histogram', 'help': 'Длительность.', 'labelnames': [],
+            'buckets': [1.0],
+            'samples': [[[], {'buckets': [1, 0], 'sum': duration,
+                              'count': 1}]],
+        },
+        'connections': {
+            'type': 'gauge', 'help': 'Соединения.', 'labelnames': [],
+            'aggregate': 'sum', 'samples': [[[], connections]],
+        },
+    }
+
+
+class AggregateTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, pid: int, **values) -> Path:
+        path = snapshot_path(self.directory, pid)
+        path.write_text(
+            json.dumps({'pid': pid, 'metrics': metrics(**values)}),
+            encoding='utf-8'
+        )
+
+        return path
+
+    def totals(self) -> tuple:
+        merged = aggregate(self.directory)
+        histogram = merged['duration_seconds']['samples'][()]
+
+        return (
+            merged['requests_total']['samples'][('200',)],
+            histogram['count'],
+            merged.get('connections', {}).get('samples', {}).get(()),
+        )
+
+    def test_dead_snapshot_is_compacted(self):
+        self.write(os.getpid(), requests=1, duration=0.5, connections=2)
+        dead = self.write(dead_pid(), requests=10, duration=0.1,
+                          connections=5)
+
+        self.assertEqual(self.totals(), (11, 2, 2))
+        self.assertFalse(dead.exists())
+        self.assertTrue((Path(self.directory) / DEAD_SNAPSHOT).exists())
+
+        # Повторное объединение не учитывает процесс дважды
+        self.assertEqual(self.totals(), (11, 2, 2))
+
+    def test_dead_snapshots_accumulate(self):
+        self.write(dead_pid(), requests=3, duration=0.1, connections=1)
+        self.assertEqual(self.totals(), (3, 1, None))
+
+        self.write(dead_pid(), requests=4, duration=0.1, connections=1)
+        self.assertEqual(self.totals(), (7, 2, None))
+
+        self.assertEqual(
+            sorted(path.name for path in Path(self.directory).glob('*.json')),
+            [DEAD_SNAPSHOT]
+        )
@@ -0,0 +1,102 @@
+"""
+Keyset-пагинация списка URL ('fetch_page' с запросом 'URLS_PAGE_QUERY').
+
+Запрос выполняется в SQLite в памяти: условие пагинации по паре
+значений и разрешение имен в ORDER BY (сначала псевдонимы столбцов
+результата) в SQLite такие же, как в PostgreSQL.
+"""
+from datetime import datetime, timedelta
+import sqlite3
+import unittest
+
+from page_analyzer.repositories.pagination import fetch_page
+from page_analyzer.repositories.url import (
+    URLS_PAGE_QUERY,
+    URLS_PAGE_SORT_COLUMNS
+)
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter(
+    'timestamp', lambda value: datetime.fromisoformat(value.decode())
+)
+
+START = datetime(2026, 1, 1)
+
+
+class SqliteCursor:
+    """Курсор SQLite с параметрами '%s' и строками-словарями."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, query, args=()):
+        result = self.connection.execute(query.replace('%s', '?'), args)
+        columns = [column[0] for column in result.description]
+        self.rows = [dict(zip(columns, row)) for row in result.fetchall()]
+
+    def fetchall(self):
+        return self.rows
+
+
+class UrlsPageTest(unittest.TestCase):
+
+    def setUp(self):
+        connection = sqlite3.connect(
+            ':memory:', detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        connection.execute(
+            'CREATE TABLE urls (id INTEGER PRIMARY KEY, name TEXT, '
+            'created_at TIMESTAMP, last_check_at TIMESTAMP, '
+            'last_status_code INTEGER)'
+        )
+
+        # Время последней проверки не совпадает с порядком добавления,
+        # у части URL проверок нет, у двух URL одинаковое время добавления
+        for id in range(1, 11):
+            created_at = START + timedelta(minutes=min(id, 9))
+            last_check_at = None if id % 3 == 0 \
+                else START + timedelta(days=(id * 7) % 10)
+            connection.execute(
+                'INSERT INTO urls VALUES (?, ?, ?, ?, ?)',
+                (id, f'https://site{id}.example', created_at,
+                 last_check_at, 200)
+            )
+
+        self.cursor = SqliteCursor(connection)
+        self.expected = list(range(10, 0, -1))  # noqa Новые первыми, при равном времени - больший id
+
+    def page(self, after=None, before=None):
+        return fetch_page(
+            self.cursor, URLS_PAGE_QUERY, (),
+            sort_columns=URLS_PAGE_SORT_COLUMNS,
+            cursor_keys=('url_created_at', 'id'),
+            limit=3, after=after, before=before
+        )
+
+    def test_pages_follow_added_order_in_both_directions(self):
+        pages = [self.page()]
+
+        while pages[-1].next_cursor:
+            pages.append(self.page(after=pages[-1].next_cursor))
+
+        forward = [[row['id'] for row in page] for page in pages]
+
+        self.assertEqual(sum(forward, []), self.expected)
+        self.assertEqual([len(ids) for ids in forward], [3, 3, 3, 1])
+        self.assertIsNone(pages[0].prev_cursor)
+
+        backward = [forward[-1]]
+        page = pages[-1]
+
+        while page.prev_cursor:
+            page = self.page(before=page.prev_cursor)
+            backward.append([row['id'] for row in page])
+
+        self.assertEqual(backward, forward[::-1])
+        self.assertIsNone(page.prev_cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Совпадение результатов способов разбора HTML: однопроходный
+'PageExtractor' ('stream') и lxml (если установлен) должны извлекать
+те же (h1, title, description), что дерево BeautifulSoup
+('html.parser'), в том числе на некорректной разметке и при разборе
+страницы частями.
+
+libxml2 восстанавливает часть некорректной разметки иначе, чем
+'html.parser' (см. 'LxmlBackend'); для таких страниц в
+LXML_DIFFERENCES перечислены поля, которые у lxml могут отличаться,
+остальные поля должны совпадать.
+"""
+from pathlib import Path
+import unittest
+
+from page_analyzer.services.extractor import PageExtractor
+from page_analyzer.services.parser_backends import (
+    LxmlBackend,
+    SoupBackend,
+    available_backends
+)
+
+
+CORPUS_DIR = Path(__file__).parent.parent / 'benchmarks' / 'corpus'
+
+FIXTURES = {
+    'unclosed_h1': (
+        '<html><head><title>Заголовок</title></head>'
+        '<body><h1>Незакрытый <b>H1</b><p>абзац</p></body></html>'
+    ),
+    'unclosed_h1_at_end': '<title>T</title><h1>До конца документа',
+    'nested_script': (
+        '<title>T</title><h1>До<script>var s = "<h1>нет</h1>";'
+        '<script>x</script> после</h1>'
+        '<meta name="description" content="D">'
+    ),
+    'style_and_template': (
+        '<h1>А<style>h1 { color: red }</style>'
+        '<template><b>шаблон</b></template>Б</h1><title>T</title>'
+    ),
+    'missing_meta_content': (
+        '<meta name="description"><meta name="description" content="2">'
+        '<title>T</title><h1>H</h1>'
+    ),
+    'empty_meta_content': (
+        '<meta name="description" content=""><title>T</title><h1>H</h1>'
+    ),
+    'uppercase_tags': (
+        '<HTML><HEAD><TITLE>Верхний регистр</TITLE>'
+        '<META NAME="description" CONTENT="Описание"></HEAD>'
+        '<BODY><H1>Заголовок</H1></BODY></HTML>'
+    ),
+    'entities': (
+        '<title>A &amp; B &lt;C&gt; &#8212; &quot;D&quot;</title>'
+        '<meta name="description" content="x &amp; y &copy; 2024">'
+        '<h1>&laquo;Кавычки&raquo;&nbsp;и&#160;пробелы</h1>'
+    ),
+    'stray_end_tags': (
+        '</div></h1><title>T</title></span><h1>H</h1></p>'
+        '<meta name="description" content="D">'
+    ),
+    'second_h1_ignored': (
+        '<h1>Первый</h1><h1>Второй</h1><title>Т1</title><title>Т2</title>'
+    ),
+    'h1_closed_by_parent': (
+        '<div><h1>Внутри div</div><p>после</p><title>T</title>'
+    ),
+    'self_closing': (
+        '<title>T</title><br/><h1>H<img src="a.png"/>1</h1>'
+        '<meta name="description" content="D"/>'
+    ),
+    'comments_and_cdata': (
+        '<title>T<!-- комментарий --></title>'
+        '<h1>A<!-- <h1>нет</h1> -->B</h1>'
+    ),
+    'no_fields': '<html><body><p>Нет полей</p></body></html>',
+    'empty': '',
+}
+
+FIELDS = ('h1', 'title', 'description')
+
+# noqa Страница -> поля, которые lxml восстанавливает иначе, чем 'html.parser'
+LXML_DIFFERENCES = {
+    # Незакрытый H1 закрывается следующим тегом P
+    'unclosed_h1': {'h1'},
+    # noqa Текст TITLE не разбирается на теги и комментарии (RCDATA)
+    'comments_and_cdata': {'title'},
+    'malformed.html': {'title'},
+    # noqa Незакрытый TITLE в незакрытом HEAD поглощает остаток документа
+    'unclosed_head.html': set(FIELDS),
+}
+
+SOUP = SoupBackend()
+
+
+def stream_in_parts(page: str, *boundaries: int):
+    """Разбирает страницу 'PageExtractor', передавая ее частями."""
+
+    extractor = PageExtractor()
+    start = 0
+
+    for end in (*boundaries, len(page)):
+        extractor.feed(page[start:end])
+        start = end
+
+    extractor.close()
+
+    return extractor.result()
+
+
+class BackendsAgreeTest(unittest.TestCase):
+
+    def assert_backends_agree(self, name: str, page: str) -> None:
+        expected = SOUP.extract(page)
+
+        for backend in available_backends().values():
+            with self.subTest(page=name, backend=backend.name):
+                differences = LXML_DIFFERENCES.get(name, set()) \
+                    if backend.name == LxmlBackend.name else set()
+                result = backend.extract(page)
+
+                for field, value, expected_value in zip(
+                    FIELDS, result, expected
+                ):
+                    if field not in differences:
+                        self.assertEqual(value, expected_value, field)
+
+    def test_fixtures(self):
+        for name, page in FIXTURES.items():
+            self.assert_backends_agree(name, page)
+
+    def test_corpus(self):
+        pages = sorted(CORPUS_DIR.glob('*.html'))
+        self.assertTrue(pages)
+
+        for path in pages:
+            self.assert_backends_agree(
+                path.name, path.read_text(encoding='utf-8')
+            )
+
+
+class StreamChunksTest(unittest.TestCase):
+
+    def test_every_chunk_boundary(self):
+        # Граница части приходится на каждую позицию страницы,
+        # в том числе внутри тегов, атрибутов и ссылок на символы
+        for name, page in FIXTURES.items():
+            expected = SOUP.extract(page)
+
+            for boundary in range(1, len(page)):
+                with self.subTest(page=name, boundary=boundary):
+                    self.assertEqual(
+                        stream_in_parts(page, boundary), expected
+                    )
+
+    def test_byte_sized_chunks(self):
+        page = FIXTURES['entities'] + FIXTURES['nested_script']
+
+        self.assertEqual(
+            stream_in_parts(page, *range(1, len(page))),
+            SOUP.extract(page)
+        )
+
+    def test_complete_after_all_fields(self):
+        extractor = PageExtractor()
+        extractor.feed('<title>T</title><meta name="description" content="D">')
+
+        self.assertFalse(extractor.complete)
+
+        extractor.feed('<h1>H</h1>')
+
+        self.assertTrue(extractor.complete)
+
+        # Поля уже найдены: остаток страницы их не меняет
+        extractor.feed('<h1>Другой</h1><title>Другой</title>')
+        extractor.close()
+
+        self.assertEqual(extractor.result(), ('H', 'T', 'D'))
@@ -0,0 +1,144 @@
+"""
+Кэш страниц и ETag ('cached_response'): ответ 304 без вызова
+обработчика, новый ETag после увеличения версии, кэширование только
+успешных ответов; версии увеличиваются только после коммита.
+"""
+import unittest
+
+from flask import Flask, abort, flash, get_flashed_messages
+
+from page_analyzer.db_connections.connection_manager import unit_of_work
+from page_analyzer.repositories.cache_version import (
+    URLS_VERSION,
+    CacheVersionRepository
+)
+from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.services.cache import LRUCache
+from page_analyzer.views.response_cache import cached_response
+from tests.postgres import PostgresTestCase
+
+
+class FakeVersionRepository:
+    """Версии страниц в памяти."""
+
+    def __init__(self):
+        self.versions = {}
+
+    def get_versions(self, names):
+        return {name: self.versions.get(name, 0) for name in names}
+
+
+class CachedResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.renders = 0
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        app.cache_version_repo = self.versions = FakeVersionRepository()
+        app.response_cache = LRUCache(maxsize=10, ttl=60)
+
+        @app.route('/urls/<int:id>')
+        @cached_response('url:{id}')
+        def show_url(id):
+            self.renders += 1
+            if id == 404:
+                abort(404)
+
+            return f'URL {id}' + ''.join(get_flashed_messages())
+
+        @app.route('/flash')
+        def add_flash():
+            flash('Страница успешно добавлена', 'success')
+
+            return ''
+
+        self.client = app.test_client()
+
+    def test_matching_etag_returns_304_without_render(self):
+        response = self.client.get('/urls/1')
+        etag = response.headers['ETag']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        response = self.client.get(
+            '/urls/1', headers={'If-None-Match': etag}
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.renders, 1)
+
+    def test_version_bump_changes_etag(self):
+        etag = self.client.get('/urls/1').headers['ETag']
+        self.versions.versions['url:1'] = 1
+
+        response = self.client.get(
+            '/urls/1', headers={'If-None-Match': etag}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.renders, 2)
+
+    def test_page_is_rendered_once(self):
+        self.client.get('/urls/1')
+        response = self.client.get('/urls/1')
+
+        self.assertEqual(response.get_data(as_text=True), 'URL 1')
+        self.assertEqual(self.renders, 1)
+
+        # Другая страница - другой ключ кэша
+        self.client.get('/urls/2')
+        self.assertEqual(self.renders, 2)
+
+    def test_error_response_is_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/urls/404').status_code, 404)
+
+        self.assertEqual(self.renders, 2)
+
+    def test_page_with_flash_is_not_cached(self):
+        self.client.get('/flash')
+        response = self.client.get('/urls/1')
+
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+        self.assertNotIn('ETag', response.headers)
+
+        # Сообщение показано: следующая отрисовка попадает в кэш
+        self.client.get('/urls/1')
+        self.client.get('/urls/1')
+        self.assertEqual(self.renders, 2)
+
+
+class BumpAfterCommitTest(PostgresTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url_repo = UrlRepository(self.pool)
+        self.versions = CacheVersionRepository(self.pool)
+
+    def urls_version(self) -> int:
+        return self.versions.get_versions([URLS_VERSION])[URLS_VERSION]
+
+    def test_version_is_bumped_after_commit(self):
+        with unit_of_work(self.pool):
+            self.url_repo.save_url('https://site.example')
+
+            # Внутри транзакции версия еще не увеличена
+            self.assertEqual(
+                self.query('SELECT * FROM cache_versions WHERE name = %s',
+                           (URLS_VERSION,)),
+                []
+            )
+
+        self.assertEqual(self.urls_version(), 1)
+
+    def test_rollback_keeps_version(self):
+        with self.assertRaises(RuntimeError):
+            with unit_of_work(self.pool):
+                self.url_repo.save_url('https://site.example')
+                raise RuntimeError('откат')
+
+        self.assertEqual(self.urls_version(), 0)
+        self.assertEqual(self.query('SELECT id FROM urls'), [])
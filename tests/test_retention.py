@@ -0,0 +1,153 @@
+"""
+Срок хранения истории проверок ('CheckRetention'): какие секции
+'url_checks' создаются и удаляются, и перенос свернутых серий
+проверок, повторявшихся в пределах срока, из удаляемой секции.
+"""
+from datetime import date, datetime
+import gzip
+import tempfile
+import unittest
+
+from page_analyzer.repositories.check_history import (
+    CheckHistoryRepository,
+    add_months
+)
+from page_analyzer.repositories.url import UrlRepository
+from page_analyzer.services.retention import CheckRetention
+from tests.postgres import PostgresTestCase
+
+
+TODAY = date(2024, 7, 15)
+
+
+class FakeHistoryRepository:
+    """Секции в памяти, запоминающие вызовы удаления."""
+
+    def __init__(self, *months):
+        self.partitions = [
+            {'name': f'url_checks_{month:%Y_%m}', 'month': month, 'rows': 0}
+            for month in months
+        ]
+        self.created = []
+        self.dropped = []
+
+    def create_partition(self, month):
+        self.created.append(month)
+
+        return f'url_checks_{month:%Y_%m}'
+
+    def find_partitions(self):
+        return self.partitions
+
+    def drop_partition(self, name, archive_dir=None, keep_since=None):
+        self.dropped.append((name, keep_since))
+
+        return None
+
+
+class AddMonthsTest(unittest.TestCase):
+
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2024, 1, 31), 1), date(2024, 2, 1))
+        self.assertEqual(add_months(date(2024, 12, 5), 1), date(2025, 1, 1))
+        self.assertEqual(add_months(date(2024, 1, 5), -13), date(2022, 12, 1))
+
+
+class CheckRetentionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = FakeHistoryRepository(
+            date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1),
+            date(2024, 7, 1)
+        )
+        self.retention = CheckRetention(
+            self.repo, retention_months=6, months_ahead=2, archive_dir=None
+        )
+
+    def test_partitions_ahead_are_created(self):
+        self.retention.run(TODAY)
+
+        self.assertEqual(self.repo.created, [
+            date(2024, 7, 1), date(2024, 8, 1), date(2024, 9, 1)
+        ])
+
+    def test_months_before_cutoff_are_dropped(self):
+        report = self.retention.run(TODAY)
+
+        # noqa Начало срока - 1 января: секции декабря и раньше полностью устарели
+        cutoff = date(2024, 1, 1)
+        self.assertEqual(self.retention.cutoff(TODAY), cutoff)
+        self.assertEqual(
+            self.repo.dropped, [('url_checks_2023_12', cutoff)]
+        )
+        self.assertEqual(report.dropped, ['url_checks_2023_12'])
+
+    def test_dry_run_changes_nothing(self):
+        report = self.retention.run(TODAY, dry_run=True)
+
+        self.assertEqual((self.repo.created, self.repo.dropped), ([], []))
+        self.assertEqual(report.dropped, ['url_checks_2023_12'])
+        self.assertIn('Будут удалены секции: url_checks_2023_12',
+                      report.summary())
+
+    def test_zero_retention_keeps_everything(self):
+        self.retention.retention_months = 0
+
+        self.assertEqual(self.retention.expired_partitions(TODAY), [])
+
+
+class DropPartitionTest(PostgresTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.repo = CheckHistoryRepository(self.pool)
+        _, self.url_id = UrlRepository(self.pool).save_url(
+            'https://site.example'
+        )
+
+        for month in (date(2023, 12, 1), date(2024, 1, 1)):
+            self.repo.create_partition(month)
+
+    def insert_check(self, created_at, last_seen_at, title) -> None:
+        self.query(
+            'INSERT INTO url_checks '
+            '(url_id, status_code, title, created_at, last_seen_at) '
+            'VALUES (%s, 200, %s, %s, %s)',
+            (self.url_id, title, created_at, last_seen_at)
+        )
+
+    def test_live_runs_are_moved_and_others_dropped(self):
+        self.insert_check(
+            datetime(2023, 12, 3), datetime(2023, 12, 20), 'устаревшая'
+        )
+        self.insert_check(
+            datetime(2023, 12, 25), datetime(2024, 3, 1), 'повторялась'
+        )
+
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+
+        archive_path = self.repo.drop_partition(
+            'url_checks_2023_12', archive_dir=archive_dir.name,
+            keep_since=date(2024, 1, 1)
+        )
+
+        rows = self.query('SELECT title, created_at FROM url_checks')
+        self.assertEqual(rows, [
+            {'title': 'повторялась', 'created_at': datetime(2024, 1, 1)}
+        ])
+        self.assertNotIn(
+            'url_checks_2023_12',
+            [partition['name'] for partition in self.repo.find_partitions()]
+        )
+
+        # В архиве - обе проверки удаленной секции
+        with gzip.open(archive_path, 'rt', encoding='utf-8') as archive:
+            content = archive.read()
+
+        self.assertIn('устаревшая', content)
+        self.assertIn('повторялась', content)
+
+    def test_only_monthly_partitions_can_be_dropped(self):
+        with self.assertRaises(ValueError):
+            self.repo.drop_partition('url_checks_default')
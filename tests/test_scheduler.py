@@ -0,0 +1,112 @@
+"""
+Планировщик повторных проверок ('CheckScheduler'): ограничение частоты
+проверок одного хоста ('HostRateLimiter') и остановка при переполненной
+очереди.
+"""
+from datetime import datetime, timedelta
+import unittest
+
+from page_analyzer.scheduler import CheckScheduler, HostRateLimiter
+
+
+NOW = datetime(2024, 1, 1, 12, 0)
+SPACING = timedelta(seconds=10)
+
+
+class FakeScheduleRepository:
+    """Расписание в памяти, запоминающее поставленные и перенесенные URL."""
+
+    def __init__(self, due, pending_jobs=0):
+        self.due = due
+        self.pending_jobs = pending_jobs
+        self.scheduled = []
+
+    def backlog(self):
+        return {
+            'due_urls': len(self.due), 'schedule_lag': 0.0,
+            'pending_jobs': self.pending_jobs, 'queue_lag': 0.0,
+        }
+
+    def claim_due_urls(self, limit):
+        return [
+            {'id': id, 'name': name, 'now': NOW}
+            for id, name in self.due[:limit]
+        ]
+
+    def schedule(self, enqueue_ids, postponed):
+        self.scheduled.append((enqueue_ids, postponed))
+
+        return len(enqueue_ids)
+
+
+class HostRateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = HostRateLimiter(rate=6)  # Раз в 10 секунд
+
+    def test_same_host_is_spread(self):
+        slots = self.limiter.plan(['a', 'b', 'a', 'a'], NOW)
+
+        self.assertEqual(
+            slots, [NOW, NOW, NOW + SPACING, NOW + 2 * SPACING]
+        )
+
+    def test_host_is_busy_until_spacing_passes(self):
+        self.limiter.plan(['a'], NOW)
+
+        self.assertEqual(
+            self.limiter.plan(['a'], NOW + SPACING / 2), [NOW + SPACING]
+        )
+        self.assertEqual(
+            self.limiter.plan(['a'], NOW + SPACING), [NOW + SPACING]
+        )
+
+    def test_postponed_checks_do_not_reserve_slots(self):
+        self.limiter.plan(['a', 'a', 'a'], NOW)
+
+        # noqa Перенесенные проверки распределяются заново: хост занят только проверкой NOW
+        self.assertEqual(
+            self.limiter.plan(['a', 'a'], NOW + SPACING),
+            [NOW + SPACING, NOW + 2 * SPACING]
+        )
+
+    def test_free_hosts_are_forgotten(self):
+        self.limiter.plan(['a', 'b'], NOW)
+        self.limiter.plan([], NOW + SPACING)
+
+        self.assertEqual(self.limiter._free_at, {})
+
+
+class CheckSchedulerTest(unittest.TestCase):
+
+    def create_scheduler(self, repo) -> CheckScheduler:
+        return CheckScheduler(
+            repo, connection_pool=None, batch_size=10, max_pending=5,
+            limiter=HostRateLimiter(rate=6)
+        )
+
+    def test_due_urls_are_enqueued_or_postponed(self):
+        repo = FakeScheduleRepository([
+            (1, 'https://a.example/x'),
+            (2, 'https://A.example/y'),
+            (3, 'https://b.example'),
+        ])
+
+        self.assertEqual(self.create_scheduler(repo).run_once(), 3)
+        self.assertEqual(repo.scheduled, [([1, 3], {2: NOW + SPACING})])
+
+    def test_full_queue_stops_scheduling(self):
+        repo = FakeScheduleRepository(
+            [(1, 'https://a.example')], pending_jobs=5
+        )
+
+        with self.assertLogs('page_analyzer.scheduler', 'WARNING'):
+            self.assertEqual(self.create_scheduler(repo).run_once(), 0)
+
+        self.assertEqual(repo.scheduled, [])
+
+    def test_nothing_due(self):
+        repo = FakeScheduleRepository([])
+
+        self.assertEqual(self.create_scheduler(repo).run_once(), 0)
+        self.assertEqual(repo.scheduled, [])
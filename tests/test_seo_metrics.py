@@ -0,0 +1,160 @@
+"""
+Метрики SEO ('seo_metrics'), вычисляемые 'PageExtractor' за тот же
+проход, что h1, title и description: значения встроенных метрик,
+готовность метрик HEAD и загрузка метрик по имени.
+"""
+import unittest
+
+from page_analyzer.services.extractor import PageExtractor
+from page_analyzer.services.seo_metrics import (
+    METRICS,
+    HeadingsMetric,
+    MetricSet,
+    SeoMetric,
+    create_metric_set,
+    get_metric
+)
+
+
+URL = 'https://site.example/page'
+
+PAGE = (
+    '<html><head><title>T</title>'
+    '<link rel="Canonical" href=" https://site.example/ ">'
+    '<meta name="ROBOTS" content="NoIndex, follow">'
+    '</head><body>'
+    '<h1>Главный <b>заголовок</b></h1><h3>Пропуск уровня</h3>'
+    '<h2>Раздел<h2>Незакрытый</h2>'
+    '<a href="/about">1</a><a href="https://SITE.example/x">2</a>'
+    '<a href="https://other.example" rel="nofollow noopener">3</a>'
+    '<a href="mailto:info@site.example">4</a><a name="anchor">5</a>'
+    '<img src="a.png"><img src="b.png" alt=""><img src="c.png" alt="C">'
+    '<script><h1>не заголовок</h1></script>'
+    '</body></html>'
+)
+
+
+def extract(page: str, *names: str) -> dict:
+    metrics = create_metric_set(names or list(METRICS), URL)
+    extractor = PageExtractor(metrics)
+    extractor.feed(page)
+    extractor.close()
+
+    return metrics.results()
+
+
+class BuiltinMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.results = extract(PAGE)
+
+    def test_head_metrics(self):
+        self.assertEqual(self.results['canonical'], 'https://site.example/')
+        self.assertEqual(self.results['robots'], {
+            'directives': ['noindex', 'follow'],
+            'noindex': True,
+            'nofollow': False,
+        })
+
+    def test_links(self):
+        self.assertEqual(self.results['links'], {
+            'total': 4, 'internal': 2, 'external': 1, 'nofollow': 1
+        })
+
+    def test_images(self):
+        self.assertEqual(self.results['images'], {
+            'total': 3, 'missing_alt': 1, 'empty_alt': 1
+        })
+
+    def test_headings(self):
+        headings = self.results['headings']
+
+        self.assertEqual(
+            {tag: count for tag, count in headings['counts'].items() if count},
+            {'h1': 1, 'h2': 2, 'h3': 1}
+        )
+        self.assertEqual(headings['skipped_levels'], 1)
+        self.assertEqual(headings['outline'], [
+            [1, 'Главный заголовок'], [3, 'Пропуск уровня'], [2, 'Раздел'],
+            [2, 'Незакрытый'],
+        ])
+
+    def test_missing_head_values(self):
+        results = extract('<title>T</title><h1>H</h1>', 'canonical', 'robots')
+
+        self.assertEqual(results, {'canonical': None, 'robots': None})
+
+    def test_head_values_after_body_are_ignored(self):
+        results = extract(
+            '<head></head><body><link rel="canonical" href="/late">',
+            'canonical'
+        )
+
+        self.assertIsNone(results['canonical'])
+
+
+class MetricSetTest(unittest.TestCase):
+
+    def test_head_metrics_complete_extraction_early(self):
+        extractor = PageExtractor(create_metric_set(['canonical'], URL))
+        extractor.feed(
+            '<title>T</title><meta name="description" content="D">'
+            '<link rel="canonical" href="/"><h1>H</h1>'
+        )
+
+        self.assertTrue(extractor.complete)
+
+        # noqa Метрике всего документа нужна вся страница: загрузка продолжается
+        extractor = PageExtractor(create_metric_set(['links'], URL))
+        extractor.feed(
+            '<title>T</title><meta name="description" content="D"><h1>H</h1>'
+        )
+
+        self.assertFalse(extractor.complete)
+
+    def test_events_reach_only_subscribed_metrics(self):
+        headings = HeadingsMetric(URL)
+        metrics = MetricSet([headings])
+
+        metrics.start('a', [('href', '/')])
+        metrics.start('h2', [])
+        metrics.data('Текст')
+        metrics.end('h2')
+
+        self.assertEqual(headings.result()['outline'], [[2, 'Текст']])
+
+
+class CustomMetric(SeoMetric):
+    """Метрика, подключаемая по пути 'модуль:Класс'."""
+
+    name = 'forms'
+    start_tags = frozenset({'form'})
+
+    def __init__(self, url: str = ''):
+        super().__init__(url)
+        self.count = 0
+
+    def start(self, tag, attrs):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+
+class GetMetricTest(unittest.TestCase):
+
+    def test_metric_by_module_path(self):
+        self.assertIs(get_metric(f'{__name__}:CustomMetric'), CustomMetric)
+        self.assertEqual(
+            extract('<form></form><form>', f'{__name__}:CustomMetric'),
+            {'forms': 2}
+        )
+
+    def test_unknown_metric(self):
+        for name in ('unknown', 'missing.module:Metric', f'{__name__}:Nope'):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    get_metric(name)
+
+    def test_no_metrics_configured(self):
+        self.assertIsNone(create_metric_set([' ', '']))
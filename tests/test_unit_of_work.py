@@ -0,0 +1,107 @@
+"""
+Общая транзакция единицы работы ('unit_of_work'): ошибка сохранения
+проверки ('save_checks_url') откатывается до точки сохранения и не
+прерывает транзакцию для следующих вызовов репозиториев.
+"""
+import unittest
+
+import psycopg2
+
+from page_analyzer.db_connections.connection_manager import unit_of_work
+from page_analyzer.repositories.url import UrlRepository
+from tests.postgres import PostgresTestCase
+
+
+# Запрос сохранения без декораторов: курсор передается тестом
+insert_checks_url = UrlRepository._insert_checks_url.__wrapped__.__wrapped__
+
+CHECK = {
+    'status_code': 200, 'h1': 'H', 'title': 'T', 'description': 'D',
+    'bytes_read': 100, 'etag': None, 'last_modified': None,
+    'conditional_hit': False, 'snapshot_hash': None, 'seo_metrics': None,
+}
+
+
+class DataError(psycopg2.Error):
+    """Ошибка запроса: значение вне диапазона столбца."""
+
+    pgcode = '22003'
+
+
+class RecordingCursor:
+    """Курсор, запоминающий запросы; запрос проверки вызывает 'error'."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.statements = []
+
+    def execute(self, query, params=None):
+        statement = query if 'SAVEPOINT' in query else 'SAVE_CHECKS_QUERY'
+        self.statements.append(statement)
+
+        if statement == 'SAVE_CHECKS_QUERY' and self.error is not None:
+            raise self.error
+
+
+class SavepointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = UrlRepository.__new__(UrlRepository)
+
+    def test_success_releases_savepoint(self):
+        cursor = RecordingCursor()
+
+        self.assertTrue(insert_checks_url(self.repo, cursor, 1, CHECK))
+        self.assertEqual(cursor.statements, [
+            'SAVEPOINT save_checks_url',
+            'SAVE_CHECKS_QUERY',
+            'RELEASE SAVEPOINT save_checks_url',
+        ])
+
+    def test_query_error_rolls_back_to_savepoint(self):
+        cursor = RecordingCursor(DataError('integer out of range'))
+
+        with self.assertLogs('page_analyzer.repositories.url', 'ERROR'):
+            self.assertFalse(insert_checks_url(self.repo, cursor, 1, CHECK))
+
+        self.assertEqual(cursor.statements, [
+            'SAVEPOINT save_checks_url',
+            'SAVE_CHECKS_QUERY',
+            'ROLLBACK TO SAVEPOINT save_checks_url',
+        ])
+
+    def test_transient_error_propagates(self):
+        cursor = RecordingCursor(psycopg2.OperationalError('connection lost'))
+
+        with self.assertRaises(psycopg2.OperationalError):
+            insert_checks_url(self.repo, cursor, 1, CHECK)
+
+        self.assertNotIn(
+            'ROLLBACK TO SAVEPOINT save_checks_url', cursor.statements
+        )
+
+
+class UnitOfWorkTest(PostgresTestCase):
+
+    def test_failed_check_keeps_transaction_usable(self):
+        repo = UrlRepository(self.pool)
+
+        with unit_of_work(self.pool):
+            _, url_id = repo.save_url('https://site.example')
+
+            # bytes_read не помещается в столбец INT
+            saved = repo.save_checks_url(
+                url_id, dict(CHECK, bytes_read=2 ** 40)
+            )
+
+            self.assertFalse(saved)
+            self.assertEqual(repo.find_url(url_id)['id'], url_id)
+            self.assertTrue(repo.save_checks_url(url_id, CHECK))
+
+        self.assertEqual(
+            self.query('SELECT count(*) AS urls FROM urls'), [{'urls': 1}]
+        )
+        self.assertEqual(
+            self.query('SELECT bytes_read FROM url_checks'),
+            [{'bytes_read': 100}]
+        )